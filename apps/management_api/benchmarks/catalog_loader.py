@@ -0,0 +1,108 @@
+"""Compare startup time and peak RSS of the pandas, stdlib-csv and mapped catalog loaders.
+
+Run from ``apps/management_api``::
+
+    python -m benchmarks.catalog_loader --runs 5
+
+Each loader runs in a fresh interpreter, so the numbers include its imports.
+The pandas variant reproduces the loader this service used before and is
+skipped when pandas is not installed. The mapped variant opens a catalog
+file built from the same CSV beforehand (what each ``--workers`` process
+does); its blobs stay in the shared page cache rather than private memory.
+"""
+
+import os
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+PROBE = """
+import json, time, resource
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "findings": len(store),
+}}))
+"""
+
+LOADERS: Dict[str, str] = {
+    "pandas": """
+import pandas as pd
+from src.utils.pymodels import Vulnerability
+from src.utils.vulnerability_store import VulnerabilityStore, make_vulnerability_id
+df = pd.read_csv(PATH).fillna("n/a")
+data = {}
+for record in df.to_dict(orient="records"):
+    vuln = Vulnerability(
+        code=record["Vulnerable"], title=str(record["Title"]).strip(),
+        category=record["Category"], fix_code=record["Fixed"], notes=record["Notes"],
+    )
+    vuln.id = make_vulnerability_id(record["Codebase"], vuln)
+    data.setdefault(record["Codebase"], []).append(vuln)
+store = VulnerabilityStore(data)
+""",
+    "csv": """
+from src.utils.vulnerability_store import VulnerabilityStore, iter_csv_vulnerabilities
+data = {}
+for codebase, vuln in iter_csv_vulnerabilities(PATH):
+    data.setdefault(codebase, []).append(vuln)
+store = VulnerabilityStore(data)
+""",
+    "mapped": """
+from src.utils.catalog_file import MappedVulnerabilityStore
+store = MappedVulnerabilityStore(CATALOG_FILE)
+""",
+}
+
+
+def measure(body: str, path: str, catalog_file: str, runs: int) -> List[dict]:
+    """Run one loader ``runs`` times in fresh interpreters."""
+    code = PROBE.format(
+        body=f"PATH = {path!r}\nCATALOG_FILE = {catalog_file!r}\n{body}"
+    )
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="src/utils/data.csv")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Built in a child: peak RSS survives exec, so the parent must stay small.
+    catalog_file = os.path.join(tempfile.mkdtemp(), "catalog.vcat")
+    subprocess.run(
+        [sys.executable, "build_catalog.py", "--csv", args.path, "--out", catalog_file],
+        capture_output=True,
+        check=True,
+    )
+
+    for name, body in LOADERS.items():
+        try:
+            samples = measure(body, args.path, catalog_file, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<7} skipped: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        seconds = statistics.median(s["seconds"] for s in samples) * 1000
+        rss = statistics.median(s["maxrss_mb"] for s in samples)
+        print(
+            f"{name:<7} {samples[0]['findings']} findings  "
+            f"load+imports={seconds:7.1f} ms  peak RSS={rss:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
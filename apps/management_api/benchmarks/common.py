@@ -0,0 +1,23 @@
+"""Dataset and statistics helpers shared by the benchmark scripts.
+
+Kept free of ``src`` imports so client-side tools (the load generator) do
+not pay for loading the orchestrator.
+"""
+
+import csv
+from typing import Dict, List, Sequence, Tuple
+
+DATASET = "benchmarks/data/labeled_feedback.csv"
+
+
+def load_dataset(path: str = DATASET) -> List[Tuple[str, str]]:
+    """Labeled ``(feedback, category)`` pairs."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [(row["feedback"], row["category"]) for row in csv.DictReader(f)]
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
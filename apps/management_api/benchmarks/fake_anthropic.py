@@ -0,0 +1,262 @@
+"""Local stand-in for the Anthropic Messages API, for load tests.
+
+Serves ``POST /v1/messages`` (plain and ``stream: true``) well enough for
+``ChatAnthropic`` to talk to it through a base-URL override::
+
+    python -m benchmarks.fake_anthropic --port 8100 --latency 0.5 --error-rate 0.01
+    ANTHROPIC_API_URL=http://127.0.0.1:8100 ANTHROPIC_API_KEY=fake python main.py
+
+Requests with a system prompt get the canned classifier verdict, the rest the
+canned fix (the same outputs as ``StubChatModel``). When tools are offered the
+reply is a ``tool_use`` block for the forced (or first) tool. Usage metadata
+is filled from a rough 4-characters-per-token estimate; ``cache_control``
+blocks report cache creation on first sight and cache reads afterwards.
+``--model-latency`` overrides the latency for one model name, e.g. to make
+the primary classifier slow and watch the orchestrator fall back.
+"""
+
+import json
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from benchmarks.stub_llm import StubChatModel
+
+STUB = StubChatModel()
+
+
+class FakeAnthropic:
+    """Canned Messages API replies with injected latency and errors."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        token_latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 529,
+        seed: int = 0,
+        model_latency: Optional[Dict[str, float]] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.model_latency = model_latency or {}
+        self.rng = random.Random(seed)
+        self.seen_prefixes: set = set()
+        self.requests = 0
+        self.errors = 0
+        self.models: Counter = Counter()
+
+    # --------- request handling ---------
+
+    def _delay(self, model: str) -> float:
+        latency = self.model_latency.get(model, self.latency)
+        return max(0.0, latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _usage(self, body: dict, output: str) -> dict:
+        """Estimate token counts, treating ``cache_control`` prefixes as cacheable."""
+        blocks = []
+        system = body.get("system") or []
+        blocks += [{"text": system}] if isinstance(system, str) else system
+        for message in body.get("messages", []):
+            content = message.get("content")
+            blocks += [{"text": content}] if isinstance(content, str) else content
+
+        usage = {"input_tokens": 0, "cache_read_input_tokens": 0,
+                 "cache_creation_input_tokens": 0}
+        prefix = hashlib.sha256()
+        pending = 0
+        for block in blocks:
+            text = block.get("text", "") if isinstance(block, dict) else str(block)
+            prefix.update(text.encode("utf-8"))
+            pending += len(text) // 4
+            if isinstance(block, dict) and block.get("cache_control"):
+                digest = prefix.hexdigest()
+                if digest in self.seen_prefixes:
+                    usage["cache_read_input_tokens"] += pending
+                else:
+                    self.seen_prefixes.add(digest)
+                    usage["cache_creation_input_tokens"] += pending
+                pending = 0
+        usage["input_tokens"] = pending
+        usage["output_tokens"] = max(1, len(output) // 4)
+        return usage
+
+    def _content(self, body: dict) -> dict:
+        """The single content block this request is answered with."""
+        tools = body.get("tools") or []
+        if tools:
+            choice = body.get("tool_choice") or {}
+            tool = next(
+                (t for t in tools if t.get("name") == choice.get("name")), tools[0]
+            )
+            return {
+                "type": "tool_use",
+                "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                "name": tool["name"],
+                "input": self._tool_input(tool.get("input_schema") or {}),
+            }
+        text = STUB.classifier_output if body.get("system") else STUB.fixer_output
+        return {"type": "text", "text": text}
+
+    @staticmethod
+    def _tool_input(schema: dict) -> dict:
+        """A minimal valid argument object for a JSON schema."""
+        values = {}
+        definitions = schema.get("$defs", {})
+        for name, prop in schema.get("properties", {}).items():
+            ref = prop.get("$ref") or (prop.get("allOf") or [{}])[0].get("$ref")
+            if ref:
+                prop = definitions.get(ref.rsplit("/", 1)[-1], prop)
+            if "enum" in prop:
+                values[name] = prop["enum"][0]
+            elif prop.get("type") in ("integer", "number"):
+                values[name] = 0
+            elif prop.get("type") == "boolean":
+                values[name] = False
+            elif prop.get("type") == "array":
+                values[name] = []
+            else:
+                values[name] = "stubbed"
+        return values
+
+    def _error(self) -> Optional[JSONResponse]:
+        if self.rng.random() >= self.error_rate:
+            return None
+        self.errors += 1
+        kind = "overloaded_error" if self.error_status == 529 else "api_error"
+        return JSONResponse(
+            {"type": "error", "error": {"type": kind, "message": "injected error"}},
+            status_code=self.error_status,
+        )
+
+    async def messages(self, request: Request):
+        body = await request.json()
+        self.requests += 1
+        self.models[body.get("model", "fake")] += 1
+        await asyncio.sleep(self._delay(body.get("model", "fake")))
+        error = self._error()
+        if error is not None:
+            return error
+
+        content = self._content(body)
+        output = content.get("text") or json.dumps(content.get("input", {}))
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [content],
+            "stop_reason": "tool_use" if content["type"] == "tool_use" else "end_turn",
+            "stop_sequence": None,
+            "usage": self._usage(body, output),
+        }
+        if not body.get("stream"):
+            await asyncio.sleep(self.token_latency * len(STUB._tokens(output)))
+            return JSONResponse(message)
+        return StreamingResponse(
+            self._stream(message, output), media_type="text/event-stream"
+        )
+
+    async def _stream(self, message: dict, output: str) -> AsyncIterator[str]:
+        """Replay ``message`` as Messages API server-sent events."""
+        content = message["content"][0]
+        usage = message["usage"]
+        start = {**message, "content": [], "stop_reason": None,
+                 "usage": {**usage, "output_tokens": 1}}
+        yield _event("message_start", {"type": "message_start", "message": start})
+
+        if content["type"] == "tool_use":
+            block = {**content, "input": {}}
+            delta_type, delta_key = "input_json_delta", "partial_json"
+        else:
+            block = {"type": "text", "text": ""}
+            delta_type, delta_key = "text_delta", "text"
+        yield _event(
+            "content_block_start",
+            {"type": "content_block_start", "index": 0, "content_block": block},
+        )
+        for token in STUB._tokens(output):
+            await asyncio.sleep(self.token_latency)
+            yield _event(
+                "content_block_delta",
+                {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {"type": delta_type, delta_key: token},
+                },
+            )
+        yield _event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _event(
+            "message_delta",
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                # Like the real API, the final delta carries the cumulative usage.
+                "usage": usage,
+            },
+        )
+        yield _event("message_stop", {"type": "message_stop"})
+
+
+def _event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_app(fake: FakeAnthropic) -> FastAPI:
+    app = FastAPI()
+    app.post("/v1/messages")(fake.messages)
+
+    @app.get("/stats")
+    def stats():
+        return {"requests": fake.requests, "errors": fake.errors, "models": fake.models}
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds to first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds on latency")
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--model-latency",
+        action="append",
+        default=[],
+        metavar="MODEL=SECONDS",
+        help="latency for one model (repeatable)",
+    )
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    fake = FakeAnthropic(
+        latency=args.latency,
+        jitter=args.jitter,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        model_latency={
+            model: float(seconds)
+            for model, seconds in (item.split("=", 1) for item in args.model_latency)
+        },
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
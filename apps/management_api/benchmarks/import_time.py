@@ -0,0 +1,108 @@
+"""Measure how long ``import main`` takes and fail when it exceeds a budget.
+
+Run from ``apps/management_api``::
+
+    python -m benchmarks.import_time --runs 5 --budget 1.0
+
+Each run imports the API module in a fresh interpreter (what a new container
+or worker pays before uvicorn can accept traffic) and reports the median
+wall time plus the slowest top-level imports from ``-X importtime``. The
+script exits with status 1 when the median is over ``--budget`` seconds or
+when a module that must load lazily (the LLM stack, IPython, pandas) was
+imported, so it can gate CI.
+"""
+
+import os
+import re
+import json
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Loaded on first use or by the background warm-up, never by ``import main``.
+LAZY_MODULES = (
+    "anthropic",
+    "langchain_anthropic",
+    "langgraph",
+    "langchain.prompts",
+    "IPython",
+    "pandas",
+)
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module: str, runs: int) -> List[dict]:
+    """Import ``module`` ``runs`` times in fresh interpreters."""
+    code = PROBE.format(module=module, lazy=LAZY_MODULES)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(module: str, top: int) -> List[Tuple[str, float]]:
+    """The ``top`` direct dependencies of ``module`` by cumulative import time."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, float] = {}
+    for line in out.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        # Depth 1 (two spaces of indent) = imported directly by the root module.
+        if match and len(match.group(3)) == 3:
+            cumulative[match.group(4)] = int(match.group(2)) / 1e6
+    return sorted(cumulative.items(), key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET", "1.0")),
+        help="maximum median import time in seconds (env IMPORT_TIME_BUDGET)",
+    )
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    # Compile once first so every measured run reads warm bytecode.
+    measure(args.module, 1)
+    samples = measure(args.module, args.runs)
+    seconds = statistics.median(s["seconds"] for s in samples)
+    loaded = sorted({m for s in samples for m in s["loaded"]})
+
+    print(f"import {args.module}: median {seconds * 1000:.0f} ms over {args.runs} runs")
+    for name, cumulative in slowest_imports(args.module, args.top):
+        print(f"  {cumulative * 1000:8.1f} ms  {name}")
+
+    failed = False
+    if seconds > args.budget:
+        print(f"FAIL: over the {args.budget * 1000:.0f} ms budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported eagerly: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
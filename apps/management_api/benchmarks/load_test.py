@@ -0,0 +1,319 @@
+"""Open-loop load test of the management API against the fake Anthropic server.
+
+Run from ``apps/management_api``::
+
+    python -m benchmarks.load_test --rates 5,20,50 --duration 30 --out runs/$(git rev-parse --short HEAD).json
+
+By default it starts ``benchmarks.fake_anthropic`` and ``main.py`` as
+subprocesses (the API pointed at the fake through ``ANTHROPIC_API_URL``) and
+samples the API process' CPU and RSS from ``/proc``. Pass ``--target`` (and
+optionally ``--pid``) to load an already running server instead.
+
+Requests are sent at a fixed arrival rate regardless of how fast responses
+come back, so queueing shows up as latency instead of as a lower send rate.
+Each (endpoint, rate) pair is one scenario with its own throughput, latency
+percentiles, error counts and server resource usage. Requests come from
+``--clients`` distinct ``X-Forwarded-For`` addresses, so the per-client rate
+limit sees many users rather than one. The API only honors that header from
+``TRUSTED_PROXIES``: spawned servers trust the load generator on loopback,
+and a ``--target`` must list the generator's address too, or every request
+counts against a single client.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import httpx
+from benchmarks.common import load_dataset, percentiles
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+# ---------- server resource sampling ----------
+
+
+def read_cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time of ``pid`` (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of ``pid`` in MiB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class ResourceSampler:
+    """Samples RSS periodically and CPU time at start/stop of a scenario."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.rss: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                self.rss.append(rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.rss = []
+        self._cpu = read_cpu_seconds(self.pid) if self.pid else None
+        self._wall = time.perf_counter()
+        if self.pid:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        cpu = read_cpu_seconds(self.pid) if self.pid else None
+        if self._cpu is None or cpu is None:
+            return {"cpu_percent": None, "rss_mb_max": None, "rss_mb_mean": None}
+        wall = time.perf_counter() - self._wall
+        return {
+            "cpu_percent": round(100 * (cpu - self._cpu) / wall, 1),
+            "rss_mb_max": round(max(self.rss), 1) if self.rss else None,
+            "rss_mb_mean": round(sum(self.rss) / len(self.rss), 1) if self.rss else None,
+        }
+
+
+# ---------- requests ----------
+
+
+def make_chat_bodies(titles: Dict[str, List[dict]], cache: bool) -> List[dict]:
+    """One chat request per labeled feedback string, spread over the catalog."""
+    vulns = [v["id"] for items in titles.values() for v in items]
+    rng = random.Random(0)
+    return [
+        {
+            "memory": [],
+            "user_input": feedback,
+            "vulnerability_id": rng.choice(vulns) if vulns else None,
+            "bypass_cache": not cache,
+        }
+        for feedback, _ in load_dataset()
+    ]
+
+
+async def send(
+    client: httpx.AsyncClient, endpoint: str, body: Optional[dict], headers: dict
+) -> Tuple[float, str]:
+    """Issue one request; returns latency and an outcome label."""
+    start = time.perf_counter()
+    try:
+        if endpoint == "vulnerabilities":
+            response = await client.get("/vulnerabilities", headers=headers)
+        elif endpoint == "titles":
+            response = await client.get(
+                "/vulnerabilities", params={"view": "titles"}, headers=headers
+            )
+        elif endpoint == "chat":
+            response = await client.post("/chat", json=body, headers=headers)
+        else:  # chat_stream: latency is until the final "done" event
+            async with client.stream(
+                "POST", "/chat/stream", json=body, headers=headers
+            ) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+        outcome = str(response.status_code)
+    except httpx.TimeoutException:
+        outcome = "timeout"
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    return time.perf_counter() - start, outcome
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    rate: float,
+    duration: float,
+    bodies: List[dict],
+    sampler: ResourceSampler,
+    clients: int = 1000,
+) -> dict:
+    """Fire ``rate`` requests per second for ``duration`` seconds, open loop."""
+    total = int(rate * duration)
+    tasks = []
+    sampler.start()
+    start = time.perf_counter()
+    for i in range(total):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        body = bodies[i % len(bodies)] if endpoint.startswith("chat") else None
+        user = i % clients
+        address = f"10.{user >> 16 & 255}.{user >> 8 & 255}.{user & 255}"
+        headers = {"X-Forwarded-For": address}
+        tasks.append(asyncio.create_task(send(client, endpoint, body, headers)))
+    send_lag = time.perf_counter() - (start + (total - 1) / rate)
+    results = await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+    resources = await sampler.stop()
+
+    outcomes = Counter(outcome for _, outcome in results)
+    ok = [latency for latency, outcome in results if outcome == "200"]
+    ms = lambda seconds: round(seconds * 1000, 1)  # noqa: E731
+    return {
+        "endpoint": endpoint,
+        "target_rps": rate,
+        "sent": total,
+        "throughput_rps": round(len(ok) / wall, 2),
+        "error_rate": round(1 - len(ok) / total, 4) if total else 0.0,
+        "outcomes": dict(outcomes),
+        "latency_ms": {k: ms(v) for k, v in percentiles(ok).items()} if ok else None,
+        "generator_lag_ms": ms(max(0.0, send_lag)),
+        **resources,
+    }
+
+
+# ---------- subprocesses ----------
+
+
+def spawn_servers(args) -> Tuple[List[subprocess.Popen], subprocess.Popen]:
+    """Start the fake Anthropic API and the management API pointing at it."""
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_anthropic",
+            "--port", str(args.fake_port),
+            "--latency", str(args.llm_latency),
+            "--jitter", str(args.llm_jitter),
+            "--token-latency", str(args.token_latency),
+            "--error-rate", str(args.llm_error_rate),
+        ]
+    )
+    env = {
+        **os.environ,
+        "PORT": str(args.port),
+        "ANTHROPIC_API_URL": f"http://127.0.0.1:{args.fake_port}",
+        "ANTHROPIC_API_KEY": "load-test",
+        # Act as the proxy in front of the API so --clients addresses count.
+        "TRUSTED_PROXIES": "127.0.0.1",
+    }
+    api = subprocess.Popen(
+        [sys.executable, "main.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.server_logs else subprocess.DEVNULL,
+    )
+    return [fake, api], api
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit(f"{client.base_url} did not become healthy in {timeout:.0f}s")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    processes: List[subprocess.Popen] = []
+    pid = args.pid
+    target = args.target
+    if target is None:
+        processes, api = spawn_servers(args)
+        pid, target = api.pid, f"http://127.0.0.1:{args.port}"
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=target,
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        ) as client:
+            await wait_until_healthy(client)
+            titles = (await client.get("/vulnerabilities", params={"view": "titles"})).json()
+            bodies = make_chat_bodies(titles, args.cache)
+            sampler = ResourceSampler(pid)
+
+            scenarios = []
+            for endpoint in args.endpoints.split(","):
+                for rate in (float(r) for r in args.rates.split(",")):
+                    result = await run_scenario(
+                        client, endpoint, rate, args.duration, bodies, sampler, args.clients
+                    )
+                    print(json.dumps(result), flush=True)
+                    scenarios.append(result)
+                    await asyncio.sleep(args.cooldown)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    return {
+        "revision": git_revision(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("out", "server_logs")
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", default="vulnerabilities,chat",
+                        help="comma list of vulnerabilities, titles, chat, chat_stream")
+    parser.add_argument("--rates", default="5,10,20", help="requests per second, comma list")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--cache", action="store_true", help="allow response-cache hits")
+    parser.add_argument("--clients", type=int, default=1000, help="distinct client addresses")
+    parser.add_argument("--target", help="URL of a running API (skips spawning servers)")
+    parser.add_argument("--pid", type=int, help="PID of --target, for CPU/RSS sampling")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--server-logs", action="store_true")
+    parser.add_argument("--out", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
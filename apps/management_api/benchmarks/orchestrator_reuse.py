@@ -0,0 +1,65 @@
+"""Measure the per-request setup cost removed by sharing one ChatOrchestrator.
+
+Run from ``apps/management_api``::
+
+    python -m benchmarks.orchestrator_reuse --requests 200 --concurrency 16
+
+No LLM calls are made: only the work a request used to pay before reaching
+the model (client construction, connection pool setup and graph compile).
+"""
+
+import os
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark-placeholder")
+
+from src.agents.orchestrator import ChatOrchestrator, get_orchestrator  # noqa: E402
+
+
+def run(setup: Callable[[], ChatOrchestrator], requests: int, concurrency: int):
+    """Time ``setup`` for every simulated request under a thread pool."""
+
+    def one(_: int) -> float:
+        start = time.perf_counter()
+        setup()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples: List[float] = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+        "total_s": wall,
+        "req_per_s": requests / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    get_orchestrator()  # warm the shared instance, as the first request would
+
+    for name, setup in (
+        ("per-request", ChatOrchestrator),
+        ("shared", get_orchestrator),
+    ):
+        result = run(setup, args.requests, args.concurrency)
+        print(
+            f"{name:<12} p50={result['p50_ms']:8.3f} ms  p95={result['p95_ms']:8.3f} ms  "
+            f"total={result['total_s']:6.2f} s  ({result['req_per_s']:.0f} setups/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
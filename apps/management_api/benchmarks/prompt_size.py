@@ -0,0 +1,95 @@
+"""Input tokens of the classifier and fixer prompts before/after compaction.
+
+Run from ``apps/management_api``::
+
+    python -m benchmarks.prompt_size
+    python -m benchmarks.prompt_size --budget 300       # tighter PROMPT_CODE_TOKENS
+    python -m benchmarks.prompt_size --exact            # count with the Anthropic API
+
+"Before" is the same prompt with the vulnerability embedded as
+``model_dump_json(indent=4)``, as it was before compaction. Counts are the
+~4 characters/token estimate unless ``--exact`` is given.
+"""
+
+import os
+import json
+import argparse
+from typing import Callable, Dict, List, Optional
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=int, help="override PROMPT_CODE_TOKENS")
+    parser.add_argument("--exact", action="store_true", help="use messages.count_tokens")
+    parser.add_argument("--model", default="claude-sonnet-4-20250514")
+    parser.add_argument("--out", help="also write the results as JSON here")
+    args = parser.parse_args(argv)
+    if args.budget is not None:
+        os.environ["PROMPT_CODE_TOKENS"] = str(args.budget)
+
+    # Imported after the budget override so the prompt builders pick it up.
+    from src.utils.common import estimate_tokens, get_vulnerability_store
+    from src.utils.pymodels import ChatRequest, FixCategory
+    from src.agent_prompt.classifier import get_user_prompt
+    from src.agent_prompt.code_fix_agent import get_fix_user_prompt
+    from src.agent_prompt.compaction import render_vulnerability
+    from benchmarks.common import percentiles
+
+    count: Callable[[str], int] = estimate_tokens
+    if args.exact:
+        import anthropic
+
+        client = anthropic.Anthropic()
+        count = lambda text: client.messages.count_tokens(  # noqa: E731
+            model=args.model, messages=[{"role": "user", "content": text}]
+        ).input_tokens
+
+    prompts = {
+        "classifier": lambda request, vuln: (
+            get_user_prompt(request, vuln).text(),
+            render_vulnerability(vuln),
+        ),
+        **{
+            f"fixer:{category.value}": (
+                lambda request, vuln, category=category: (
+                    get_fix_user_prompt(category.value, request, vuln).text(),
+                    render_vulnerability(vuln, category),
+                )
+            )
+            for category in (FixCategory.INCORRECT_LOGIC, FixCategory.TRY_ANOTHER_FIX)
+        },
+    }
+
+    store = get_vulnerability_store()
+    results: Dict[str, dict] = {}
+    for name, build in prompts.items():
+        before: List[int] = []
+        after: List[int] = []
+        for codebase, vulns in store.by_codebase.items():
+            for vuln in vulns:
+                request = ChatRequest(user_input="the fix is wrong", codebase=codebase)
+                text, rendered = build(request, vuln)
+                after.append(count(text))
+                before.append(count(text.replace(rendered, vuln.model_dump_json(indent=4))))
+        results[name] = {
+            "prompts": len(after),
+            "tokens_before": sum(before),
+            "tokens_after": sum(after),
+            "reduction": 1 - sum(after) / sum(before),
+            "before": percentiles(before),
+            "after": percentiles(after),
+        }
+
+    print(f"{'prompt':<26} {'before':>8} {'after':>8} {'saved':>6}  p95 before → after")
+    for name, r in results.items():
+        print(
+            f"{name:<26} {r['tokens_before']:>8} {r['tokens_after']:>8} "
+            f"{r['reduction']:>6.1%}  {r['before']['p95']} → {r['after']['p95']}"
+        )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Classifier accuracy and pipeline latency benchmarks for ChatOrchestrator.
+
+Run from ``apps/management_api``::
+
+    python -m benchmarks.run_benchmark stub --requests 500 --concurrency 50
+    python -m benchmarks.run_benchmark fast
+    python -m benchmarks.run_benchmark live --concurrency 4   # needs ANTHROPIC_API_KEY
+    python -m benchmarks.run_benchmark live --classifier-mode markdown
+
+``stub`` and ``fast`` are fully offline:
+
+- stub: drives the real graph with StubChatModel and reports p50/p95/p99
+  latency, throughput and the time each node spends outside the (known)
+  stub LLM latency, i.e. our own pipeline overhead. ``--error-rate`` and
+  ``--tail-rate``/``--tail-latency`` inject upstream failures and slow
+  outliers to exercise retries, ``--hedge`` and the circuit breaker.
+- fast: accuracy and confusion matrix of the local fast-path classifier on
+  the labeled dataset, which it never trains on, and the share of it that
+  would skip the LLM (coverage) with its accuracy at each threshold.
+- live: accuracy and confusion matrix of the LLM classifier (fast path off),
+  with its latency and output tokens; run it once per ``--classifier-mode``
+  to compare the structured tool call with the free-text verdict.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import argparse
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from src.agents.orchestrator import ChatOrchestrator
+from src.utils.common import (
+    CLASSIFIER_MODE,
+    FAST_CLASSIFIER_MIN_WORDS,
+    FAST_CLASSIFIER_PATH,
+    FAST_CLASSIFIER_THRESHOLD,
+    get_vulnerability_store,
+)
+from src.utils.fast_classifier import FastFeedbackClassifier
+from src.utils.pymodels import ChatRequest
+from src.utils.metrics import render_metrics
+from benchmarks.common import load_dataset, percentiles
+from benchmarks.stub_llm import StubChatModel
+
+
+def accuracy_report(pairs: Sequence[Tuple[str, str]]) -> dict:
+    """Accuracy, per-class recall and confusion counts for ``(truth, predicted)``."""
+    confusion: Dict[str, Counter] = defaultdict(Counter)
+    for truth, predicted in pairs:
+        confusion[truth][predicted] += 1
+    correct = sum(1 for truth, predicted in pairs if truth == predicted)
+    return {
+        "n": len(pairs),
+        "accuracy": correct / len(pairs) if pairs else 0.0,
+        "recall": {
+            truth: row[truth] / sum(row.values())
+            for truth, row in sorted(confusion.items())
+        },
+        "confusion": {truth: dict(row) for truth, row in sorted(confusion.items())},
+    }
+
+
+def print_accuracy(report: dict) -> None:
+    print(f"accuracy: {report['accuracy']:.1%} over {report['n']} examples")
+    print(f"{'category':<30} {'recall':>7}  confused with")
+    for truth, recall in report["recall"].items():
+        mistakes = ", ".join(
+            f"{predicted}×{count}"
+            for predicted, count in report["confusion"][truth].items()
+            if predicted != truth
+        )
+        print(f"{truth:<30} {recall:>7.0%}  {mistakes}")
+
+
+# ---------- stub: pipeline latency ----------
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records wall time of each LangGraph node run."""
+
+    def __init__(self):
+        self.started: Dict[UUID, Tuple[str, float]] = {}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if metadata and metadata.get("langgraph_node") == name:
+            self.started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.started:
+            name, start = self.started.pop(run_id)
+            self.durations[name].append(time.perf_counter() - start)
+
+
+async def run_stub(args) -> dict:
+    llm = StubChatModel(
+        latency=args.llm_latency,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+    )
+    orchestrator = ChatOrchestrator(llm=llm, classifier_mode=args.classifier_mode)
+    if args.no_fast_path:
+        orchestrator.fast_classifier = None
+    for caller in orchestrator.resilience.values():
+        caller.hedge = caller.hedge or args.hedge
+
+    store = get_vulnerability_store()
+    targets = [
+        (codebase, vuln.title)
+        for codebase, vulns in store.by_codebase.items()
+        for vuln in vulns
+        if vuln.title != "n/a"
+    ]
+    dataset = load_dataset()
+    timer = NodeTimer()
+    prepare: List[float] = []
+    latencies: List[float] = []
+    failures: Counter = Counter()
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        feedback, _ = dataset[i % len(dataset)]
+        codebase, title = targets[i % len(targets)]
+        request = ChatRequest(
+            memory=[],
+            user_input=feedback,
+            codebase=codebase,
+            title=title,
+            bypass_cache=not args.cache,
+        )
+        async with slots:
+            start = time.perf_counter()
+            state = orchestrator._initial_state(request)
+            prepared = time.perf_counter()
+            try:
+                await orchestrator.graph.ainvoke(state, config={"callbacks": [timer]})
+            except Exception as e:
+                failures[type(e).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            prepare.append(prepared - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    wall = time.perf_counter() - start
+
+    verdict = (
+        json.dumps(llm.verdict_args())
+        if orchestrator.classifier_mode == "structured"
+        else llm.classifier_output
+    )
+    stub_time = {
+        node: args.llm_latency + args.token_latency * len(llm._tokens(output))
+        for node, output in (("classifier", verdict), ("fixer", llm.fixer_output))
+    }
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "mode": "stub",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "classifier_mode": args.classifier_mode,
+        "llm_latency_s": args.llm_latency,
+        "throughput_rps": args.requests / wall,
+        "failed": dict(failures),
+        "resilience": resilience_counts(),
+        "latency_ms": {k: ms(v) for k, v in percentiles(latencies).items()},
+        "prepare_ms": {k: ms(v) for k, v in percentiles(prepare).items()},
+        "node_overhead_ms": {
+            node: {
+                "calls": len(samples),
+                **{
+                    k: ms(v)
+                    for k, v in percentiles([d - stub_time[node] for d in samples]).items()
+                },
+            }
+            for node, samples in timer.durations.items()
+            if node in stub_time
+        },
+    }
+
+
+def resilience_counts() -> Dict[str, float]:
+    """Retries, hedges and LLM call outcomes recorded in the metrics registry."""
+    counts: Dict[str, float] = defaultdict(float)
+    for line in render_metrics().decode().splitlines():
+        for prefix in ("chat_llm_retries_total", "chat_llm_hedges_total"):
+            if line.startswith(prefix):
+                counts[prefix[9:-6]] += float(line.rsplit(" ", 1)[1])
+        if line.startswith("chat_llm_requests_total"):
+            outcome = line.split('outcome="', 1)[1].split('"', 1)[0]
+            counts[outcome] += float(line.rsplit(" ", 1)[1])
+    return dict(counts)
+
+
+# ---------- accuracy ----------
+
+
+def run_fast(args) -> dict:
+    model = FastFeedbackClassifier.load(FAST_CLASSIFIER_PATH)
+    if model is None:
+        raise SystemExit(
+            f"No fast classifier artifact at {FAST_CLASSIFIER_PATH}; "
+            "build it with `python -m src.utils.fast_classifier train`"
+        )
+    threshold = FAST_CLASSIFIER_THRESHOLD if args.threshold is None else args.threshold
+    min_words = FAST_CLASSIFIER_MIN_WORDS if args.min_words is None else args.min_words
+
+    dataset = load_dataset()
+    pairs = [(truth, model.predict(feedback)[0].value) for feedback, truth in dataset]
+    report = accuracy_report(pairs)
+    print_accuracy(report)
+
+    print(f"\n{'threshold':>9}  {'coverage':>8}  {'accuracy':>8}  (min words {min_words})")
+    sweep = {}
+    for level in sorted({0.5, 0.6, 0.7, 0.8, 0.9, threshold}):
+        confident = [
+            (truth, local[0].value)
+            for feedback, truth in dataset
+            if (local := model.classify(feedback, level, min_words)) is not None
+        ]
+        kept = accuracy_report(confident) if confident else {"n": 0, "accuracy": 0.0}
+        print(f"{level:>9.2f}  {kept['n'] / len(pairs):>8.1%}  {kept['accuracy']:>8.1%}")
+        sweep[level] = kept
+    kept = sweep[threshold]
+    return {
+        "mode": "fast",
+        **report,
+        "threshold": threshold,
+        "min_words": min_words,
+        "coverage": kept["n"] / len(pairs),
+        "accuracy_above_threshold": kept["accuracy"],
+    }
+
+
+async def run_live(args) -> dict:
+    orchestrator = ChatOrchestrator(classifier_mode=args.classifier_mode)
+    orchestrator.fast_classifier = None
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    output_tokens: List[float] = []
+
+    async def one(feedback: str, truth: str) -> Tuple[str, str]:
+        # No codebase selected: the graph stops after the classifier.
+        request = ChatRequest(memory=[], user_input=feedback, bypass_cache=True)
+        async with slots:
+            start = time.perf_counter()
+            reply = await orchestrator.graph.ainvoke(orchestrator._initial_state(request))
+            latencies.append(time.perf_counter() - start)
+        usage = reply["messages"][-1].usage_metadata or {}
+        output_tokens.append(usage.get("output_tokens", 0))
+        category = reply.get("category")
+        return truth, category.value if category else "unparsed"
+
+    pairs = await asyncio.gather(*(one(f, t) for f, t in load_dataset()))
+    report = accuracy_report(pairs)
+    print_accuracy(report)
+    tokens = percentiles(output_tokens)
+    print(f"classifier output tokens: p50={tokens['p50']} p95={tokens['p95']}")
+    return {
+        "mode": "live",
+        "classifier_mode": args.classifier_mode,
+        **report,
+        "latency_ms": {k: round(v * 1000, 1) for k, v in percentiles(latencies).items()},
+        "output_tokens": tokens,
+        "output_tokens_mean": sum(output_tokens) / len(output_tokens),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=["stub", "fast", "live"])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=0.0)
+    parser.add_argument("--hedge", action="store_true", help="hedge slow LLM calls")
+    parser.add_argument("--cache", action="store_true", help="allow response-cache hits")
+    parser.add_argument("--no-fast-path", action="store_true")
+    parser.add_argument(
+        "--classifier-mode", choices=["structured", "markdown"], default=CLASSIFIER_MODE
+    )
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--min-words", type=int, default=None)
+    parser.add_argument("--out", help="also write the results as JSON here")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)  # per-call output logs would swamp the report
+
+    if args.mode == "stub":
+        result = asyncio.run(run_stub(args))
+        print(json.dumps(result, indent=2))
+    elif args.mode == "fast":
+        result = run_fast(args)
+    else:
+        result = asyncio.run(run_live(args))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
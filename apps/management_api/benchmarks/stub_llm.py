@@ -0,0 +1,166 @@
+"""Deterministic offline chat model that can stand in for ChatAnthropic."""
+
+import re
+import json
+import time
+import random
+import asyncio
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
+from pydantic import PrivateAttr
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+DEFAULT_FIX = (
+    "# Dependencies\n```\nimport db\n```\n\n# Imports\n```\nfrom db import query\n```\n\n"
+    "# Fix\n## Method login from file auth.ts, lines 10 until 20\n```\n"
+    + "const rows = await query('SELECT * FROM users WHERE id = ?', [id]);\n" * 20
+    + "```\n# Notes\n```\n1. Parameterized the query.\n```"
+)
+
+
+class StubLLMError(RuntimeError):
+    """Injected upstream failure (reported as an overloaded 529, so it is retryable)."""
+
+    status_code = 529
+
+
+class StubChatModel(BaseChatModel):
+    """Canned classifier/fixer outputs with configurable latency and error injection.
+
+    Calls that carry a system prompt are treated as classifier calls, the rest
+    as fixer calls. ``latency`` is the time to first token and
+    ``token_latency`` the gap between streamed tokens; a ``tail_rate``
+    fraction of calls waits ``tail_latency`` instead, to model slow upstream
+    outliers. With tools bound the reply is a call to the first tool
+    carrying the classifier verdict.
+    """
+
+    model: str = "stub"
+    latency: float = 0.0
+    token_latency: float = 0.0
+    error_rate: float = 0.0
+    tail_rate: float = 0.0
+    tail_latency: float = 0.0
+    seed: int = 0
+    classifier_output: str = (
+        "**why**: stubbed verdict\n**class_category**: `incorrect_logic`"
+    )
+    fixer_output: str = DEFAULT_FIX
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _latency(self) -> float:
+        if self.tail_rate and self._rng.random() < self.tail_rate:
+            return self.tail_latency
+        return self.latency
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _reply(self, messages: List[BaseMessage], tools: Optional[list] = None) -> dict:
+        """The reply as AIMessage fields: ``content`` plus ``tool_calls`` when tools are bound."""
+        if self._rng.random() < self.error_rate:
+            raise StubLLMError("injected upstream error")
+        if tools:
+            name = tools[0]["function"]["name"]
+            call = {"name": name, "args": self.verdict_args(), "id": "stub"}
+            return {"content": "", "tool_calls": [call]}
+        if any(isinstance(m, SystemMessage) for m in messages):
+            return {"content": self.classifier_output}
+        return {"content": self.fixer_output}
+
+    def verdict_args(self) -> dict:
+        """Tool-call arguments equivalent to ``classifier_output``."""
+        category = re.search(r"class_category\W*([a-z_]+)", self.classifier_output)
+        return {"category": category.group(1), "reason": "stubbed verdict"}
+
+    @staticmethod
+    def _output_text(reply: dict) -> str:
+        calls = reply.get("tool_calls") or []
+        return reply["content"] + "".join(json.dumps(c["args"]) for c in calls)
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return [text[i : i + 16] for i in range(0, len(text), 16)]
+
+    def _chunks(self, reply: dict) -> Iterator[AIMessageChunk]:
+        for token in self._tokens(reply["content"]):
+            yield AIMessageChunk(content=token)
+        for index, call in enumerate(reply.get("tool_calls") or []):
+            for i, token in enumerate(self._tokens(json.dumps(call["args"]))):
+                yield AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"] if i == 0 else None,
+                            "id": call["id"] if i == 0 else None,
+                            "args": token,
+                            "index": index,
+                        }
+                    ],
+                )
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> dict:
+        input_tokens = sum(len(m.text()) for m in messages) // 4
+        output_tokens = len(text) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs
+    ) -> ChatResult:
+        time.sleep(self._latency())
+        reply = self._reply(messages, kwargs.get("tools"))
+        text = self._output_text(reply)
+        time.sleep(self.token_latency * len(self._tokens(text)))
+        message = AIMessage(**reply, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs
+    ) -> ChatResult:
+        await asyncio.sleep(self._latency())
+        reply = self._reply(messages, kwargs.get("tools"))
+        text = self._output_text(reply)
+        await asyncio.sleep(self.token_latency * len(self._tokens(text)))
+        message = AIMessage(**reply, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self._latency())
+        reply = self._reply(messages, kwargs.get("tools"))
+        for chunk in self._chunks(reply):
+            time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=chunk)
+        text = self._output_text(reply)
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        )
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self._latency())
+        reply = self._reply(messages, kwargs.get("tools"))
+        for chunk in self._chunks(reply):
+            await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=chunk)
+        text = self._output_text(reply)
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        )
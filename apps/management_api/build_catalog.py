@@ -0,0 +1,27 @@
+"""Build the memory-mapped catalog file that worker processes share.
+
+    python build_catalog.py --csv src/utils/data.csv --out vulnerabilities.vcat
+
+Serve it by starting the API with ``CATALOG_PATH`` pointing at the output.
+The file is replaced atomically, so re-running it while the API is up is
+picked up by every worker's hot reload. ``python main.py --workers N`` does
+this build itself when ``CATALOG_PATH`` is still a CSV, and rebuilds the
+file whenever the CSV changes.
+"""
+
+import argparse
+from src.utils.catalog_file import write_catalog_file
+from src.utils.common import CATALOG_FILE_PATH, CATALOG_PATH, fetch_csv_data, logger
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=CATALOG_PATH)
+    # CATALOG_FILE_PATH, when set, is where main.py --workers would build it.
+    parser.add_argument(
+        "--out", default=CATALOG_FILE_PATH or None, required=not CATALOG_FILE_PATH
+    )
+    args = parser.parse_args()
+
+    version = write_catalog_file(fetch_csv_data(args.csv), args.out)
+    logger.info("Built catalog %s from %s into %s", version, args.csv, args.out)
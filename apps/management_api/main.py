@@ -1,13 +1,158 @@
-from fastapi import FastAPI
+import re
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
-from src.agents.orchestrator import ChatOrchestrator
-from src.utils.pymodels import ChatRequest, ChatResponse
-from src.utils.common import PORT, logger, vulnerabilities
+from src.utils.pymodels import (
+    BatchChatRequest,
+    BatchChatResult,
+    ChatRequest,
+    ChatResponse,
+)
+from src.utils.vulnerability_store import VulnerabilityStore
+from src.utils.metrics import (
+    CONTENT_TYPE_LATEST,
+    MetricsMiddleware,
+    mark_process_dead,
+    render_metrics,
+)
+from src.utils.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    ClientRateLimiter,
+    client_address,
+    parse_networks,
+)
+from src.utils.resilience import (
+    DeadlineExceeded,
+    UpstreamError,
+    UpstreamUnavailable,
+)
+from src.utils.common import (
+    PORT,
+    BATCH_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    CHAT_QUEUE_MAX,
+    CHAT_QUEUE_TIMEOUT,
+    CLIENT_BURST,
+    CLIENT_RATE,
+    MAX_CONCURRENT_CHATS,
+    TRUSTED_PROXIES,
+    WORKERS,
+    logger,
+    make_sse,
+    get_vulnerability_store,
+)
+
+if TYPE_CHECKING:
+    from src.agents.orchestrator import ChatOrchestrator
 
 # -----------------------------------
 
 load_dotenv()
-app = FastAPI()
+# Built in a worker thread: the LLM stack takes seconds to import, and the
+# port should be bound (and /health answering) before that is done.
+orchestrator_ready: Optional["asyncio.Future[ChatOrchestrator]"] = None
+
+
+def load_orchestrator() -> "ChatOrchestrator":
+    """Import and build the orchestrator, then load its clients and prompts."""
+    start = time.perf_counter()
+    from src.agents.orchestrator import get_orchestrator
+
+    orchestrator = get_orchestrator()
+    orchestrator.warm_up()
+    logger.info("Orchestrator ready in %.2fs", time.perf_counter() - start)
+    return orchestrator
+
+
+def warm_up() -> "asyncio.Future[ChatOrchestrator]":
+    """Start building the orchestrator unless it is built or being built."""
+    global orchestrator_ready
+    if orchestrator_ready is None or (
+        orchestrator_ready.done() and orchestrator_ready.exception() is not None
+    ):
+        orchestrator_ready = asyncio.ensure_future(asyncio.to_thread(load_orchestrator))
+    return orchestrator_ready
+
+
+async def get_orchestrator() -> "ChatOrchestrator":
+    """The process-wide orchestrator, waiting for the warm-up if it is still running."""
+    return await asyncio.shield(warm_up())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up()
+    # Parse the catalog (or build the mapped file's index) before serving, in
+    # a thread, so the first request does not do it on the event loop.
+    start = time.perf_counter()
+    store = await asyncio.to_thread(get_vulnerability_store)
+    logger.info(
+        "Catalog of %s vulnerabilities loaded in %.2fs",
+        len(store),
+        time.perf_counter() - start,
+    )
+    yield
+    mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+app.add_middleware(MetricsMiddleware)
+admission = AdmissionController(
+    MAX_CONCURRENT_CHATS, CHAT_QUEUE_MAX, CHAT_QUEUE_TIMEOUT
+)
+client_limits = ClientRateLimiter(CLIENT_RATE, CLIENT_BURST)
+trusted_proxies = parse_networks(TRUSTED_PROXIES)
+
+
+def client_id(http_request: Request, request: Optional[ChatRequest] = None) -> str:
+    """Who a chat is rate limited as: its session, else the caller's address."""
+    if request is not None and request.session_id:
+        return f"session:{request.session_id}"
+    return client_address(
+        http_request.client.host if http_request.client else None,
+        http_request.headers.get("x-forwarded-for"),
+        trusted_proxies,
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    """Load shedding: tell the client to back off instead of letting it time out."""
+    return JSONResponse(
+        {"detail": exc.reason},
+        status_code=429,
+        headers={"Retry-After": exc.retry_after_header},
+    )
+
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable(request: Request, exc: UpstreamUnavailable):
+    """The LLM circuit is open: fail fast and tell the client when to come back."""
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.exception_handler(UpstreamError)
+async def upstream_error(request: Request, exc: UpstreamError):
+    """The LLM provider kept failing after retries."""
+    return JSONResponse({"detail": str(exc)}, status_code=502)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    """An LLM call ran past its node deadline."""
+    return JSONResponse({"detail": str(exc)}, status_code=504)
 
 
 @app.get("/")
@@ -17,32 +162,254 @@ def read_root():
     return {"message": "Management API is running"}
 
 
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag`` (weak comparison, RFC 9110).
+
+    The header is ``*`` or a comma-separated list of strong or weak tags.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = ENTITY_TAG.match(etag).group(1)
+    return opaque in ENTITY_TAG.findall(if_none_match)
+
+
+def make_json_response(
+    request: Request, store: VulnerabilityStore, body: Optional[bytes], tag: str
+) -> Response:
+    """Serve a precomputed JSON payload with a weak ETag, honoring If-None-Match."""
+    if body is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    etag = f'W/"{store.version}-{tag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/vulnerabilities")
-def get_vulnerabilities():
-    """Return all vulnerabilities parsed from the CSV file."""
-    logger.info("Retrieving vulnerabilities.")
-    return {
-        codebase: [v.model_dump() for v in vulns]
-        for codebase, vulns in vulnerabilities.items()
-    }
+def get_vulnerabilities(
+    request: Request, view: Literal["full", "titles", "codebases"] = "full"
+) -> Response:
+    """Return all vulnerabilities, only IDs and titles per codebase (view=titles),
+    or only the codebase names (view=codebases)."""
+    logger.info("Retrieving vulnerabilities (%s).", view)
+    store = get_vulnerability_store()
+    if view == "titles":
+        return make_json_response(request, store, store.titles_payload, view)
+    if view == "codebases":
+        return make_json_response(request, store, store.codebases_payload, view)
+    return make_json_response(request, store, store.full_payload, view)
+
+
+@app.get("/vulnerabilities/{codebase:path}")
+def get_codebase_vulnerabilities(
+    request: Request,
+    codebase: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    view: Literal["full", "titles"] = "full",
+) -> Response:
+    """Return one page of full vulnerabilities for a codebase, or all its IDs and
+    titles (view=titles)."""
+    store = get_vulnerability_store()
+    if view == "titles":
+        return make_json_response(
+            request, store, store.codebase_titles_payload(codebase), f"{codebase}:titles"
+        )
+    return make_json_response(
+        request,
+        store,
+        store.page_payload(codebase, offset, limit),
+        f"{codebase}:{offset}:{limit}",
+    )
+
+
+@app.get("/vulnerability/{vuln_id}")
+def get_vulnerability(request: Request, vuln_id: str) -> Response:
+    """Return a single vulnerability by ID."""
+    store = get_vulnerability_store()
+    return make_json_response(request, store, store.detail_payload(vuln_id), vuln_id)
+
+
+def check_vulnerability_id(request: ChatRequest) -> None:
+    """Reject requests that reference an unknown vulnerability ID."""
+    if request.vulnerability_id and not get_vulnerability_store().get(
+        request.vulnerability_id
+    ):
+        raise HTTPException(status_code=404, detail="Unknown vulnerability_id")
 
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Handle a chatbot interaction (frontend stores memory)."""
-    orchestrator = ChatOrchestrator()
-    return orchestrator.invoke(request)
+    check_vulnerability_id(request)
+    client_limits.check(client_id(http_request, request))
+    orchestrator = await get_orchestrator()
+    return await orchestrator.ainvoke(request, slot=admission.admit)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Stream a chatbot interaction as Server-Sent Events."""
+    check_vulnerability_id(request)
+    client_limits.check(client_id(http_request, request))
+    admission.check()  # reject with a real 429 while we still can
+    orchestrator = await get_orchestrator()
+
+    async def events():
+        try:
+            async with admission.admit():
+                async for event, data in orchestrator.astream(request):
+                    yield make_sse(event, data)
+        except (
+            AdmissionRejected,
+            UpstreamError,
+            UpstreamUnavailable,
+            DeadlineExceeded,
+        ) as e:
+            # Headers are already sent; report the failure in-band.
+            yield make_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(batch: BatchChatRequest, http_request: Request):
+    """Run many chats with bounded concurrency, streaming NDJSON results as each completes."""
+    # Every item is a chat, so it costs one rate-limit token; a batch the
+    # client's bucket could never cover is too large rather than rate limited.
+    max_items = BATCH_MAX_ITEMS
+    if client_limits.rate > 0:
+        max_items = min(max_items, int(client_limits.burst))
+    if len(batch.items) > max_items:
+        raise HTTPException(
+            status_code=413, detail=f"At most {max_items} items per batch"
+        )
+    client_limits.check(client_id(http_request), tokens=max(1, len(batch.items)))
+    concurrency = min(batch.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    limit = asyncio.Semaphore(concurrency)
+    orchestrator = await get_orchestrator()
+
+    async def run_item(index: int, request: ChatRequest) -> BatchChatResult:
+        # Batches already bound their own concurrency, so they wait for slots
+        # instead of being shed.
+        async with limit, admission.slots:
+            try:
+                check_vulnerability_id(request)
+                response = await orchestrator.ainvoke(request)
+                return BatchChatResult(index=index, response=response.response)
+            except Exception as e:
+                logger.error("Batch item %s failed: %s", index, e)
+                return BatchChatResult(index=index, error=str(e))
+
+    async def results():
+        tasks = [
+            asyncio.create_task(run_item(index, request))
+            for index, request in enumerate(batch.items)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield (await finished).model_dump_json() + "\n"
+        finally:
+            # Client went away: stop paying for the remaining items.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss counters."""
+    return (await get_orchestrator()).cache.stats()
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint; ``orchestrator`` says whether chats can start now."""
     logger.info("Health check endpoint hit.")
-    return {"status": "ok"}
+    ready = (
+        orchestrator_ready is not None
+        and orchestrator_ready.done()
+        and orchestrator_ready.exception() is None
+    )
+    return {"status": "ok", "orchestrator": "ready" if ready else "warming"}
 
 
 if __name__ == "__main__":
+    import os
+    import argparse
     import uvicorn
 
-    logger.info("Starting Management API on port %s", PORT)
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    parser = argparse.ArgumentParser(description="Run the Management API.")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        import atexit
+        import shutil
+        import tempfile
+        from src.utils.catalog_file import CatalogFileBuilder, is_catalog_file
+        from src.utils.common import (
+            CATALOG_FILE_PATH,
+            CATALOG_PATH,
+            CATALOG_RELOAD_INTERVAL,
+            SESSION_PATH,
+            STATE_DIR,
+            fetch_csv_data,
+        )
+
+        # Files this run's workers share, private to this server instance and
+        # removed when it exits.
+        run_dir = tempfile.mkdtemp(prefix="management-api-")
+        atexit.register(shutil.rmtree, run_dir, ignore_errors=True)
+        # Parse the CSV once here; every worker then maps the same file. This
+        # process rebuilds it when the CSV changes, and the workers reload it.
+        if not is_catalog_file(CATALOG_PATH):
+            builder = CatalogFileBuilder(
+                CATALOG_PATH,
+                CATALOG_FILE_PATH or os.path.join(run_dir, "vulnerabilities.vcat"),
+                fetch_csv_data,
+                CATALOG_RELOAD_INTERVAL,
+            )
+            if builder.check() is None:
+                raise SystemExit(f"Could not build a catalog from {CATALOG_PATH}")
+            builder.start()
+            os.environ["CATALOG_PATH"] = builder.out_path
+        # Workers write metrics here and /metrics sums them.
+        if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(run_dir, "metrics")
+            os.mkdir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+        # A session's turns may land on any worker, so they must share the store,
+        # kept outside the run directory so sessions outlive a restart.
+        if not SESSION_PATH:
+            os.makedirs(STATE_DIR, exist_ok=True)
+            os.environ["SESSION_PATH"] = os.path.join(
+                STATE_DIR, f"sessions-{args.port}.db"
+            )
+        logger.info(
+            "Starting Management API on port %s with %s workers (catalog %s)",
+            args.port,
+            args.workers,
+            os.environ.get("CATALOG_PATH", CATALOG_PATH),
+        )
+        uvicorn.run("main:app", host="0.0.0.0", port=args.port, workers=args.workers)
+    else:
+        logger.info("Starting Management API on port %s", args.port)
+        uvicorn.run(app, host="0.0.0.0", port=args.port)
@@ -0,0 +1,52 @@
+"""Generate the fixer's answer for every (vulnerability, category) pair ahead of time.
+
+    python precompute_fixes.py --path precomputed_fixes.db --concurrency 8
+
+Serve the result by starting the API with ``PRECOMPUTED_FIXES_PATH`` pointing
+at the same file. Re-running after data.csv or fix_agent.md changed builds
+the new version and, with ``--prune``, drops the stale one. Only first turns
+with short, generic feedback ("the logic is wrong") are answered from it;
+feedback with a specific instruction still goes to the fixer.
+"""
+
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from src.agents.orchestrator import ChatOrchestrator
+from src.utils.pymodels import FixCategory
+from src.utils.precomputed import PrecomputedFixes, make_fix_version, precompute_fixes
+from src.utils.common import PRECOMPUTED_FIXES_PATH, logger, get_vulnerability_store
+
+
+load_dotenv()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=PRECOMPUTED_FIXES_PATH or "precomputed_fixes.db")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--category",
+        action="append",
+        type=FixCategory,
+        help="only these categories (repeatable; default: all)",
+    )
+    parser.add_argument("--prune", action="store_true", help="delete other versions")
+    args = parser.parse_args()
+
+    orchestrator = ChatOrchestrator()
+    store = get_vulnerability_store()
+    fixes = PrecomputedFixes(args.path)
+    version = make_fix_version(store.version, orchestrator.model_name)
+    counts = asyncio.run(
+        precompute_fixes(
+            orchestrator.llm,
+            store,
+            fixes,
+            version,
+            args.category or tuple(FixCategory),
+            args.concurrency,
+        )
+    )
+    if args.prune:
+        counts["pruned"] = fixes.prune(version)
+    logger.info("Precomputed fixes %s in %s: %s", version, args.path, counts)
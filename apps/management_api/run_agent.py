@@ -1,5 +1,5 @@
 from dotenv import load_dotenv
-from src.agents.orchestrator import ChatOrchestrator
+from src.agents.orchestrator import get_orchestrator
 from src.utils.pymodels import ChatRequest
 from src.utils.common import logger
 
@@ -7,7 +7,7 @@ from src.utils.common import logger
 load_dotenv()
 
 if __name__ == "__main__":
-    orchestrator = ChatOrchestrator()
+    orchestrator = get_orchestrator()
     request = ChatRequest(
         memory=[],
         codebase="n/a",
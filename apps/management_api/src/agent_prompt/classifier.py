@@ -1,41 +1,67 @@
-from typing import List
-from langchain.prompts import PromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage
-from src.utils.pymodels import ChatRequest, Vulnerability
-from src.utils.common import SYS_PROMPTS
-from src.utils.common import vulnerabilities
+import re
+from typing import Optional
+from functools import lru_cache
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from src.utils.pymodels import ChatRequest, Classification, FixCategory, Vulnerability
+from src.utils.common import SYS_PROMPTS, make_history_blocks, make_text_block
+from src.agent_prompt.compaction import render_vulnerability
 
+CLASS_CATEGORY = re.compile(r"class_category\W*([a-z_]+)")
 
+
+@lru_cache(maxsize=1)
 def make_system_prompt() -> SystemMessage:
-    """Create the system prompt for the orchestrator agent."""
+    """Create the system prompt for the orchestrator agent (rendered once, prompt-cached)."""
+    from langchain.prompts import PromptTemplate
+
     return SystemMessage(
-        content=PromptTemplate(
-            input_variables=[],
-            template=SYS_PROMPTS["classifier"],
-        ).format()
+        content=[
+            make_text_block(
+                PromptTemplate(
+                    input_variables=[],
+                    template=SYS_PROMPTS["classifier"],
+                ).format(),
+                cache=True,
+            )
+        ]
     )
 
 
-def get_user_prompt(request: ChatRequest) -> HumanMessage:
+def get_user_prompt(
+    request: ChatRequest, selected_vulns: Optional[Vulnerability], history: str = ""
+) -> HumanMessage:
     """Create a user prompt message."""
 
     code_data = "## No codebase provided.\nVulnerabilities: None"
-    codebase: List[Vulnerability] = vulnerabilities.get(request.codebase, [])
-    selected_vulns: Vulnerability = None
-    for vuln in codebase:
-        if vuln.title.strip() == request.title.strip():
-            selected_vulns = vuln
-            break
-
     if selected_vulns:
-        code_data = f"## {request.codebase}\nVulnerabilities: {selected_vulns.model_dump_json(indent=4)}"
+        code_data = f"## {request.codebase}\nVulnerabilities:\n{render_vulnerability(selected_vulns)}"
 
+    # The codebase comes first so it extends the cached system-prompt prefix;
+    # the conversation so far changes every turn, so it goes after it.
     return HumanMessage(
-        content=PromptTemplate(
-            input_variables=["user_feedback"],
-            template="""
-                Analyze the user question: "{user_feedback}"
-                Read this codebase and the vulnerabilities found in it: {codebase}
-            """,
-        ).format(user_feedback=request.user_input, codebase=code_data)
+        content=[
+            make_text_block(
+                f"Read this codebase and the vulnerabilities found in it: {code_data}",
+                cache=True,
+            ),
+            *make_history_blocks(history),
+            make_text_block(f'Analyze the user question: "{request.user_input}"'),
+        ]
+    )
+
+
+def render_classification(classification: Classification, **kwargs) -> AIMessage:
+    """Render a verdict in the classifier's Markdown format (what the UI shows)."""
+    return AIMessage(
+        content=f"**why**: {classification.reason}\n"
+        f"**class_category**: `{classification.category.value}`",
+        **kwargs,
     )
+
+
+def parse_class_category(text: str) -> Optional[FixCategory]:
+    """Extract the ``class_category`` of a Markdown verdict, if it names a known class."""
+    match = CLASS_CATEGORY.search(text)
+    if match and match.group(1) in FixCategory._value2member_map_:
+        return FixCategory(match.group(1))
+    return None
@@ -1,32 +1,48 @@
-from typing import List
-from langchain.prompts import PromptTemplate
+from typing import Optional
 from langchain_core.messages import HumanMessage
-from src.utils.pymodels import ChatRequest, Vulnerability
-from src.utils.common import SYS_PROMPTS
-from src.utils.common import vulnerabilities
+from src.utils.pymodels import ChatRequest, FixCategory, Vulnerability
+from src.utils.common import SYS_PROMPTS, make_history_blocks, make_text_block
+from src.agent_prompt.compaction import render_vulnerability
 
+# fix_agent.md is ordered static → per-vulnerability → per-request so the
+# first two sections form a prefix Anthropic can serve from its prompt cache.
+SECTION_MARKER = "# <PAY SPECIAL ATTENTION HERE>"
+FIX_INSTRUCTIONS, CODE_SECTION, USER_SECTION = SYS_PROMPTS["fix_agent"].split(
+    SECTION_MARKER
+)
 
-def get_fix_user_prompt(class_category: str, request: ChatRequest) -> HumanMessage:
+
+def get_fix_user_prompt(
+    class_category: str,
+    request: ChatRequest,
+    selected_vulns: Optional[Vulnerability],
+    history: str = "",
+) -> HumanMessage:
     """Create a user prompt message."""
 
     code_data = "## No codebase provided.\nVulnerabilities: None"
-    codebase: List[Vulnerability] = vulnerabilities.get(request.codebase, [])
-    selected_vulns: Vulnerability = None
-    for vuln in codebase:
-        if vuln.title.strip() == request.title.strip():
-            selected_vulns = vuln
-            break
-
     user_input = f"""
         The user has selected the category '{class_category}'.
         Please provide a code fix based on this category and the user's original input: '{request.user_input}'.
     """
     if selected_vulns:
-        code_data = f"Category {request.codebase}\nVulnerabilities: {selected_vulns.model_dump_json(indent=4)}"
+        category = FixCategory._value2member_map_.get(class_category)
+        code_data = f"Category {request.codebase}\nVulnerabilities:\n{render_vulnerability(selected_vulns, category)}"
+
+    from langchain.prompts import PromptTemplate
+
+    code_section = PromptTemplate(
+        input_variables=["code_data"], template=SECTION_MARKER + CODE_SECTION
+    ).format(code_data=code_data)
+    user_section = PromptTemplate(
+        input_variables=["user_input"], template=SECTION_MARKER + USER_SECTION
+    ).format(user_input=user_input)
 
     return HumanMessage(
-        content=PromptTemplate(
-            input_variables=["user_input", "code_data"],
-            template=SYS_PROMPTS["fix_agent"],
-        ).format(user_input=user_input, code_data=code_data)
+        content=[
+            make_text_block(FIX_INSTRUCTIONS, cache=True),
+            make_text_block(code_section, cache=True),
+            *make_history_blocks(history),
+            make_text_block(user_section),
+        ]
     )
@@ -0,0 +1,112 @@
+import re
+import difflib
+from typing import Dict, List, Optional, Set
+from src.utils.pymodels import FixCategory, Vulnerability
+from src.utils.common import PROMPT_CODE_TOKENS, estimate_tokens
+
+# Fields the fixer does not need for a given category.
+REDUNDANT_FIELDS: Dict[FixCategory, Set[str]] = {
+    # The user wants a different approach; the rejected fix only anchors the model.
+    FixCategory.TRY_ANOTHER_FIX: {"fix_code"},
+}
+_MISSING = {None, "", "n/a"}
+_PADDING = re.compile(r"(?<=\S) {4,}")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+
+def squeeze(text: str) -> str:
+    """Drop trailing whitespace, padding runs inside lines and repeated blank lines."""
+    lines = [_PADDING.sub(" ", line.rstrip()) for line in text.strip().splitlines()]
+    return _BLANK_RUNS.sub("\n\n", "\n".join(lines))
+
+
+def _balance_fences(lines: List[str], opened_before: bool) -> List[str]:
+    """Re-open/close a ``` block cut by trimming so the Markdown stays well formed."""
+    if opened_before:
+        lines = ["```"] + lines
+    if sum(line.lstrip().startswith("```") for line in lines) % 2:
+        lines = lines + ["```"]
+    return lines
+
+
+def vulnerable_lines(code: str, fix_code: str) -> List[int]:
+    """Lines of ``code`` the existing fix rewrites.
+
+    The fix re-emits the patched method, so the lines it shares with the code
+    (ignoring braces and blanks) mark that method; everything else in
+    ``code`` is surrounding dataflow context.
+    """
+    code_lines = [line.strip() for line in code.splitlines()]
+    fix_lines = [line.strip() for line in fix_code.splitlines()]
+    matcher = difflib.SequenceMatcher(None, code_lines, fix_lines, autojunk=False)
+    return [
+        i
+        for tag, i1, i2, _, _ in matcher.get_opcodes()
+        if tag == "equal"
+        for i in range(i1, i2)
+        if len(code_lines[i]) > 3
+    ]
+
+
+def trim_to_budget(text: str, budget: int, anchors: Optional[List[int]] = None) -> str:
+    """Keep a window of ``text`` lines within ``budget`` tokens.
+
+    The window is centred on the ``anchors`` lines (or starts at the top) and
+    grows outwards one line at a time; cut parts are replaced by a marker.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    lines = text.splitlines()
+    first, last = (min(anchors), max(anchors)) if anchors else (0, 0)
+    used = sum(estimate_tokens(line) for line in lines[first : last + 1])
+    while used > budget and last > first:  # region alone is too big: keep its start
+        used -= estimate_tokens(lines[last])
+        last -= 1
+    grow_up = True
+    while True:
+        above = first - 1 if first > 0 else None
+        below = last + 1 if last + 1 < len(lines) else None
+        order = (above, below) if grow_up else (below, above)
+        pick = next((i for i in order if i is not None), None)
+        if pick is None or used + estimate_tokens(lines[pick]) > budget:
+            break
+        used += estimate_tokens(lines[pick])
+        first, last = min(first, pick), max(last, pick)
+        grow_up = not grow_up
+
+    opened = sum(line.lstrip().startswith("```") for line in lines[:first]) % 2 == 1
+    kept = _balance_fences(lines[first : last + 1], opened)
+    if first:
+        kept.insert(0, f"… ({first} lines omitted) …")
+    if last + 1 < len(lines):
+        kept.append(f"… ({len(lines) - last - 1} lines omitted) …")
+    return "\n".join(kept)
+
+
+def render_vulnerability(
+    vuln: Vulnerability,
+    category: Optional[FixCategory] = None,
+    budget: int = PROMPT_CODE_TOKENS,
+) -> str:
+    """Prompt-ready Markdown for one vulnerability.
+
+    Code is embedded raw instead of JSON-escaped, empty and category-redundant
+    fields are left out, and the vulnerable code is trimmed to ``budget``
+    tokens around the lines the existing fix changed (the existing fix and
+    the notes get half the budget each).
+    """
+    dropped = REDUNDANT_FIELDS.get(category, set())
+    has_fix = vuln.fix_code not in _MISSING and "fix_code" not in dropped
+    code = squeeze(vuln.code)
+    anchors = vulnerable_lines(code, vuln.fix_code) if vuln.fix_code not in _MISSING else []
+
+    parts = [f"### Title\n{vuln.title}"]
+    if vuln.category not in _MISSING:
+        parts.append(f"### Category\n{vuln.category}")
+    parts.append(f"### Vulnerable code\n{trim_to_budget(code, budget, anchors)}")
+    if has_fix:
+        fix = trim_to_budget(squeeze(vuln.fix_code), budget // 2)
+        parts.append(f"### Existing fix\n{fix}")
+    if vuln.notes not in _MISSING and "notes" not in dropped:
+        parts.append(f"### Notes\n{trim_to_budget(squeeze(vuln.notes), budget // 2)}")
+    return "\n\n".join(parts)
@@ -1,46 +1,440 @@
-from typing import cast, Literal
-from langchain_anthropic import ChatAnthropic
-from IPython.display import Image, display
+import time
+import asyncio
+from functools import lru_cache
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional, Tuple, cast, Literal
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables import Runnable
 from langgraph.graph import StateGraph, END
-from src.utils.pymodels import ChatRequest, ChatResponse
+from src.agents.state import ChatOrchestratorState, make_orch_output
+from src.utils.pymodels import ChatRequest, ChatResponse, Classification, FixCategory
 from src.agent_prompt.code_fix_agent import get_fix_user_prompt
-from src.utils.common import logger, make_orch_output, ChatOrchestratorState
-from src.agent_prompt.classifier import make_system_prompt, get_user_prompt
+from src.utils.cache import ResponseCache
+from src.utils.sessions import SessionStore
+from src.utils.single_flight import SingleFlight
+from src.utils.vulnerability_store import normalize_title
+from src.utils.fast_classifier import FastFeedbackClassifier
+from src.utils.precomputed import (
+    PrecomputedFixes,
+    is_generic_feedback,
+    make_fix_version,
+)
+from src.utils.routing import ModelRoute
+from src.utils.resilience import DeadlineExceeded, ResilientCaller, UpstreamUnavailable
+from src.utils.metrics import (
+    CLASSIFIER_PATH,
+    LLM_REQUEST_DURATION,
+    LLM_REQUESTS,
+    LLM_RESPONSE_CACHE,
+    NODE_DURATION,
+    PRECOMPUTED_FIXES,
+    record_token_usage,
+)
+from src.utils.llm_callbacks import FirstTokenTimer, with_first_token_timer
+from src.utils.common import (
+    CLASSIFIER_FALLBACK_MODEL,
+    CLASSIFIER_MAX_P95,
+    CLASSIFIER_MAX_TOKENS,
+    CLASSIFIER_MODE,
+    CLASSIFIER_MODEL,
+    CLASSIFIER_TIMEOUT,
+    CIRCUIT_FAILURES,
+    CIRCUIT_RESET,
+    FAST_CLASSIFIER_MIN_WORDS,
+    FAST_CLASSIFIER_PATH,
+    FAST_CLASSIFIER_THRESHOLD,
+    FIXER_FALLBACK_MODEL,
+    FIXER_MAX_P95,
+    FIXER_MODEL,
+    FIXER_TIMEOUT,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_HEDGE,
+    LLM_HEDGE_QUANTILE,
+    LLM_MAX_RETRIES,
+    MODEL_FALLBACK_COOLDOWN,
+    MODEL_MAX_ERROR_RATE,
+    MODEL_ROUTING_WINDOW,
+    PRECOMPUTED_FIXES_PATH,
+    PRECOMPUTED_MAX_WORDS,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    SESSION_HISTORY_TOKENS,
+    SESSION_MAX,
+    SESSION_PATH,
+    SESSION_TTL,
+    logger,
+    log_token_usage,
+    get_vulnerability_store,
+)
+from src.agent_prompt.classifier import (
+    make_system_prompt,
+    get_user_prompt,
+    parse_class_category,
+    render_classification,
+)
 
 
 class ChatOrchestrator:
-    """Orchestrates the chat flow with a classifier → fixer hierarchy."""
+    """Orchestrates the chat flow with a classifier → fixer hierarchy.
 
-    def __init__(self):
-        self.request: ChatRequest = None
-        self.llm = ChatAnthropic(model="claude-sonnet-4-20250514")
+    The orchestrator holds no per-request state: the request travels inside
+    ``ChatOrchestratorState`` so one instance can serve concurrent requests.
+    """
+
+    def __init__(
+        self, llm: Optional[BaseChatModel] = None, classifier_mode: str = CLASSIFIER_MODE
+    ):
+        """Build per-node model routes; an explicit ``llm`` serves both nodes.
+
+        Clients are created on first use (or by ``warm_up``), so building the
+        orchestrator does not load the provider SDK.
+        """
+        self.classifier_mode = classifier_mode
+        self._clients: Dict[str, BaseChatModel] = {}
+        self._node_llms: Dict[Tuple[str, str], Runnable] = {}
+        if llm is not None:
+            model = getattr(llm, "model", type(llm).__name__)
+            self._clients[model] = llm
+            self.routes = {
+                "classifier": ModelRoute("classifier", model),
+                "fixer": ModelRoute("fixer", model),
+            }
+        else:
+            self.routes = {
+                "classifier": self._make_route(
+                    "classifier",
+                    CLASSIFIER_MODEL,
+                    CLASSIFIER_FALLBACK_MODEL,
+                    CLASSIFIER_MAX_P95,
+                ),
+                "fixer": self._make_route(
+                    "fixer", FIXER_MODEL, FIXER_FALLBACK_MODEL, FIXER_MAX_P95
+                ),
+            }
+        self.resilience = {
+            node: ResilientCaller(
+                node,
+                timeout,
+                retries=LLM_MAX_RETRIES,
+                backoff_base=LLM_BACKOFF_BASE,
+                backoff_max=LLM_BACKOFF_MAX,
+                hedge=LLM_HEDGE,
+                hedge_quantile=LLM_HEDGE_QUANTILE,
+                breaker_threshold=CIRCUIT_FAILURES,
+                breaker_reset=CIRCUIT_RESET,
+            )
+            for node, timeout in (
+                ("classifier", CLASSIFIER_TIMEOUT),
+                ("fixer", FIXER_TIMEOUT),
+            )
+        }
+        self.cache = ResponseCache(
+            RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_PATH or None
+        )
+        self.sessions = SessionStore(
+            SESSION_MAX, SESSION_TTL, SESSION_HISTORY_TOKENS, SESSION_PATH or None
+        )
+        self.precomputed: Optional[PrecomputedFixes] = None
+        if PRECOMPUTED_FIXES_PATH:
+            self.precomputed = PrecomputedFixes(PRECOMPUTED_FIXES_PATH)
+        self.inflight = SingleFlight("chat")
+        self.fast_classifier = FastFeedbackClassifier.load(FAST_CLASSIFIER_PATH)
+        if self.fast_classifier is None:
+            logger.warning(
+                "No fast classifier at %s; using the LLM only "
+                "(build it with `python -m src.utils.fast_classifier train`).",
+                FAST_CLASSIFIER_PATH,
+            )
         self.compile()
 
+    def _client(self, model: str) -> BaseChatModel:
+        """One shared client per model name (retries are left to ``self.resilience``)."""
+        if model not in self._clients:
+            from langchain_anthropic import ChatAnthropic
+
+            self._clients[model] = ChatAnthropic(model=model, max_retries=0)
+        return self._clients[model]
+
+    def _node_llm(self, node: str, model: str) -> Runnable:
+        """The client for ``model`` as configured for ``node``."""
+        key = (node, model)
+        if key not in self._node_llms:
+            llm: Runnable = self._client(model)
+            if node == "classifier" and self.classifier_mode == "structured":
+                # Structured mode forces one tool call whose arguments are a
+                # Classification, so the verdict is short, always a valid
+                # FixCategory, and needs no parsing.
+                llm = llm.bind_tools(
+                    [Classification],
+                    tool_choice=Classification.__name__,
+                    max_tokens=CLASSIFIER_MAX_TOKENS,
+                )
+            self._node_llms[key] = llm
+        return self._node_llms[key]
+
+    @property
+    def llm(self) -> BaseChatModel:
+        """The fixer's primary client."""
+        return self._client(self.routes["fixer"].primary)
+
+    def warm_up(self) -> None:
+        """Load what the first request would otherwise wait for: the provider
+        SDK and clients of every routed model, and the prompt templates."""
+        for node, route in self.routes.items():
+            for model in (route.primary, route.fallback):
+                if model:
+                    self._node_llm(node, model)
+        make_system_prompt()
+
+    def _make_route(
+        self, node: str, primary: str, fallback: str, max_p95: float
+    ) -> ModelRoute:
+        return ModelRoute(
+            node,
+            primary,
+            fallback if fallback and fallback != primary else None,
+            max_p95=max_p95,
+            max_error_rate=MODEL_MAX_ERROR_RATE,
+            window=MODEL_ROUTING_WINDOW,
+            cooldown=MODEL_FALLBACK_COOLDOWN,
+        )
+
+    def _initial_state(
+        self,
+        request: ChatRequest,
+        streaming: bool = False,
+        history: Optional[str] = None,
+    ) -> ChatOrchestratorState:
+        """Build the graph input, pre-classifying locally when the model is confident.
+
+        ``streaming`` is set by ``astream``, whose fixer tokens reach the client
+        live. Async callers pass ``history`` from ``SessionStore.ahistory``.
+        """
+        vulnerability = None
+        found = get_vulnerability_store().resolve(request)
+        if found is not None:
+            codebase, vulnerability = found
+            request = request.model_copy(
+                update={"codebase": codebase, "title": vulnerability.title}
+            )
+
+        if history is None:
+            history = self.sessions.history(request)
+        messages: List[BaseMessage] = [get_user_prompt(request, vulnerability, history)]
+        category = None
+        models: Dict[str, str] = {}
+        if self.fast_classifier is not None:
+            local = self.fast_classifier.classify(
+                request.user_input, FAST_CLASSIFIER_THRESHOLD, FAST_CLASSIFIER_MIN_WORDS
+            )
+            if local is not None:
+                category, confidence = local
+                models["classifier"] = "local"
+                messages.append(
+                    render_classification(
+                        Classification(
+                            category=category,
+                            reason=f"matched by the local classifier "
+                            f"(confidence {confidence:.2f})",
+                        )
+                    )
+                )
+        CLASSIFIER_PATH.labels(path="llm" if category is None else "fast").inc()
+        return {
+            "messages": messages,
+            "request": request,
+            "vulnerability": vulnerability,
+            "category": category,
+            "history": history,
+            "models": models,
+            "streaming": streaming,
+        }
+
+    async def _acall_llm(
+        self,
+        node: str,
+        messages: List[BaseMessage],
+        request: ChatRequest,
+        render: Optional[Callable[[BaseMessage], BaseMessage]] = None,
+        streaming: bool = False,
+    ) -> Tuple[BaseMessage, str]:
+        """Call the node's current model, serving exact repeats from the response cache.
+
+        Returns the reply and the name of the model that produced it.
+        ``render`` turns a fresh reply into the message that is cached and
+        returned; it may raise ``ValueError`` for an unusable reply.
+        ``streaming`` is set when the reply's tokens go out to a client as
+        they arrive, which rules out hedging and retrying after the first one.
+        """
+        route = self.routes[node]
+        model = route.select()
+        llm = self._node_llm(node, model)
+        key = self.cache.make_key(messages, model, request.user_input)
+        if request.bypass_cache:
+            LLM_RESPONSE_CACHE.labels(node=node, result="bypass").inc()
+        else:
+            cached = await self.cache.aget(key)
+            result = "miss" if cached is None else "hit"
+            LLM_RESPONSE_CACHE.labels(node=node, result=result).inc()
+            if cached is not None:
+                return AIMessage(content=cached), model
+
+        timers: List[FirstTokenTimer] = []
+
+        def attempt():
+            timers.append(FirstTokenTimer(node))
+            return llm.ainvoke(messages, config=with_first_token_timer(timers[-1]))
+
+        def emitted() -> bool:
+            return any(timer.seen for timer in timers)
+
+        start = time.perf_counter()
+        try:
+            output = await self.resilience[node].call(
+                model, attempt, emitted if streaming else None
+            )
+        except Exception as e:
+            route.observe(model, time.perf_counter() - start, ok=False)
+            outcome = "error"
+            if isinstance(e, DeadlineExceeded):
+                outcome = "timeout"
+            elif isinstance(e, UpstreamUnavailable):
+                outcome = "rejected"
+            LLM_REQUESTS.labels(node=node, model=model, outcome=outcome).inc()
+            raise
+        elapsed = time.perf_counter() - start
+        route.observe(model, elapsed, ok=True)
+        LLM_REQUESTS.labels(node=node, model=model, outcome="ok").inc()
+        LLM_REQUEST_DURATION.labels(node=node, model=model).observe(elapsed)
+        log_token_usage(output)
+        record_token_usage(node, getattr(output, "usage_metadata", None) or {})
+        if render is not None:
+            output = render(output)
+        await self.cache.aset(key, output.text())
+        return output, model
+
+    @property
+    def model_name(self) -> str:
+        """The fixer's primary model (what precomputed fixes are versioned by)."""
+        return self.routes["fixer"].primary
+
+    async def _precomputed_fix(self, state: ChatOrchestratorState) -> Optional[str]:
+        """The offline-generated fix for this request's (vulnerability, category), if any.
+
+        Only first turns qualify: with history the user is refining an earlier
+        answer, which a fix generated without that conversation cannot do. The
+        feedback must also be generic (see ``is_generic_feedback``): a canned
+        fix cannot follow an instruction it was generated without.
+        """
+        vulnerability, category = state["vulnerability"], state.get("category")
+        request = state["request"]
+        if (
+            self.precomputed is None
+            or vulnerability is None
+            or category is None
+            or state["history"]
+            or request.bypass_cache
+        ):
+            return None
+        if not is_generic_feedback(request.user_input, category, PRECOMPUTED_MAX_WORDS):
+            PRECOMPUTED_FIXES.labels(result="specific").inc()
+            return None
+        version = make_fix_version(get_vulnerability_store().version, self.model_name)
+        fix = await self.precomputed.aget(version, vulnerability.id, category)
+        PRECOMPUTED_FIXES.labels(result="miss" if fix is None else "hit").inc()
+        return fix
+
+    @staticmethod
+    def _render_verdict(output: BaseMessage) -> AIMessage:
+        """Validate the classifier's tool call and render it as the Markdown verdict."""
+        tool_calls = getattr(output, "tool_calls", None)
+        if not tool_calls:
+            raise ValueError("the classifier made no tool call")
+        return render_classification(
+            Classification.model_validate(tool_calls[0]["args"]),
+            usage_metadata=getattr(output, "usage_metadata", None),
+        )
+
     # --------- nodes ---------
 
-    def classifier_node(self, state: ChatOrchestratorState):
+    async def classifier_node(self, state: ChatOrchestratorState):
         """Step 1: classify vulnerability"""
-        sys_prompt = make_system_prompt()
-        output = self.llm.invoke([sys_prompt] + state["messages"])
-        logger.info("**Classifier output** %s - %s", self.request.title, output.content)
-        return {"messages": [output]}
+        messages = [make_system_prompt()] + state["messages"]
+        with NODE_DURATION.labels(node="classifier").time():
+            if self.classifier_mode != "structured":
+                output, model = await self._acall_llm(
+                    "classifier", messages, state["request"]
+                )
+            else:
+                try:
+                    output, model = await self._acall_llm(
+                        "classifier",
+                        messages,
+                        state["request"],
+                        render=self._render_verdict,
+                    )
+                except ValueError as e:
+                    logger.warning("Unusable classifier reply (%s); feedback_unclear.", e)
+                    model = self.routes["classifier"].select()
+                    output = render_classification(
+                        Classification(
+                            category=FixCategory.FEEDBACK_UNCLEAR,
+                            reason="the classifier returned no valid category",
+                        )
+                    )
+        logger.info("Classifier (%s) answered for %r", model, state["request"].title)
+        logger.debug("**Classifier output** %s", output.content)
+        return {
+            "messages": [output],
+            "category": parse_class_category(output.text()),
+            "models": {"classifier": model},
+        }
 
-    def fixer_node(self, state: ChatOrchestratorState):
+    async def fixer_node(self, state: ChatOrchestratorState):
         """Step 2: apply fix using classifier output"""
-        class_category = state["messages"][-1].content
-        fix_input = get_fix_user_prompt(
-            class_category,
-            self.request,
-        )
-        output = self.llm.invoke([fix_input])
-        logger.info("**Fixer output** %s - %s", self.request.title, output.content)
+        with NODE_DURATION.labels(node="fixer").time():
+            precomputed = await self._precomputed_fix(state)
+            if precomputed is not None:
+                logger.info("Serving precomputed fix for %r", state["request"].title)
+                return {
+                    "messages": [AIMessage(content=precomputed)],
+                    "models": {"fixer": "precomputed"},
+                }
+            # The validated enum when there is one; markdown verdicts that name no
+            # known class fall back to handing the fixer the whole message.
+            category = state.get("category")
+            class_category = category.value if category else state["messages"][-1].content
+            fix_input = get_fix_user_prompt(
+                class_category,
+                state["request"],
+                state["vulnerability"],
+                state["history"],
+            )
+            output, model = await self._acall_llm(
+                "fixer",
+                [fix_input],
+                state["request"],
+                streaming=state.get("streaming", False),
+            )
+        logger.info("Fixer (%s) answered for %r", model, state["request"].title)
+        logger.debug("**Fixer output** %s", output.content)
+        return {"messages": [output], "models": {"fixer": model}}
 
-        return {"messages": [output]}
+    def entry_node(
+        self, state: ChatOrchestratorState
+    ) -> Literal["classifier", "fixer", END]:
+        """Skip the LLM classifier when the local classifier already answered"""
+        if isinstance(state["messages"][-1], AIMessage):
+            return self.condition_node(state)
+        return "classifier"
 
     def condition_node(self, state: ChatOrchestratorState) -> Literal["fixer", END]:
         """Decide whether to run fixer based on classifier output"""
+        request = state["request"]
         invalid = {None, "", "n/a"}
-        if self.request.codebase in invalid or self.request.title in invalid:
+        if request.codebase in invalid or request.title in invalid:
             return END
         return "fixer"
 
@@ -53,7 +447,7 @@ class ChatOrchestrator:
         builder.add_node("classifier", self.classifier_node)
         builder.add_node("fixer", self.fixer_node)
 
-        builder.set_entry_point("classifier")
+        builder.set_conditional_entry_point(self.entry_node)
         builder.add_conditional_edges("classifier", self.condition_node)
 
         self.graph = builder.compile()
@@ -61,17 +455,107 @@ class ChatOrchestrator:
     def show_graph(self):
         """Render the state graph"""
         try:
+            from IPython.display import Image, display
+
             png_data = self.graph.get_graph(xray=True).draw_mermaid_png()
             display(Image(png_data))
         except Exception as e:
             logger.error("Failed to render graph image: %s", e)
             logger.info(self.graph.get_graph(xray=True).draw_mermaid())
 
-    def invoke(self, request: ChatRequest) -> ChatResponse:
-        """Run classifier → fixer pipeline"""
-        self.request = request
-        reply: ChatOrchestratorState = cast(
-            ChatOrchestratorState,
-            self.graph.invoke({"messages": [get_user_prompt(request)]}),
+    async def _finish(self, reply: ChatOrchestratorState) -> ChatResponse:
+        """Format the reply and append the exchange to the request's session."""
+        request = reply["request"]
+        response = make_orch_output(reply, request)
+        if request.session_id:
+            await self.sessions.arecord(
+                request.session_id, request.user_input, response.response
+            )
+        return response
+
+    @staticmethod
+    def _flight_key(state: ChatOrchestratorState) -> Optional[Tuple[str, ...]]:
+        """Requests with equal keys get the same answer, so they can share one run."""
+        request = state["request"]
+        if request.bypass_cache:
+            return None
+        return (
+            " ".join(request.user_input.split()).casefold(),
+            request.codebase,
+            normalize_title(request.title),
+            state["history"],
+        )
+
+    async def ainvoke(
+        self,
+        request: ChatRequest,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+    ) -> ChatResponse:
+        """Run classifier → fixer pipeline on the event loop.
+
+        Concurrent identical requests (same normalized feedback, finding and
+        history) share a single graph run. ``slot`` (e.g. admission control)
+        is held around that run only, so callers joining it take no slot.
+        """
+        history = await self.sessions.ahistory(request)
+        state = self._initial_state(request, history=history)
+
+        async def run() -> dict:
+            if slot is None:
+                return await self.graph.ainvoke(state)
+            async with slot():
+                return await self.graph.ainvoke(state)
+
+        key = self._flight_key(state)
+        reply = await (run() if key is None else self.inflight.run(key, run))
+        # Each caller records the exchange in its own session.
+        reply = cast(ChatOrchestratorState, {**reply, "request": state["request"]})
+        return await self._finish(reply)
+
+    async def astream(self, request: ChatRequest) -> AsyncIterator[Tuple[str, dict]]:
+        """Run classifier → fixer pipeline, yielding ``(event, data)`` as it progresses.
+
+        Events are ``classifier`` (full verdict), ``token`` (fixer output
+        deltas) and ``done`` (the same response ``ainvoke`` would return).
+        """
+        history = await self.sessions.ahistory(request)
+        state = self._initial_state(request, streaming=True, history=history)
+        messages = list(state["messages"])
+        models = dict(state["models"])
+        fixer_streamed = False
+        if isinstance(messages[-1], AIMessage):
+            yield "classifier", {"content": messages[-1].text()}
+
+        async for mode, chunk in self.graph.astream(
+            state, stream_mode=["messages", "updates"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") == "fixer" and message.text():
+                    fixer_streamed = True
+                    yield "token", {"content": message.text()}
+                continue
+
+            for node, update in chunk.items():
+                output = update["messages"][-1]
+                messages.append(output)
+                models.update(update.get("models", {}))
+                if node == "classifier":
+                    yield "classifier", {"content": output.text()}
+                elif node == "fixer" and not fixer_streamed:
+                    yield "token", {"content": output.text()}
+
+        reply = cast(
+            ChatOrchestratorState, {**state, "messages": messages, "models": models}
         )
-        return make_orch_output(reply, request)
+        yield "done", (await self._finish(reply)).model_dump()
+
+    def invoke(self, request: ChatRequest) -> ChatResponse:
+        """Run classifier → fixer pipeline from synchronous code (CLI, scripts)"""
+        return asyncio.run(self.ainvoke(request))
+
+
+@lru_cache(maxsize=1)
+def get_orchestrator() -> ChatOrchestrator:
+    """Return the process-wide orchestrator (LLM client and graph built once)."""
+    return ChatOrchestrator()
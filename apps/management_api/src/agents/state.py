@@ -0,0 +1,36 @@
+import operator
+from typing import Dict, Annotated, Optional
+from typing_extensions import TypedDict
+from langgraph.graph.message import add_messages
+from langchain_core.messages import BaseMessage
+from src.utils.pymodels import ChatRequest, ChatResponse, FixCategory, Vulnerability
+
+
+class ChatOrchestratorState(TypedDict):
+    """Represents the state of the chat orchestrator."""
+
+    messages: Annotated[list[BaseMessage], add_messages]
+    request: ChatRequest
+    vulnerability: Optional[Vulnerability]
+    category: Optional[FixCategory]
+    history: str
+    # node → what answered it: a model name, "local" or "precomputed".
+    models: Annotated[Dict[str, str], operator.or_]
+    # Set by astream: the fixer's tokens are sent to the client as they arrive.
+    streaming: bool
+
+
+def make_orch_output(
+    reply: ChatOrchestratorState, request: ChatRequest
+) -> ChatResponse:
+    """Format the orchestrator output."""
+    invalid = {None, "", "n/a"}
+    if request.codebase in invalid or request.title in invalid:
+        response = f"### Predicted Class: \n{reply['messages'][-1].content}"
+    else:
+        response = f"### Predicted Class: \n{reply['messages'][-2].content}\n\n{reply['messages'][-1].content}"
+    return ChatResponse(
+        response=response,
+        session_id=request.session_id,
+        models=reply.get("models") or {},
+    )
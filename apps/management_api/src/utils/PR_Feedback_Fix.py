@@ -3,9 +3,11 @@ from enum import Enum
 from dotenv import load_dotenv
 import os
 import csv
-import pandas as pd
-from injection_prompts import all_test_cases
-from category_prompts import feedback_examples
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Tuple, Union
+from feedback_schemas import FEEDBACK_FUNCTION_SCHEMAS
+from rate_limit import TokenBucket
 
 # Load environment variables from .env file
 load_dotenv()
@@ -48,111 +50,9 @@ class SecurityVulnerabilityFeedbackProcessor:
     def classify_feedback(self, user_feedback: str) -> FeedbackCategory:
         """
         Classify user feedback into an appropriate category using function calling.
-        """
 
-        # Function schemas for feedback classification (unchanged as per request)
-        function_schemas = [
-            {
-                "name": "incorrect_logic",
-                "description": "Use this function when user feedback indicates logical errors, flawed reasoning, wrong algorithmic approach, incorrect conditional statements, faulty business logic implementation, improper flow control, wrong variable assignments, incorrect mathematical operations, flawed validation logic, improper error handling logic, wrong comparison operators, incorrect loop logic, faulty state management, improper data flow, logical inconsistencies, wrong assumptions in code, flawed decision trees, incorrect boolean logic, improper null checks, wrong type checking logic, faulty authentication logic, incorrect authorization flow, wrong data processing logic, improper calculation methods, flawed sorting or filtering logic. Keywords: logic, wrong, incorrect, flawed, doesn't work, buggy logic, poor logic, bad logic, logical error, wrong approach, incorrect implementation, faulty reasoning, wrong conditions, improper checks.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "incomplete_fix",
-                "description": "Use this function when user feedback suggests the fix is partial, doesn't fully resolve the issue, leaves some cases unhandled, misses important scenarios, only addresses part of the vulnerability, incomplete implementation, partial solution, missing components, doesn't cover all attack vectors, leaves gaps, unfinished implementation, half-baked solution, needs more work, requires additional changes, doesn't go far enough, surface-level fix, band-aid solution, doesn't address root cause completely, missing edge cases in fix, partial mitigation only. Keywords: incomplete, partial, not enough, missing, unfinished, half, doesn't fully, not complete, needs more, requires additional, surface level, band-aid, doesn't cover all.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "doesnt_address_vulnerability",
-                "description": "Use this function when user feedback indicates the fix completely misses the actual security vulnerability, doesn't target the real issue, focuses on wrong problem, misunderstands the vulnerability, doesn't fix the security flaw, addresses different issue entirely, misses the point, doesn't close security gap, vulnerability still exists, security hole remains open, attack vector still possible, exploit still works, doesn't prevent the attack, misses security concern, doesn't address threat, ignores actual vulnerability, fixes wrong security issue, doesn't mitigate risk, security flaw persists. Keywords: doesn't address, misses, wrong issue, not fixing, vulnerability remains, still vulnerable, doesn't prevent, misses point, ignores, doesn't close, gap remains, exploit works.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "introduces_new_bugs",
-                "description": "Use this function when user feedback mentions the fix creates new problems, causes different errors, breaks other parts, introduces regressions, creates side effects, causes new failures, generates additional issues, brings new problems, creates unintended consequences, causes cascading failures, introduces race conditions, creates memory leaks, causes performance issues, breaks compatibility, introduces new exceptions, creates data corruption, causes system instability, introduces timing issues, creates resource conflicts, causes integration problems. Keywords: introduces, creates new, causes, breaks, regression, side effects, new problems, additional issues, unintended, cascading, new bugs, new errors, new issues, brings problems.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "fails_edge_cases",
-                "description": "Use this function when user feedback indicates the fix doesn't handle boundary conditions, fails with unusual inputs, doesn't work with extreme values, misses corner cases, doesn't handle null values, fails with empty inputs, doesn't work with large datasets, fails with special characters, doesn't handle unicode, fails with negative numbers, doesn't work with zero values, misses timeout scenarios, doesn't handle concurrent access, fails with malformed data, doesn't handle network failures, misses file system errors, doesn't handle memory constraints, fails with permission issues, doesn't work in different environments. Keywords: edge cases, corner cases, boundary, extreme values, fails with, doesn't handle, special cases, unusual inputs, boundary conditions, limits, exceptions.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "hallucinates_code",
-                "description": "Use this function when user feedback indicates the fix references non-existent functions, uses imaginary libraries, calls undefined methods, references missing variables, uses non-existent APIs, imports libraries that don't exist, calls functions that aren't available, uses properties that don't exist, references classes that aren't defined, uses constants that don't exist, calls methods on wrong objects, uses incorrect syntax for the language, references documentation that doesn't exist, uses features not available in the version, makes up function signatures, invents new language features. Keywords: doesn't exist, not defined, not available, imaginary, made up, hallucinated, non-existent, undefined, missing, not real, fictional, invented.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "syntax_error",
-                "description": "Use this function when user feedback points to compilation errors, parsing errors, malformed code, incorrect syntax, missing semicolons, unmatched brackets, wrong indentation, invalid operators, incorrect keywords, malformed expressions, wrong function signatures, invalid variable names, incorrect imports, wrong annotations, malformed strings, incorrect escape sequences, wrong commenting syntax, invalid regular expressions, incorrect JSON/XML syntax, wrong SQL syntax, invalid configuration syntax. Keywords: syntax error, compilation error, parse error, malformed, invalid syntax, won't compile, syntax issue, formatting error, indentation, brackets, semicolon.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "breaks_functionality",
-                "description": "Use this function when user feedback indicates the fix disrupts existing features, breaks current workflows, stops working functionality, disables important features, causes system failures, breaks user interface, disrupts business processes, stops critical operations, breaks integrations, causes application crashes, breaks data flow, disrupts service availability, breaks API endpoints, stops background processes, breaks user authentication, disrupts file operations, breaks database connections, stops scheduled tasks, breaks notification systems. Keywords: breaks, stops working, disrupts, disables, causes failure, crashes, not working, functionality broken, features broken, system failure.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "introduces_new_vulnerability",
-                "description": "Use this function when user feedback warns that the fix creates new security risks, opens new attack vectors, introduces security holes, creates new exploitable conditions, weakens other security controls, enables new types of attacks, creates authentication bypasses, introduces authorization flaws, enables injection attacks, creates information disclosure, introduces privilege escalation, enables denial of service, creates session management issues, introduces cryptographic weaknesses, enables cross-site attacks, creates insecure configurations, introduces timing attacks, enables data tampering. Keywords: new vulnerability, security risk, new attack, security hole, exploit, bypass, injection, disclosure, escalation, security weakness, attack vector.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "uses_deprecated_insecure",
-                "description": "Use this function when user feedback mentions the fix uses outdated libraries, deprecated functions, insecure methods, obsolete APIs, legacy code patterns, unmaintained dependencies, functions with known vulnerabilities, deprecated cryptographic methods, insecure protocols, outdated security practices, vulnerable third-party components, end-of-life software, unsupported versions, deprecated security algorithms, insecure default configurations, legacy authentication methods, outdated encryption standards, vulnerable serialization methods. Keywords: deprecated, obsolete, outdated, insecure, legacy, unmaintained, end-of-life, unsupported, vulnerable, old version, security issue.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "weakens_security",
-                "description": "Use this function when user feedback indicates the fix reduces security posture, lowers security standards, removes important security checks, disables security features, reduces encryption strength, weakens access controls, removes security validations, disables security logging, reduces security monitoring, weakens authentication requirements, removes security headers, disables security policies, reduces security configurations, weakens input validation, removes security middleware, disables security scanning, reduces audit trails, weakens security boundaries. Keywords: weakens, reduces security, lowers, removes security, disables protection, less secure, security reduction, weaker.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "inefficient_code",
-                "description": "Use this function when user feedback criticizes poor performance, slow execution, inefficient algorithms, unnecessary computations, redundant operations, poor resource usage, slow database queries, inefficient loops, unnecessary memory allocations, poor caching strategies, inefficient data structures, slow I/O operations, inefficient string operations, poor concurrency handling, inefficient network calls, slow rendering, poor optimization, inefficient parsing, slow response times, performance bottlenecks. Keywords: slow, inefficient, performance, poor performance, bottleneck, optimization, speed, fast, timing, resource usage.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "excessive_resources",
-                "description": "Use this function when user feedback complains about high memory usage, excessive CPU consumption, too much disk space, high network bandwidth usage, memory leaks, resource exhaustion, high system load, excessive database connections, too many file handles, high thread usage, excessive caching, resource starvation, high energy consumption, excessive logging, too much storage, high infrastructure costs, resource contention, scalability issues due to resources. Keywords: memory, CPU, resources, consumption, usage, leak, exhaustion, high load, too much, excessive, expensive, scalability.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "suboptimal_algorithm",
-                "description": "Use this function when user feedback suggests better algorithmic approaches, more efficient algorithms, improved complexity, better data structures, optimal solutions, algorithmic improvements, better sorting methods, improved searching techniques, more efficient graph algorithms, better optimization techniques, improved mathematical approaches, more efficient pattern matching, better compression algorithms, improved hashing methods, more efficient parsing algorithms, better encryption algorithms, improved scheduling algorithms, more efficient routing algorithms. Keywords: algorithm, optimization, efficiency, complexity, better approach, optimal, improve algorithm, data structure, mathematical, sorting, searching.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "overly_complex",
-                "description": "Use this function when user feedback criticizes unnecessary complexity, over-engineering, convoluted solutions, hard to understand code, overly complicated logic, too many abstractions, complex design patterns where simple would work, unnecessary indirection, overly sophisticated solutions, complex inheritance hierarchies, too many layers, difficult to maintain, hard to debug, complex configuration, over-architected, unnecessarily clever code, complex dependencies, difficult to test, hard to modify, complex state management. Keywords: complex, complicated, over-engineered, convoluted, difficult, hard to understand, too complex, unnecessary complexity, sophisticated, clever, abstraction.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "inconsistent_style",
-                "description": "Use this function when user feedback points to code style inconsistencies, different naming conventions, inconsistent formatting, mixed coding standards, different indentation styles, inconsistent commenting, mixed language features, different error handling patterns, inconsistent logging, mixed architectural patterns, different design approaches, inconsistent API designs, mixed data formats, different configuration styles, inconsistent testing approaches, mixed documentation styles, different deployment patterns, inconsistent security practices. Keywords: inconsistent, style, convention, formatting, standards, mixed, different approach, pattern, consistency, coding style.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "unnecessary_code",
-                "description": "Use this function when user feedback mentions redundant code, unnecessary comments, excessive logging, unused variables, dead code, redundant checks, unnecessary imports, overly verbose comments, excessive documentation, unnecessary complexity, redundant validations, unused functions, excessive error handling, unnecessary abstractions, redundant code paths, unused dependencies, excessive configuration, unnecessary middleware, redundant data structures, overly detailed logs, excessive monitoring. Keywords: unnecessary, redundant, excessive, unused, dead code, too much, overly, verbose, extra, not needed.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "try_another_fix",
-                "description": "Use this function when user feedback requests a completely different solution, alternative approach, different implementation strategy, new fix attempt, different methodology, alternative design, different architecture, new solution path, different technique, alternative algorithm, different framework, new implementation, different tool, alternative library, different pattern, new approach entirely, different strategy, alternative solution, different way, complete rework, start over, different direction. Keywords: different, alternative, another way, new approach, try again, different solution, rework, start over, different method, another fix.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "incorrect_notes",
-                "description": "Use this function when user feedback criticizes wrong explanations, incorrect documentation, misleading comments, wrong descriptions, inaccurate notes, incorrect reasoning in comments, misleading documentation, wrong technical explanations, inaccurate code comments, incorrect function descriptions, misleading variable names, wrong API documentation, inaccurate inline comments, incorrect configuration notes, misleading error messages, wrong help text, inaccurate log messages, incorrect user instructions, misleading tooltips, wrong validation messages. Keywords: notes, comments, documentation, explanation, description, wrong explanation, incorrect notes, misleading, inaccurate, wrong description.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-            {
-                "name": "other",
-                "description": "Use this function for any feedback that doesn't clearly fit into the other categories, requires admin approval, contains unique concerns not covered by other functions, has special requirements, involves business decisions, requires policy changes, involves legal considerations, needs management approval, contains sensitive information, involves compliance issues, requires architectural decisions, involves third-party integrations, needs security review, involves cost considerations, requires stakeholder input, Prompt Injection.",
-                "input_schema": {"type": "object", "properties": {}, "required": []},
-            },
-        ]
+        API errors propagate, so a failed call is never mistaken for a label.
+        """
 
         classification_prompt = f"""
         Analyze the user feedback: "{user_feedback}"
@@ -160,29 +60,23 @@ class SecurityVulnerabilityFeedbackProcessor:
         If the feedback is ambiguous or doesn't fit any category, call 'feedback_unclear'.
         """
 
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1024,
-                messages=[{"role": "user", "content": classification_prompt}],
-                tools=function_schemas,
-                tool_choice={"type": "any"},
-            )
-
-            if response.content:
-                for content in response.content:
-                    if content.type == "tool_use":
-                        # Ensure the tool name is a valid FeedbackCategory
-                        if content.name in FeedbackCategory._value2member_map_:
-                            return FeedbackCategory(content.name)
-
-            # Default if no tool is called or the tool name is invalid
-            return FeedbackCategory.FEEDBACK_UNCLEAR
-
-        except Exception as e:
-            # Log the exception for debugging purposes
-            print(f"An error occurred during feedback classification: {e}")
-            return FeedbackCategory.OTHER
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=1024,
+            messages=[{"role": "user", "content": classification_prompt}],
+            tools=FEEDBACK_FUNCTION_SCHEMAS,
+            tool_choice={"type": "any"},
+        )
+
+        if response.content:
+            for content in response.content:
+                if content.type == "tool_use":
+                    # Ensure the tool name is a valid FeedbackCategory
+                    if content.name in FeedbackCategory._value2member_map_:
+                        return FeedbackCategory(content.name)
+
+        # Default if no tool is called or the tool name is invalid
+        return FeedbackCategory.FEEDBACK_UNCLEAR
 
     def generate_specialized_prompt(
         self,
@@ -261,43 +155,96 @@ Copy
         return base_prompt_template.replace("{{instruction}}", instruction_text)
 
 
-def create_feedback_csv(feedback_examples):
+RESULT_FIELDS = ["question", "ground_truth", "predicted_function_name"]
+
+
+def load_checkpoint(output_path: str) -> dict:
+    """Read rows already written by a previous (possibly interrupted) run."""
+    if not os.path.exists(output_path):
+        return {}
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        return {row["question"]: row for row in csv.DictReader(f)}
+
+
+def create_feedback_csv(
+    feedback_examples: Iterable[Union[str, Tuple[str, str]]],
+    output_path: str = "feedback_classification_results.csv",
+    workers: int = 8,
+    requests_per_minute: float = 50,
+):
+    """
+    Classify feedback in parallel, appending each result to ``output_path`` as it lands.
+
+    Examples are plain strings or ``(feedback, ground_truth)`` pairs. Rows already
+    present in ``output_path`` are skipped, so re-running resumes after a crash.
+    Failed classifications are reported and left out of the file, so the next
+    run retries them.
+    """
     if not api_key:
         print("ANTHROPIC_API_KEY is not set. Cannot process feedback.")
         return
 
     processor = SecurityVulnerabilityFeedbackProcessor(api_key=api_key)
+    bucket = TokenBucket(rate=requests_per_minute / 60, capacity=workers)
 
-    results = []
+    labels = {}
+    for example in feedback_examples:
+        feedback, truth = (example, "Unknown") if isinstance(example, str) else example
+        labels[feedback] = truth
 
-    print("Processing feedback examples...")
-    for i, feedback in enumerate(feedback_examples):
-        print(f"Processing {i + 1}/{len(feedback_examples)}: {feedback[:50]}...")
+    results = load_checkpoint(output_path)
+    pending = [feedback for feedback in labels if feedback not in results]
+    print(f"Resuming: {len(results)} done, {len(pending)} pending.")
 
+    def classify(feedback: str) -> dict:
+        bucket.acquire()
         predicted_category = processor.classify_feedback(feedback)
+        return {
+            "question": feedback,
+            "ground_truth": labels[feedback],
+            "predicted_function_name": predicted_category.value,
+        }
 
-        # Determine ground truth based on position in list (this is approximate)
-
-        results.append(
-            {
-                "question": feedback,
-                "ground_truth": "Unknow",
-                "predicted_function_name": predicted_category.value,
-            }
-        )
-
-    # Create DataFrame and save to CSV
-    df = pd.DataFrame(results)
-    df.to_csv("feedback_classification_results_v3.csv", index=False)
-    print(f"\nResults saved to 'feedback_classification_results_v2.csv'")
+    is_new_file = not os.path.exists(output_path)
+    failed = []
+    start = time.monotonic()
+    with open(output_path, "a", encoding="utf-8", newline="") as f, ThreadPoolExecutor(
+        max_workers=workers
+    ) as pool:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if is_new_file:
+            writer.writeheader()
+
+        futures = {pool.submit(classify, feedback): feedback for feedback in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            elapsed = time.monotonic() - start
+            rate = done / elapsed if elapsed else 0.0
+            eta = (len(pending) - done) / rate if rate else float("inf")
+            progress = f"[{done}/{len(pending)}] {rate:.2f} req/s, ETA {eta:.0f}s"
+            try:
+                row = future.result()
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"{progress}: failed {futures[future][:50]}...: {e}")
+                continue
+            writer.writerow(row)
+            f.flush()
+            results[row["question"]] = row
+            print(f"{progress}: {row['question'][:50]}...")
+
+    print(f"\nResults saved to '{output_path}'")
     print(f"Total examples processed: {len(results)}")
-
-    # Print accuracy
-    correct = sum(
-        1 for r in results if r["ground_truth"] == r["predicted_function_name"]
-    )
-    accuracy = correct / len(results) * 100
-    print(f"Accuracy: {accuracy:.2f}% ({correct}/{len(results)})")
+    if failed:
+        print(f"Failed (not saved, retried on the next run): {len(failed)}")
+
+    # Print accuracy over labeled rows only
+    labeled = [r for r in results.values() if r["ground_truth"] != "Unknown"]
+    if labeled:
+        correct = sum(
+            1 for r in labeled if r["ground_truth"] == r["predicted_function_name"]
+        )
+        accuracy = correct / len(labeled) * 100
+        print(f"Accuracy: {accuracy:.2f}% ({correct}/{len(labeled)})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import math
+import time
+import asyncio
+import ipaddress
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Sequence, Union
+from src.utils.rate_limit import TokenBucket
+from src.utils.metrics import CHAT_ADMISSION, CHAT_QUEUE_DEPTH
+
+
+class AdmissionRejected(Exception):
+    """A request turned away to shed load; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(spec: str) -> List[Network]:
+    """Comma-separated addresses or CIDRs, e.g. ``"10.0.0.0/8, 127.0.0.1"``."""
+    return [
+        ipaddress.ip_network(item.strip(), strict=False)
+        for item in spec.split(",")
+        if item.strip()
+    ]
+
+
+def _is_trusted(address: str, trusted: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def client_address(
+    peer: Optional[str], forwarded: Optional[str], trusted: Sequence[Network]
+) -> str:
+    """The caller's address for rate limiting.
+
+    ``X-Forwarded-For`` is only honored when the connection comes from a
+    trusted proxy; otherwise any client could pick a fresh address per
+    request. The hops are read right to left, skipping trusted proxies, so
+    addresses a client prepends itself are never used.
+    """
+    if not peer:
+        return "unknown"
+    if not forwarded or not _is_trusted(peer, trusted):
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return hops[0] if hops else peer
+
+
+class AdmissionController:
+    """At most ``max_active`` chats run; up to ``max_queue`` more wait for a slot.
+
+    Arrivals beyond that are rejected immediately instead of joining an
+    unbounded wait, and queued requests give up after ``queue_timeout``
+    seconds. ``Retry-After`` is estimated from the queue length and the
+    recent mean service time.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, queue_timeout: float):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.slots = asyncio.Semaphore(max_active)
+        self.waiting = 0
+        self._service_time = 1.0  # moving average, seconds
+
+    def _retry_after(self) -> float:
+        return self._service_time * (self.waiting + 1) / self.max_active
+
+    def check(self) -> None:
+        """Raise ``AdmissionRejected`` if a new request could not even queue."""
+        if self.slots.locked() and self.waiting >= self.max_queue:
+            CHAT_ADMISSION.labels(result="queue_full").inc()
+            raise AdmissionRejected("Server is at capacity", self._retry_after())
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a chat slot for the ``with`` block or raise ``AdmissionRejected``."""
+        self.check()
+
+        self.waiting += 1
+        CHAT_QUEUE_DEPTH.set(self.waiting)
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            CHAT_ADMISSION.labels(result="queue_timeout").inc()
+            raise AdmissionRejected(
+                "Timed out waiting for capacity", self._retry_after()
+            )
+        finally:
+            self.waiting -= 1
+            CHAT_QUEUE_DEPTH.set(self.waiting)
+
+        CHAT_ADMISSION.labels(result="admitted").inc()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.slots.release()
+            self._service_time += 0.1 * (time.monotonic() - start - self._service_time)
+
+
+class ClientRateLimiter:
+    """A ``TokenBucket`` per client, for the ``max_clients`` most recent clients."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client: str, tokens: float = 1.0) -> None:
+        """Spend ``tokens`` for ``client`` or raise ``AdmissionRejected``."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client)
+        wait = bucket.try_acquire(tokens)
+        if wait > 0:
+            CHAT_ADMISSION.labels(result="rate_limited").inc()
+            raise AdmissionRejected("Too many requests from this client", wait)
@@ -0,0 +1,176 @@
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+from langchain_core.messages import BaseMessage
+
+
+class ResponseCache:
+    """Exact-match LLM response cache.
+
+    A bounded in-memory LRU with TTL, optionally backed by a SQLite file so
+    entries survive restarts. Keys are a hash of the prompt messages and the
+    model name. ``aget``/``aset`` run the SQLite tier in a worker thread so
+    disk I/O never blocks the event loop. Expired rows are deleted when read,
+    and all of them at startup and then at most every ``prune_interval``
+    seconds of writes, so the file stays bounded by the TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        path: Optional[str] = None,
+        prune_interval: float = 3600.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._pruned = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+            self.prune()
+
+    @staticmethod
+    def make_key(
+        messages: Sequence[BaseMessage], model: str, free_text: str = ""
+    ) -> str:
+        """Hash the rendered prompt together with the model.
+
+        The prompt is hashed verbatim (whitespace in code is significant),
+        except that ``free_text`` (the user's message, embedded in it) is
+        whitespace-normalized so trivially different phrasings share a key.
+        """
+        normalized = " ".join(free_text.split())
+        texts = [m.text() for m in messages]
+        if free_text and normalized != free_text:
+            texts = [text.replace(free_text, normalized) for text in texts]
+        payload = json.dumps(
+            [model, [(m.type, text) for m, text in zip(messages, texts)]],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None on a miss."""
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._disk_get(key)
+        self._count(value)
+        return value
+
+    async def aget(self, key: str) -> Optional[str]:
+        """``get`` with the SQLite lookup off the event loop."""
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+        self._count(value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store ``value`` under ``key`` in every tier."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        if self._db is not None:
+            self._disk_set(key, now, value)
+
+    async def aset(self, key: str, value: str) -> None:
+        """``set`` with the SQLite write off the event loop."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, now, value)
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._entries.pop(key, None)
+            return None
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT created, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        if time.time() - row[0] >= self.ttl:
+            with self._db_lock:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key = ? AND created = ?", (key, row[0])
+                )
+                self._db.commit()
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+        return row[1]
+
+    def _disk_set(self, key: str, created: float, value: str) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, created, value) VALUES (?, ?, ?)",
+                (key, created, value),
+            )
+            self._db.commit()
+        if created - self._pruned >= self.prune_interval:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired rows from the SQLite tier; returns how many."""
+        if self._db is None:
+            return 0
+        now = time.time()
+        with self._db_lock:
+            deleted = self._db.execute(
+                "DELETE FROM responses WHERE created <= ?", (now - self.ttl,)
+            ).rowcount
+            self._db.commit()
+        self._pruned = now
+        return deleted
+
+    def _count(self, value: Optional[str]) -> None:
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters for measuring the savings."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _remember(self, key: str, created: float, value: str) -> None:
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
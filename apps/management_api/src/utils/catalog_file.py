@@ -0,0 +1,301 @@
+"""Compact read-only catalog file, memory-mapped and shared by worker processes.
+
+Layout (offsets absolute; the header is little-endian, the offsets table is
+in the builder's byte order, recorded in the index)::
+
+    header    magic "VULNCAT1", index offset (u64), index length (u64)
+    blobs     UTF-8 code / fix_code / notes of every vulnerability
+    payloads  the /vulnerabilities responses, pre-serialized; the full
+              catalog is written so each item's JSON is a slice of it
+    offsets   u64 table, one row per vulnerability:
+              (offset, length) of code, fix_code, notes and item JSON
+    index     compact JSON: version, codebases, and the id / title /
+              category columns
+
+Opening a file parses only the index; blobs, payloads and the offsets table
+stay in the page cache, shared by every process that maps the file.
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+from src.utils.pymodels import Vulnerability
+from src.utils.vulnerability_store import VulnerabilityStore, dump_json, normalize_title
+
+MAGIC = b"VULNCAT1"
+HEADER = struct.Struct("<8sQQ")
+FIELDS = ("code", "fix_code", "notes")
+# u64 per row: (offset, length) for each of FIELDS, then for the item JSON.
+ROW = 2 * len(FIELDS) + 2
+ITEM = 2 * len(FIELDS)
+
+
+def is_catalog_file(path: str) -> bool:
+    """Whether ``path`` starts with the catalog file magic."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_catalog_file(data: Dict[str, List[Vulnerability]], path: str) -> str:
+    """Write ``data`` as a catalog file (atomically) and return its version.
+
+    The version and payloads are byte-identical to those of a
+    ``VulnerabilityStore`` built from the same data, so ETags and
+    precomputed fixes stay valid whichever loader serves them.
+    """
+    ids: List[str] = []
+    titles: List[str] = []
+    categories: List[Optional[str]] = []
+    codebases: List[Tuple[str, int, int]] = []
+    offsets = array("Q")
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+
+        def put(blob: bytes) -> Tuple[int, int]:
+            start = f.tell()
+            f.write(blob)
+            return start, len(blob)
+
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        for codebase, vulns in data.items():
+            codebases.append((codebase, len(ids), len(vulns)))
+            for vuln in vulns:
+                ids.append(vuln.id)
+                titles.append(vuln.title)
+                categories.append(vuln.category)
+                for field in FIELDS:
+                    offsets.extend(put((getattr(vuln, field) or "").encode("utf-8")))
+                offsets.extend((0, 0))  # item JSON, written below
+
+        # Same bytes as VulnerabilityStore.full_payload, one item at a time.
+        digest = hashlib.sha1()
+        full_start, row = f.tell(), 0
+        digest.update(b"{")
+        f.write(b"{")
+        for i, (codebase, vulns) in enumerate(data.items()):
+            part = (b"," if i else b"") + dump_json(codebase) + b":["
+            digest.update(part)
+            f.write(part)
+            for j, vuln in enumerate(vulns):
+                item = (b"," if j else b"") + dump_json(vuln.model_dump())
+                digest.update(item)
+                start, _ = put(item)
+                skip = 1 if j else 0
+                offsets[row * ROW + ITEM] = start + skip
+                offsets[row * ROW + ITEM + 1] = len(item) - skip
+                row += 1
+            digest.update(b"]")
+            f.write(b"]")
+        digest.update(b"}")
+        f.write(b"}")
+        full = (full_start, f.tell() - full_start)
+
+        title_items = {
+            codebase: [{"id": v.id, "title": v.title} for v in vulns]
+            for codebase, vulns in data.items()
+        }
+        payloads = {
+            "full": full,
+            "titles": put(dump_json(title_items)),
+            "codebases": put(dump_json(list(data))),
+        }
+        codebase_titles = {
+            codebase: put(dump_json(items)) for codebase, items in title_items.items()
+        }
+
+        f.write(b"\0" * (-f.tell() % offsets.itemsize))
+        table = put(offsets.tobytes())
+        version = digest.hexdigest()[:16]
+        index = dump_json(
+            {
+                "version": version,
+                "byteorder": sys.byteorder,
+                "codebases": codebases,
+                "ids": ids,
+                "titles": titles,
+                "categories": categories,
+                "offsets": [table[0], len(offsets)],
+                "payloads": payloads,
+                "codebase_titles": codebase_titles,
+            }
+        )
+        index_start, _ = put(index)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, index_start, len(index)))
+    os.replace(tmp, path)
+    return version
+
+
+class CatalogFileBuilder:
+    """Keeps ``out_path`` built from the CSV at ``csv_path``, rebuilding on change.
+
+    Runs in the process that starts the workers: they map ``out_path`` and
+    pick up every rebuild through their own ``CatalogLoader``, so editing the
+    CSV hot-reloads as it does with one process. A CSV that fails to parse
+    leaves the previous file in place.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        out_path: str,
+        parse: Callable[[str], Dict[str, List[Vulnerability]]],
+        check_interval: float,
+    ):
+        self.csv_path = csv_path
+        self.out_path = out_path
+        self.check_interval = check_interval
+        self._parse = parse
+        self._mtime = 0.0
+
+    def check(self) -> Optional[str]:
+        """Rebuild if the CSV changed since the last build; returns the new version."""
+        try:
+            mtime = os.stat(self.csv_path).st_mtime
+            if mtime == self._mtime:
+                return None
+            self._mtime = mtime
+            version = write_catalog_file(self._parse(self.csv_path), self.out_path)
+        except Exception as e:
+            logging.error("Keeping catalog file %s: %s", self.out_path, e)
+            return None
+        logging.info("Built catalog %s from %s", version, self.csv_path)
+        return version
+
+    def start(self) -> None:
+        """Watch the CSV in a daemon thread (unless hot reload is disabled)."""
+        if self.check_interval > 0:
+            threading.Thread(target=self._watch, name="catalog-build", daemon=True).start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            self.check()
+
+
+class MappedVulnerabilityStore(VulnerabilityStore):
+    """``VulnerabilityStore`` served from a memory-mapped catalog file.
+
+    Only the lookup tables live in each process; vulnerabilities are built
+    from the mapped blobs on lookup, and payloads are slices of the file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_start, index_length = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog file")
+        index = json.loads(self._mm[index_start : index_start + index_length])
+        if index["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {index['byteorder']}-endian host")
+
+        table, count = index["offsets"]
+        self._offsets = memoryview(self._mm)[table : table + count * 8].cast("Q")
+        self._payloads: Dict[str, Tuple[int, int]] = index["payloads"]
+        self._titles: Dict[str, Tuple[int, int]] = index["codebase_titles"]
+        self._ids: List[str] = index["ids"]
+        self._title_of: List[str] = index["titles"]
+        self._categories: List[Optional[str]] = index["categories"]
+        self._rows: Dict[str, Tuple[int, int]] = {}
+        self._by_key: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        self._by_id: Dict[str, Tuple[str, int]] = {}
+        for codebase, first, size in index["codebases"]:
+            self._rows[codebase] = (first, size)
+            for row in range(first, first + size):
+                # First occurrence wins, as in VulnerabilityStore.
+                key = (codebase, normalize_title(self._title_of[row]))
+                self._by_key.setdefault(key, (codebase, row))
+                self._by_id.setdefault(self._ids[row], (codebase, row))
+        self.version = index["version"]
+
+    def _slice(self, start: int, length: int) -> bytes:
+        return self._mm[start : start + length]
+
+    def _vulnerability(self, row: int) -> Vulnerability:
+        base = row * ROW
+        code, fix_code, notes = (
+            self._slice(self._offsets[base + 2 * i], self._offsets[base + 2 * i + 1])
+            .decode("utf-8")
+            for i in range(len(FIELDS))
+        )
+        return Vulnerability(
+            code=code,
+            title=self._title_of[row],
+            category=self._categories[row],
+            fix_code=fix_code,
+            notes=notes,
+            id=self._ids[row],
+        )
+
+    def _item(self, row: int) -> Tuple[int, int]:
+        base = row * ROW + ITEM
+        return self._offsets[base], self._offsets[base + 1]
+
+    @property
+    def by_codebase(self) -> Dict[str, List[Vulnerability]]:
+        """Every vulnerability, materialized (for offline jobs, not serving)."""
+        return {
+            codebase: [self._vulnerability(row) for row in range(first, first + size)]
+            for codebase, (first, size) in self._rows.items()
+        }
+
+    @property
+    def full_payload(self) -> bytes:
+        return self._slice(*self._payloads["full"])
+
+    @property
+    def titles_payload(self) -> bytes:
+        return self._slice(*self._payloads["titles"])
+
+    @property
+    def codebases_payload(self) -> bytes:
+        return self._slice(*self._payloads["codebases"])
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def find(self, codebase: str, title: str) -> Optional[Tuple[str, Vulnerability]]:
+        found = self._by_key.get((codebase, normalize_title(title)))
+        return None if found is None else (found[0], self._vulnerability(found[1]))
+
+    def get(self, vuln_id: str) -> Optional[Tuple[str, Vulnerability]]:
+        found = self._by_id.get(vuln_id)
+        return None if found is None else (found[0], self._vulnerability(found[1]))
+
+    def page_payload(self, codebase: str, offset: int, limit: int) -> Optional[bytes]:
+        rows = self._rows.get(codebase)
+        if rows is None:
+            return None
+        first, size = rows
+        page = b""
+        if offset < size:
+            # A codebase's items are stored comma-separated and contiguous.
+            start, _ = self._item(first + offset)
+            end, length = self._item(first + min(size, offset + limit) - 1)
+            page = self._slice(start, end + length - start)
+        header = dump_json(
+            {"codebase": codebase, "total": size, "offset": offset, "limit": limit}
+        )
+        return header[:-1] + b',"items":[%s]}' % page
+
+    def codebase_titles_payload(self, codebase: str) -> Optional[bytes]:
+        found = self._titles.get(codebase)
+        return None if found is None else self._slice(*found)
+
+    def detail_payload(self, vuln_id: str) -> Optional[bytes]:
+        found = self._by_id.get(vuln_id)
+        if found is None:
+            return None
+        codebase, row = found
+        item = self._slice(*self._item(row))
+        return b'{"codebase":%s,%s' % (dump_json(codebase), item[1:])
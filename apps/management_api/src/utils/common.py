@@ -1,46 +1,27 @@
 import os
-import uuid
+import json
 import logging
-from typing import Dict, List, Annotated
-import pandas as pd
-from typing_extensions import TypedDict
-from langgraph.graph.message import add_messages
+from typing import Dict, List
 from langchain_core.messages import BaseMessage
 from src.utils.pymodels import Vulnerability
-from src.utils.pymodels import ChatResponse, ChatRequest
+from src.utils.vulnerability_store import (
+    CatalogLoader,
+    VulnerabilityStore,
+    iter_csv_vulnerabilities,
+)
+from src.utils.catalog_file import MappedVulnerabilityStore, is_catalog_file
 
 # ---------- All util Functions ----------
 
 
-class ChatOrchestratorState(TypedDict):
-    """Represents the state of the chat orchestrator."""
-
-    messages: Annotated[list[BaseMessage], add_messages]
-
-
 def fetch_csv_data(
     file_path: str = "src/utils/data.csv",
 ) -> Dict[str, List[Vulnerability]]:
     """Fetch data from a CSV file and map codebases to lists of Pydantic models."""
     try:
-        df = pd.read_csv(file_path)
-        df = df.fillna("n/a")
         data: Dict[str, List[Vulnerability]] = {}
-
-        for record in df.to_dict(orient="records"):
-            title_value = str(record.get("Title", "")).strip()
-            if not title_value:
-                title_value = str(uuid.uuid4())
-
-            vuln = Vulnerability(
-                code=record["Vulnerable"],
-                title=title_value,
-                category=record["Category"],
-                fix_code=record["Fixed"],
-                notes=record["Notes"],
-            )
-            data.setdefault(record["Codebase"], []).append(vuln)
-
+        for codebase, vuln in iter_csv_vulnerabilities(file_path):
+            data.setdefault(codebase, []).append(vuln)
         return data
 
     except Exception as e:
@@ -48,6 +29,13 @@ def fetch_csv_data(
         raise
 
 
+def load_vulnerability_store(path: str) -> VulnerabilityStore:
+    """Map a catalog file built by build_catalog.py, or parse a CSV."""
+    if is_catalog_file(path):
+        return MappedVulnerabilityStore(path)
+    return VulnerabilityStore(fetch_csv_data(path))
+
+
 def load_system_message(dir_path: str = "src/agent_prompt/prompts") -> dict[str, str]:
     """Load system messages from markdown files in the specified directory."""
     messages = {}
@@ -63,16 +51,42 @@ def load_system_message(dir_path: str = "src/agent_prompt/prompts") -> dict[str,
     return messages
 
 
-def make_orch_output(
-    reply: ChatOrchestratorState, request: ChatRequest
-) -> ChatResponse:
-    """Format the orchestrator output."""
-    invalid = {None, "", "n/a"}
-    if request.codebase in invalid or request.title in invalid:
-        response = f"### Predicted Class: \n{reply['messages'][-1].content}"
-    else:
-        response = f"### Predicted Class: \n{reply['messages'][-2].content}\n\n{reply['messages'][-1].content}"
-    return ChatResponse(response=response)
+def log_token_usage(message: BaseMessage) -> None:
+    """Log input/output and prompt-cache token counts reported by the provider."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details", {})
+    logger.info(
+        "Token usage: input=%s output=%s cache_read=%s cache_creation=%s",
+        usage.get("input_tokens"),
+        usage.get("output_tokens"),
+        details.get("cache_read", 0),
+        details.get("cache_creation", 0),
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def make_text_block(text: str, cache: bool = False) -> dict:
+    """Build an Anthropic text content block, optionally marked as a prompt-cache breakpoint."""
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def make_history_blocks(history: str) -> List[dict]:
+    """The prior conversation as an (uncached) prompt block, if there is one."""
+    if not history:
+        return []
+    return [make_text_block(f"Conversation so far:\n{history}")]
+
+
+def make_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 # ---------- Global Variables ----------
@@ -84,5 +98,103 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 PORT: int = int(os.getenv("PORT", "5000"))
+# Upper bound on chats awaiting the LLM at once in one process (tune per pod).
+MAX_CONCURRENT_CHATS: int = int(os.getenv("MAX_CONCURRENT_CHATS", "200"))
+# Chats allowed to wait for a slot, and for how long (seconds), before a 429.
+CHAT_QUEUE_MAX: int = int(os.getenv("CHAT_QUEUE_MAX", "200"))
+CHAT_QUEUE_TIMEOUT: float = float(os.getenv("CHAT_QUEUE_TIMEOUT", "20"))
+# Per-client token bucket on the chat endpoints (requests/second, burst); 0 disables.
+# Chats with a session_id get their own bucket; the rest share one per address,
+# which may be a NAT or office egress for many users, hence the headroom.
+CLIENT_RATE: float = float(os.getenv("CLIENT_RATE", "5"))
+CLIENT_BURST: float = float(os.getenv("CLIENT_BURST", "30"))
+# Comma-separated IPs/CIDRs of reverse proxies whose X-Forwarded-For is honored.
+TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "")
+# /chat/batch: items in flight per batch, and the largest batch accepted (never
+# more than CLIENT_BURST while rate limiting is on: each item costs a token).
+BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+# Exact-match LLM response cache; set RESPONSE_CACHE_PATH to a SQLite file to persist it.
+RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+RESPONSE_CACHE_PATH: str = os.getenv("RESPONSE_CACHE_PATH", "")
+# Local pre-classifier: above this confidence, on feedback with at least
+# FAST_CLASSIFIER_MIN_WORDS non-stop words, the LLM classifier call is skipped.
+FAST_CLASSIFIER_PATH: str = os.getenv(
+    "FAST_CLASSIFIER_PATH", "src/utils/fast_classifier.json"
+)
+FAST_CLASSIFIER_THRESHOLD: float = float(os.getenv("FAST_CLASSIFIER_THRESHOLD", "0.8"))
+FAST_CLASSIFIER_MIN_WORDS: int = int(os.getenv("FAST_CLASSIFIER_MIN_WORDS", "3"))
+# "structured": forced tool call returning a validated FixCategory; "markdown": free text.
+CLASSIFIER_MODE: str = os.getenv("CLASSIFIER_MODE", "structured")
+CLASSIFIER_MAX_TOKENS: int = int(os.getenv("CLASSIFIER_MAX_TOKENS", "256"))
+# Per-node models. A node moves to its fallback (none when empty) for
+# MODEL_FALLBACK_COOLDOWN seconds when, over its last MODEL_ROUTING_WINDOW calls,
+# the primary's p95 latency (seconds) or error rate crosses the threshold.
+CLASSIFIER_MODEL: str = os.getenv("CLASSIFIER_MODEL", "claude-3-5-haiku-20241022")
+CLASSIFIER_FALLBACK_MODEL: str = os.getenv(
+    "CLASSIFIER_FALLBACK_MODEL", "claude-sonnet-4-20250514"
+)
+CLASSIFIER_MAX_P95: float = float(os.getenv("CLASSIFIER_MAX_P95", "5"))
+FIXER_MODEL: str = os.getenv("FIXER_MODEL", "claude-sonnet-4-20250514")
+FIXER_FALLBACK_MODEL: str = os.getenv(
+    "FIXER_FALLBACK_MODEL", "claude-3-7-sonnet-20250219"
+)
+FIXER_MAX_P95: float = float(os.getenv("FIXER_MAX_P95", "60"))
+MODEL_MAX_ERROR_RATE: float = float(os.getenv("MODEL_MAX_ERROR_RATE", "0.25"))
+MODEL_ROUTING_WINDOW: int = int(os.getenv("MODEL_ROUTING_WINDOW", "20"))
+MODEL_FALLBACK_COOLDOWN: float = float(os.getenv("MODEL_FALLBACK_COOLDOWN", "60"))
+# LLM call deadlines per node (seconds, all retries included), retries with
+# jittered exponential backoff, optional hedging past the node's p95 latency,
+# and a per-model circuit breaker (consecutive failures, seconds open).
+CLASSIFIER_TIMEOUT: float = float(os.getenv("CLASSIFIER_TIMEOUT", "10"))
+FIXER_TIMEOUT: float = float(os.getenv("FIXER_TIMEOUT", "45"))
+LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX: float = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_HEDGE: bool = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_QUANTILE: float = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+CIRCUIT_FAILURES: int = int(os.getenv("CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET: float = float(os.getenv("CIRCUIT_RESET", "30"))
+# Server-side chat sessions; set SESSION_PATH to a SQLite file to persist them.
+SESSION_MAX: int = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_TTL: float = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_PATH: str = os.getenv("SESSION_PATH", "")
+# Where --workers keeps sessions when SESSION_PATH is unset: one file per port, so
+# they survive restarts and instances on one host never share them.
+STATE_DIR: str = os.getenv(
+    "STATE_DIR", os.path.join(os.path.expanduser("~"), ".management-api")
+)
+# Prior-turn tokens sent to the LLM; older turns are folded into a summary.
+SESSION_HISTORY_TOKENS: int = int(os.getenv("SESSION_HISTORY_TOKENS", "2000"))
+# Vulnerable code sent to the LLM is trimmed to this many tokens around the flagged lines.
+PROMPT_CODE_TOKENS: int = int(os.getenv("PROMPT_CODE_TOKENS", "800"))
+# SQLite file written by precompute_fixes.py; when set, first-turn requests for a
+# known (vulnerability, category) pair are answered from it without the fixer LLM.
+PRECOMPUTED_FIXES_PATH: str = os.getenv("PRECOMPUTED_FIXES_PATH", "")
+# Only feedback of at most this many words, with no specific instruction, gets one.
+PRECOMPUTED_MAX_WORDS: int = int(os.getenv("PRECOMPUTED_MAX_WORDS", "12"))
 SYS_PROMPTS: Dict[str, str] = load_system_message()
-vulnerabilities: Dict[str, List[Vulnerability]] = fetch_csv_data()
+# The CSV, or a memory-mapped catalog file built from it by build_catalog.py.
+CATALOG_PATH: str = os.getenv("CATALOG_PATH", "src/utils/data.csv")
+# Seconds between catalog mtime checks; 0 disables hot reload.
+CATALOG_RELOAD_INTERVAL: float = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+# uvicorn worker processes; with more than one, a CSV catalog is first built
+# into CATALOG_FILE_PATH so all workers map one shared copy.
+WORKERS: int = int(os.getenv("WORKERS", "1"))
+# Empty: a temporary directory private to each server run, so several
+# instances on one host never share (or clobber) each other's files.
+CATALOG_FILE_PATH: str = os.getenv("CATALOG_FILE_PATH", "")
+# A reload with fewer than this share of the current rows is rejected as truncated.
+CATALOG_MIN_RELOAD_RATIO: float = float(os.getenv("CATALOG_MIN_RELOAD_RATIO", "0.5"))
+catalog = CatalogLoader(
+    CATALOG_PATH,
+    load_vulnerability_store,
+    CATALOG_RELOAD_INTERVAL,
+    CATALOG_MIN_RELOAD_RATIO,
+)
+
+
+def get_vulnerability_store() -> VulnerabilityStore:
+    """Current catalog; loaded on first use and swapped atomically on reload."""
+    return catalog.get()
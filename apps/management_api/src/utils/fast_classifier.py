@@ -0,0 +1,287 @@
+"""Local fast-path feedback classifier.
+
+A TF-IDF (word 1-2 grams + character 3-5 grams) softmax regression trained
+from the category descriptions in ``feedback_schemas.py``. When it is
+confident and the feedback has enough informative words to go on, the
+orchestrator skips the LLM classifier entirely.
+
+The weights are not checked in; the image build trains them (see the
+dockerfile). Usage (from ``apps/management_api``)::
+
+    python -m src.utils.fast_classifier train
+    python -m src.utils.fast_classifier evaluate
+
+``evaluate`` cross-validates on the description phrases, which only checks
+that the model fits its own training data. Accuracy on real, held-out
+feedback comes from ``python -m benchmarks.run_benchmark fast``.
+"""
+
+import re
+import json
+import math
+import time
+import random
+import argparse
+import statistics
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.utils.pymodels import FixCategory
+from src.utils.feedback_schemas import FEEDBACK_FUNCTION_SCHEMAS
+
+Example = Tuple[str, str]
+
+_WORD = re.compile(r"[a-z0-9_']+")
+_DESCRIPTION_PREFIX = re.compile(
+    r"^use this function (when|for) (user )?feedback (indicates|suggests|mentions|"
+    r"points to|contains|shows|says|is)?\s*(the fix)?\s*",
+    re.IGNORECASE,
+)
+
+# Words that say nothing about what is wrong with a fix. Feedback made of
+# little else ("fix it", "try again") is left to the LLM classifier.
+STOP_WORDS = frozenset(
+    "a an and are as at be but by can could do does for from have i if in is it "
+    "its me my no not of on or please so that the this to was we what with you "
+    "your".split()
+)
+
+# feedback_unclear has no tool schema (it is the classifier's fallback), so it
+# gets a handful of hand-written examples instead.
+EXTRA_EXAMPLES: List[Example] = [
+    ("not sure", "feedback_unclear"),
+    ("hmm", "feedback_unclear"),
+    ("fix it", "feedback_unclear"),
+    ("???", "feedback_unclear"),
+    ("something is off", "feedback_unclear"),
+    ("can you look again", "feedback_unclear"),
+    ("i don't know what is wrong", "feedback_unclear"),
+    ("unclear feedback, vague, ambiguous", "feedback_unclear"),
+]
+
+
+def training_examples() -> List[Example]:
+    """Split every category description and keyword list into labeled phrases."""
+    examples: List[Example] = []
+    for schema in FEEDBACK_FUNCTION_SCHEMAS:
+        label = schema["name"]
+        description, _, keywords = schema["description"].partition("Keywords:")
+        examples.append((description, label))
+        phrases = _DESCRIPTION_PREFIX.sub("", description).split(",")
+        phrases += keywords.split(",")
+        examples.extend(
+            (phrase.strip(" .").replace(" or ", " "), label)
+            for phrase in phrases
+            if phrase.strip(" .")
+        )
+    return examples + EXTRA_EXAMPLES
+
+
+def informative_words(text: str) -> int:
+    """Number of words in ``text`` that are not stop words."""
+    return sum(1 for word in _WORD.findall(text.lower()) if word not in STOP_WORDS)
+
+
+def featurize(text: str) -> Counter:
+    """Word uni/bi-grams plus character 3-5 grams inside word boundaries."""
+    words = _WORD.findall(text.lower())
+    features: Counter = Counter(f"w:{w}" for w in words)
+    features.update(f"w:{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        for n in (3, 4, 5):
+            features.update(
+                f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)
+            )
+    return features
+
+
+class FastFeedbackClassifier:
+    """Multinomial logistic regression over sparse TF-IDF features."""
+
+    def __init__(
+        self,
+        classes: List[str],
+        idf: Dict[str, float],
+        weights: Dict[str, List[float]],
+        bias: List[float],
+    ):
+        self.classes = classes
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    # --------- inference ---------
+
+    def vectorize(self, text: str) -> Dict[str, float]:
+        """Sublinear, L2-normalized TF-IDF vector (unknown features dropped)."""
+        vector = {
+            f: (1 + math.log(count)) * self.idf[f]
+            for f, count in featurize(text).items()
+            if f in self.idf
+        }
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {f: v / norm for f, v in vector.items()}
+
+    def predict_proba(self, text: str) -> List[float]:
+        """Class probabilities for ``text``, aligned with ``self.classes``."""
+        return self._scores_to_probs(self.vectorize(text))
+
+    def predict(self, text: str) -> Tuple[FixCategory, float]:
+        """Most likely category and its probability."""
+        probs = self.predict_proba(text)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return FixCategory(self.classes[best]), probs[best]
+
+    def classify(
+        self, text: str, threshold: float, min_words: int
+    ) -> Optional[Tuple[FixCategory, float]]:
+        """The prediction when it may replace the LLM classifier, else None.
+
+        Short, vague feedback is never trusted, however confident the model is.
+        """
+        if informative_words(text) < min_words:
+            return None
+        category, confidence = self.predict(text)
+        return (category, confidence) if confidence >= threshold else None
+
+    # --------- training ---------
+
+    @classmethod
+    def train(
+        cls,
+        examples: Sequence[Example],
+        epochs: int = 60,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        seed: int = 13,
+    ) -> "FastFeedbackClassifier":
+        """Fit with plain SGD on the softmax cross-entropy loss."""
+        classes = sorted({label for _, label in examples})
+        index = {label: i for i, label in enumerate(classes)}
+
+        document_frequency: Counter = Counter()
+        for text, _ in examples:
+            document_frequency.update(set(featurize(text)))
+        n_docs = len(examples)
+        idf = {
+            f: math.log((1 + n_docs) / (1 + df)) + 1
+            for f, df in document_frequency.items()
+        }
+
+        n_classes = len(classes)
+        weights = defaultdict(lambda: [0.0] * n_classes)
+        model = cls(classes, idf, weights, [0.0] * n_classes)
+        data = [(model.vectorize(text), index[label]) for text, label in examples]
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for vector, target in data:
+                probs = model._scores_to_probs(vector)
+                for k, p in enumerate(probs):
+                    gradient = p - (1.0 if k == target else 0.0)
+                    if abs(gradient) < 1e-4:
+                        continue
+                    model.bias[k] -= rate * gradient
+                    for feature, value in vector.items():
+                        row = model.weights[feature]
+                        row[k] -= rate * (gradient * value + l2 * row[k])
+
+        # Features whose weights all round away carry no signal; drop them.
+        model.weights = {
+            f: [round(w, 3) for w in row]
+            for f, row in model.weights.items()
+            if max(abs(w) for w in row) >= 1e-2
+        }
+        model.idf = {f: round(v, 4) for f, v in idf.items() if f in model.weights}
+        return model
+
+    def _scores_to_probs(self, vector: Dict[str, float]) -> List[float]:
+        scores = list(self.bias)
+        for feature, value in vector.items():
+            row = self.weights.get(feature)
+            if row is not None:
+                scores = [s + w * value for s, w in zip(scores, row)]
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    # --------- persistence ---------
+
+    def save(self, path: str) -> None:
+        """Write the model as compact JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "classes": self.classes,
+                    "bias": [round(b, 4) for b in self.bias],
+                    "idf": self.idf,
+                    "weights": self.weights,
+                },
+                file,
+                separators=(",", ":"),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FastFeedbackClassifier"]:
+        """Load a saved model, or return None when the artifact is missing."""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        return cls(data["classes"], data["idf"], data["weights"], data["bias"])
+
+
+# ---------- CLI ----------
+
+
+def evaluate(examples: Sequence[Example], folds: int = 5, seed: int = 13) -> None:
+    """K-fold report on the training phrases per confidence threshold, plus latency."""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    predictions: List[Tuple[bool, float]] = []
+    latencies: List[float] = []
+
+    for fold in range(folds):
+        test = shuffled[fold::folds]
+        train = [e for i, e in enumerate(shuffled) if i % folds != fold]
+        model = FastFeedbackClassifier.train(train)
+        for text, label in test:
+            start = time.perf_counter()
+            category, confidence = model.predict(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            predictions.append((category.value == label, confidence))
+
+    print(f"{len(predictions)} training phrases, {folds} folds")
+    print(f"{'threshold':>9}  {'coverage':>8}  {'accuracy':>8}")
+    for threshold in (0.0, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9):
+        kept = [ok for ok, conf in predictions if conf >= threshold]
+        accuracy = sum(kept) / len(kept) if kept else float("nan")
+        print(f"{threshold:>9.1f}  {len(kept) / len(predictions):>8.1%}  {accuracy:>8.1%}")
+    latencies.sort()
+    print(
+        f"latency per prediction: p50={statistics.median(latencies):.3f} ms "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1]:.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the fast classifier.")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--out", default="src/utils/fast_classifier.json")
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    examples = training_examples()
+    if args.command == "train":
+        FastFeedbackClassifier.train(examples).save(args.out)
+        print(f"Trained on {len(examples)} examples -> {args.out}")
+    else:
+        evaluate(examples, folds=args.folds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""LangChain callbacks feeding ``src.utils.metrics``.
+
+Kept apart from the metrics module so serving ``/metrics`` does not import
+LangChain.
+"""
+
+import time
+from typing import Any
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.runnables import RunnableConfig, ensure_config
+from src.utils.metrics import LLM_TIME_TO_FIRST_TOKEN
+
+
+class FirstTokenTimer(BaseCallbackHandler):
+    """Observes time-to-first-token of one LLM call.
+
+    Only streamed calls produce token callbacks, so TTFT is recorded for
+    ``/chat/stream`` (and any other graph ``astream``) but not for plain
+    ``ainvoke`` calls, which are not switched to streaming just to time them.
+    """
+
+    run_inline = True
+
+    def __init__(self, node: str):
+        self.node = node
+        self.start = time.perf_counter()
+        self.seen = False
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token and not self.seen:
+            self.seen = True
+            LLM_TIME_TO_FIRST_TOKEN.labels(node=self.node).observe(
+                time.perf_counter() - self.start
+            )
+
+
+def with_first_token_timer(timer: FirstTokenTimer) -> RunnableConfig:
+    """The current runnable config plus ``timer``.
+
+    The inherited callbacks are kept: passing ``callbacks`` alone would
+    replace the graph's handlers and break token streaming. ``timer.seen``
+    tells the caller whether the call has streamed any output yet.
+    """
+    config = ensure_config()
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.copy()
+        callbacks.add_handler(timer, inherit=False)
+    else:
+        callbacks = list(callbacks or []) + [timer]
+    return {**config, "callbacks": callbacks}
@@ -0,0 +1,201 @@
+"""Prometheus metrics for the API, backed by ``prometheus_client``.
+
+Application metrics plus an ASGI middleware that records per-route request
+latency and in-flight requests. With several uvicorn workers, every worker
+writes its samples to ``PROMETHEUS_MULTIPROC_DIR`` (set by ``main.py
+--workers``) and ``/metrics`` aggregates them, so a scrape covers all
+workers whichever one answers it.
+"""
+
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+
+def multiprocess_dir() -> str:
+    """Where workers share samples, or "" in single-process mode."""
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+
+def render_metrics() -> bytes:
+    """Every metric in the Prometheus text format, summed across workers."""
+    if not multiprocess_dir():
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges (in-flight, queue depth) on shutdown."""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+# ---------- Application metrics ----------
+
+
+NODE_DURATION = Histogram(
+    "chat_node_duration_seconds",
+    "Wall time of one orchestrator graph node run.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "chat_llm_time_to_first_token_seconds",
+    "Time from sending a streamed LLM request to receiving its first output token.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    "chat_llm_request_duration_seconds",
+    "Wall time of one LLM call, by node and serving model.",
+    ["node", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUESTS = Counter(
+    "chat_llm_requests",
+    "LLM calls by node, serving model and outcome (ok, error, timeout, rejected).",
+    ["node", "model", "outcome"],
+)
+LLM_RETRIES = Counter(
+    "chat_llm_retries",
+    "LLM call attempts retried after a transient upstream failure.",
+    ["node"],
+)
+LLM_HEDGES = Counter(
+    "chat_llm_hedges",
+    "Duplicate LLM requests sent because an attempt ran past the node's p95.",
+    ["node"],
+)
+CIRCUIT_OPEN = Gauge(
+    "chat_llm_circuit_open",
+    "1 while the model's circuit breaker rejects calls (in any worker).",
+    ["model"],
+    multiprocess_mode="max",
+)
+MODEL_FALLBACK_ACTIVE = Gauge(
+    "chat_model_fallback_active",
+    "1 while the node is routed to its fallback model (in any worker).",
+    ["node"],
+    multiprocess_mode="max",
+)
+LLM_TOKENS = Counter(
+    "chat_llm_tokens",
+    "Tokens reported by the provider; kind is input, output, cache_read or cache_creation.",
+    ["node", "kind"],
+)
+LLM_RESPONSE_CACHE = Counter(
+    "chat_llm_response_cache",
+    "Response cache lookups by result (hit, miss, bypass).",
+    ["node", "result"],
+)
+PRECOMPUTED_FIXES = Counter(
+    "chat_precomputed_fixes",
+    "Fixer lookups in the precomputed fix store by result (hit, miss, specific).",
+    ["result"],
+)
+CLASSIFIER_PATH = Counter(
+    "chat_classifier_path",
+    "Requests classified by the local fast path or by the LLM.",
+    ["path"],
+)
+CHAT_ADMISSION = Counter(
+    "chat_admission",
+    "Chat admission decisions (admitted, queue_full, queue_timeout, rate_limited).",
+    ["result"],
+)
+CHAT_QUEUE_DEPTH = Gauge(
+    "chat_queue_depth",
+    "Chat requests waiting for a free slot.",
+    multiprocess_mode="livesum",
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "single_flight_shared",
+    "Callers served by another caller's identical in-flight execution.",
+    ["name"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the last response byte, by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served, by route template.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+
+def record_token_usage(node: str, usage: dict) -> None:
+    """Count the provider-reported tokens of one LLM call."""
+    details = usage.get("input_token_details") or {}
+    for kind, value in (
+        ("input", usage.get("input_tokens")),
+        ("output", usage.get("output_tokens")),
+        ("cache_read", details.get("cache_read")),
+        ("cache_creation", details.get("cache_creation")),
+    ):
+        if value:
+            LLM_TOKENS.labels(node=node, kind=kind).inc(value)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request under its route template.
+
+    Streaming responses are timed until their final body chunk, so
+    ``/chat/stream`` reports the full generation time, not time-to-headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope) -> str:
+        # Imported lazily so this module stays usable without Starlette.
+        from starlette.routing import Match
+
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], self._route(scope)
+        status = "500"
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method=method, route=route)
+        in_flight.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(
+                method=method, route=route, status=status
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,190 @@
+import re
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from langchain_core.runnables import Runnable
+from src.utils.pymodels import ChatRequest, FixCategory, Vulnerability
+from src.utils.vulnerability_store import VulnerabilityStore
+from src.utils.common import PROMPT_CODE_TOKENS, SYS_PROMPTS, logger, log_token_usage
+from src.agent_prompt.code_fix_agent import get_fix_user_prompt
+
+# Stands in for the user's wording when fixes are generated ahead of time.
+PRECOMPUTE_USER_INPUT = "Please provide a corrected fix for this finding."
+
+
+# Words that ask for a (better) fix without saying anything about how.
+GENERIC_WORDS = frozenset(
+    """
+    a an the this that it its is isnt isn't isn’t was not no does doesnt doesn't
+    doesn’t do dont don't don’t did didnt didn't didn’t work works working
+    wrong bad broken still fix fixed fixes fixing please pls can could you
+    give me provide
+    another different new better correct corrected proper again try one
+    answer solution suggestion suggested code version approach
+    """.split()
+)
+_WORDS = re.compile(r"[a-z]+(?:['’][a-z]+)?")
+# Code, identifiers, paths or numbers: something specific the fix must honor.
+_SPECIFIC = re.compile(r"[`(){}\[\]<>=/\\0-9_]|\w\.\w")
+
+
+def is_generic_feedback(
+    user_input: str, category: FixCategory, max_words: int = 12
+) -> bool:
+    """Whether ``user_input`` asks for nothing a canned fix for ``category`` lacks.
+
+    A precomputed fix answers "Please provide a corrected fix" for the
+    classified category, so it only fits short feedback whose words are
+    generic or name that category ("the logic is wrong" for
+    ``incorrect_logic``). Anything more specific ("check the role before
+    delete_user()") needs the fixer to read it.
+    """
+    if _SPECIFIC.search(user_input):
+        return False
+    words = _WORDS.findall(user_input.casefold())
+    allowed = GENERIC_WORDS | set(category.value.split("_"))
+    return 0 < len(words) <= max_words and all(w in allowed for w in words)
+
+
+def make_fix_version(catalog_version: str, model: str) -> str:
+    """Version of the precomputed fixes for one catalog, fixer prompt and model.
+
+    Editing data.csv (a new catalog version), fix_agent.md or the prompt
+    budget changes the version, so older entries stop matching on their own.
+    """
+    payload = "\0".join(
+        (
+            catalog_version,
+            SYS_PROMPTS["fix_agent"],
+            PRECOMPUTE_USER_INPUT,
+            str(PROMPT_CODE_TOKENS),
+            model,
+        )
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class PrecomputedFixes:
+    """Fixer replies generated offline for every (vulnerability, category) pair.
+
+    A SQLite table keyed by ``(version, vulnerability_id, category)``; see
+    ``make_fix_version`` for what the version covers. Entries of other
+    versions are never served and ``prune`` deletes them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fixes (version TEXT NOT NULL, "
+            "vulnerability_id TEXT NOT NULL, category TEXT NOT NULL, "
+            "created REAL NOT NULL, response TEXT NOT NULL, "
+            "PRIMARY KEY (version, vulnerability_id, category))"
+        )
+        self._db.commit()
+
+    def get(
+        self, version: str, vulnerability_id: str, category: FixCategory
+    ) -> Optional[str]:
+        """The stored fix for one pair, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response FROM fixes "
+                "WHERE version = ? AND vulnerability_id = ? AND category = ?",
+                (version, vulnerability_id, category.value),
+            ).fetchone()
+        return row[0] if row else None
+
+    async def aget(
+        self, version: str, vulnerability_id: str, category: FixCategory
+    ) -> Optional[str]:
+        """``get`` off the event loop."""
+        return await asyncio.to_thread(self.get, version, vulnerability_id, category)
+
+    def set(
+        self, version: str, vulnerability_id: str, category: FixCategory, response: str
+    ) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fixes "
+                "(version, vulnerability_id, category, created, response) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (version, vulnerability_id, category.value, time.time(), response),
+            )
+            self._db.commit()
+
+    def keys(self, version: str) -> Set[Tuple[str, str]]:
+        """``(vulnerability_id, category)`` pairs already stored for ``version``."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT vulnerability_id, category FROM fixes WHERE version = ?",
+                (version,),
+            ).fetchall()
+        return {(vuln_id, category) for vuln_id, category in rows}
+
+    def prune(self, version: str) -> int:
+        """Delete the entries of every other version; returns how many were removed."""
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM fixes WHERE version != ?", (version,)
+            ).rowcount
+            self._db.commit()
+        return removed
+
+
+async def precompute_fixes(
+    llm: Runnable,
+    store: VulnerabilityStore,
+    fixes: PrecomputedFixes,
+    version: str,
+    categories: Iterable[FixCategory] = tuple(FixCategory),
+    concurrency: int = 8,
+) -> Dict[str, int]:
+    """Run the fixer prompt for every missing (vulnerability, category) pair.
+
+    At most ``concurrency`` LLM calls are in flight. Pairs already stored
+    for ``version`` are skipped, so an interrupted run resumes where it
+    stopped; failed pairs are logged and left for the next run.
+    """
+    done = fixes.keys(version)
+    # The fixer never runs for findings without a codebase or title.
+    invalid = {None, "", "n/a"}
+    jobs: List[Tuple[str, Vulnerability, FixCategory]] = [
+        (codebase, vuln, category)
+        for codebase, vulns in store.by_codebase.items()
+        if codebase not in invalid
+        for vuln in vulns
+        if vuln.title not in invalid
+        for category in categories
+        if (vuln.id, category.value) not in done
+    ]
+    counts = {"skipped": len(done), "stored": 0, "failed": 0}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(codebase: str, vuln: Vulnerability, category: FixCategory) -> None:
+        request = ChatRequest(
+            user_input=PRECOMPUTE_USER_INPUT, codebase=codebase, title=vuln.title
+        )
+        prompt = get_fix_user_prompt(category.value, request, vuln)
+        async with limit:
+            try:
+                output = await llm.ainvoke([prompt])
+            except Exception as e:
+                logger.error(
+                    "Precompute failed for %s/%s: %s", vuln.id, category.value, e
+                )
+                counts["failed"] += 1
+                return
+        log_token_usage(output)
+        fixes.set(version, vuln.id, category, output.text())
+        counts["stored"] += 1
+        if counts["stored"] % 50 == 0:
+            logger.info("Precomputed %s/%s fixes", counts["stored"], len(jobs))
+
+    logger.info("Precomputing %s fixes (%s already stored)", len(jobs), len(done))
+    await asyncio.gather(*(run(*job) for job in jobs))
+    return counts
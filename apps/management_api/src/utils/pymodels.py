@@ -1,6 +1,6 @@
 from enum import Enum
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 
 
 class Sender(str, Enum):
@@ -44,6 +44,7 @@ class Vulnerability(BaseModel):
     category: Optional[str] = ""
     fix_code: Optional[str] = ""
     notes: Optional[str] = ""
+    id: str = ""
 
 
 class ChatMessage(BaseModel):
@@ -54,15 +55,60 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    """Incoming user message."""
+    """Incoming user message.
 
-    memory: List[ChatMessage]
+    With ``session_id`` the server keeps the conversation and ``memory`` can
+    be left empty; ``memory`` is still honored for clients without sessions.
+    """
+
+    memory: List[ChatMessage] = []
     user_input: str
-    codebase: str
-    title: str
+    session_id: Optional[str] = Field(default=None, max_length=128)
+    codebase: str = ""
+    title: str = ""
+    vulnerability_id: Optional[str] = None
+    bypass_cache: bool = False
 
 
 class ChatResponse(BaseModel):
     """Bot response with updated memory."""
 
     response: str
+    session_id: Optional[str] = None
+    # Which model (or "local"/"precomputed") answered each graph node.
+    models: Dict[str, str] = {}
+
+
+class ChatSession(BaseModel):
+    """Server-side conversation: recent turns verbatim, older ones summarized."""
+
+    id: str = ""
+    summary: str = ""
+    turns: List[ChatMessage] = []
+    updated: float = 0.0
+
+
+class BatchChatRequest(BaseModel):
+    """Many chat requests processed together."""
+
+    items: List[ChatRequest] = Field(min_length=1)
+    concurrency: Optional[int] = Field(default=None, ge=1)
+
+
+class BatchChatResult(BaseModel):
+    """Outcome of one batch item; exactly one of response/error is set."""
+
+    index: int
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+
+class Classification(BaseModel):
+    """Structured classifier verdict (the classifier's forced tool call)."""
+
+    category: FixCategory = Field(
+        description="The single most appropriate class_category for the feedback."
+    )
+    reason: str = Field(
+        description="One short sentence tying the category to evidence in the code or feedback."
+    )
@@ -0,0 +1,266 @@
+"""Deadlines, retries, hedged requests and circuit breaking for LLM calls.
+
+``ResilientCaller`` wraps one graph node's calls:
+
+- every call has a deadline covering all of its attempts;
+- transient failures (timeouts, connection errors, 408/409/429/5xx) are
+  retried with capped exponential backoff and full jitter;
+- optionally, when an attempt runs past the node's recent p95 latency, a
+  duplicate request is sent and whichever finishes first wins;
+- calls streamed to a client are never hedged, and not retried once they
+  have emitted output, so the client never sees two answers interleaved
+  or the start of an answer repeated;
+- a circuit breaker per model opens after consecutive transient failures
+  and rejects calls immediately until a trial call succeeds.
+"""
+
+import sys
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from src.utils.common import logger
+from src.utils.metrics import CIRCUIT_OPEN, LLM_HEDGES, LLM_RETRIES
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class UpstreamError(RuntimeError):
+    """A node's LLM call kept failing with transient errors until retries ran out."""
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The model's circuit is open; retry after ``retry_after`` seconds."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(
+            f"LLM upstream {model} is unavailable; retry in {retry_after:.0f}s"
+        )
+        self.model = model
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(TimeoutError):
+    """A node's LLM call (all attempts included) ran past its deadline."""
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether ``exc`` is an upstream failure worth retrying."""
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # Not imported here: if the SDK was never loaded, exc cannot be one of its errors.
+    anthropic = sys.modules.get("anthropic")
+    if anthropic is not None and isinstance(exc, anthropic.APIConnectionError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status in RETRYABLE_STATUS or status >= 500)
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive transient failures.
+
+    While open, calls are rejected for ``reset_timeout`` seconds; then a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        CIRCUIT_OPEN.labels(model=name).set(0)
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> None:
+        """Raise ``UpstreamUnavailable`` unless a call may go through now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return
+            elapsed = time.monotonic() - self._opened_at
+            raise UpstreamUnavailable(self.name, max(1.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit for %s closed", self.name)
+            self._failures, self._opened_at, self._trial = 0, None, False
+            CIRCUIT_OPEN.labels(model=self.name).set(0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial:
+                    logger.warning(
+                        "Circuit for %s open after %s failures",
+                        self.name,
+                        self._failures,
+                    )
+                self._opened_at, self._trial = time.monotonic(), False
+                CIRCUIT_OPEN.labels(model=self.name).set(1)
+
+    def release(self) -> None:
+        """End a trial call that neither proved nor disproved the upstream."""
+        with self._lock:
+            self._trial = False
+
+
+class ResilientCaller:
+    """Deadline, retries, hedging and per-model circuit breakers for one node."""
+
+    def __init__(
+        self,
+        node: str,
+        timeout: float,
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ):
+        self.node = node
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Deque[float] = deque(maxlen=200)
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(
+                model, self.breaker_threshold, self.breaker_reset
+            )
+        return self._breakers[model]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a duplicate request is sent, if hedging applies."""
+        if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_quantile))
+        return latencies[index]
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (from 0)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def call(
+        self,
+        model: str,
+        make_call: Callable[[], Awaitable[T]],
+        emitted: Optional[Callable[[], bool]] = None,
+    ) -> T:
+        """Run ``make_call`` against ``model`` under this node's policy.
+
+        ``emitted`` marks a call whose tokens are streamed to a client and
+        reports whether any have been sent yet; see the module docstring.
+        """
+        breaker = self.breaker(model)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        for attempt in range(self.retries + 1):
+            breaker.before_call()
+            start = loop.time()
+            scope = asyncio.timeout_at(deadline)
+            try:
+                async with scope:
+                    if emitted is None:
+                        result = await self._hedged(make_call)
+                    else:
+                        result = await make_call()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                if scope.expired():
+                    breaker.record_failure()
+                    raise DeadlineExceeded(
+                        f"{self.node} call to {model} exceeded its "
+                        f"{self.timeout:g}s deadline"
+                    ) from None
+                if not is_transient(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                delay = self.backoff(attempt)
+                if (
+                    attempt == self.retries
+                    or loop.time() + delay >= deadline
+                    or (emitted is not None and emitted())
+                ):
+                    raise UpstreamError(
+                        f"{self.node} call to {model} failed after "
+                        f"{attempt + 1} attempts: {e}"
+                    ) from e
+                logger.warning(
+                    "%s call to %s failed (%s); retry %s in %.2fs",
+                    self.node,
+                    model,
+                    e,
+                    attempt + 1,
+                    delay,
+                )
+                LLM_RETRIES.labels(node=self.node).inc()
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            self._latencies.append(loop.time() - start)
+            return result
+        raise AssertionError("unreachable")
+
+    async def _hedged(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await make_call()
+
+        first = asyncio.ensure_future(make_call())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                LLM_HEDGES.labels(node=self.node).inc()
+                tasks.add(asyncio.ensure_future(make_call()))
+            error: Optional[BaseException] = None
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,88 @@
+import time
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+from src.utils.common import logger
+from src.utils.metrics import MODEL_FALLBACK_ACTIVE
+
+
+class ModelRoute:
+    """Primary model for one graph node, switched to a fallback when it degrades.
+
+    Over the primary's last ``window`` calls, an error rate above
+    ``max_error_rate`` or a p95 latency above ``max_p95`` (seconds; 0
+    disables either check) moves the node to the fallback for ``cooldown``
+    seconds. The primary then gets a fresh window. Without a fallback the
+    route always serves the primary.
+    """
+
+    def __init__(
+        self,
+        node: str,
+        primary: str,
+        fallback: Optional[str] = None,
+        max_p95: float = 0.0,
+        max_error_rate: float = 0.0,
+        window: int = 20,
+        cooldown: float = 60.0,
+        min_samples: int = 5,
+    ):
+        self.node = node
+        self.primary = primary
+        self.fallback = fallback
+        self.max_p95 = max_p95
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.min_samples = min(min_samples, window)
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._fallback_until = 0.0
+        MODEL_FALLBACK_ACTIVE.labels(node=node).set(0)
+
+    @property
+    def on_fallback(self) -> bool:
+        return self.fallback is not None and time.monotonic() < self._fallback_until
+
+    def select(self) -> str:
+        """Name of the model that should serve the next call."""
+        return self.fallback if self.on_fallback else self.primary
+
+    def observe(self, model: str, latency: float, ok: bool) -> None:
+        """Record one call; only the primary's calls drive the switch."""
+        if model != self.primary or self.fallback is None:
+            return
+        with self._lock:
+            if self.on_fallback:
+                return
+            if self._fallback_until:
+                # Cooldown over: judge the primary on fresh calls only.
+                self._fallback_until = 0.0
+                self._samples.clear()
+                MODEL_FALLBACK_ACTIVE.labels(node=self.node).set(0)
+                logger.info("%s: back on %s", self.node, self.primary)
+            self._samples.append((latency, ok))
+            reason = self._degraded()
+            if reason:
+                self._fallback_until = time.monotonic() + self.cooldown
+                MODEL_FALLBACK_ACTIVE.labels(node=self.node).set(1)
+                logger.warning(
+                    "%s: %s on %s; using %s for %.0fs",
+                    self.node,
+                    reason,
+                    self.primary,
+                    self.fallback,
+                    self.cooldown,
+                )
+
+    def _degraded(self) -> Optional[str]:
+        if len(self._samples) < self.min_samples:
+            return None
+        errors = sum(not ok for _, ok in self._samples) / len(self._samples)
+        if self.max_error_rate and errors > self.max_error_rate:
+            return f"error rate {errors:.0%}"
+        latencies = sorted(latency for latency, ok in self._samples if ok)
+        if self.max_p95 and latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            if p95 > self.max_p95:
+                return f"p95 latency {p95:.1f}s"
+        return None
@@ -0,0 +1,196 @@
+import re
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from src.utils.pymodels import ChatMessage, ChatRequest, ChatSession, Sender
+from src.utils.common import estimate_tokens
+
+_CODE_BLOCK = re.compile(r"```.*?(```|$)", re.DOTALL)
+SUMMARY_LINE_CHARS = 200
+
+
+def summarize_message(message: ChatMessage) -> str:
+    """One extractive summary line: code blocks dropped, whitespace collapsed, truncated."""
+    text = " ".join(_CODE_BLOCK.sub(" [code] ", message.message).split())
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[: SUMMARY_LINE_CHARS - 1] + "…"
+    return f"- {message.sender.value}: {text}"
+
+
+def compact(session: ChatSession, budget: int) -> ChatSession:
+    """Fold the oldest turns into the summary until the turns fit ``budget`` tokens.
+
+    The newest turn is always kept verbatim; the summary itself is capped at a
+    quarter of the budget by dropping its oldest lines.
+    """
+    turns = list(session.turns)
+    summary = session.summary.splitlines() if session.summary else []
+    used = sum(estimate_tokens(t.message) for t in turns)
+    while len(turns) > 1 and used > budget:
+        oldest = turns.pop(0)
+        used -= estimate_tokens(oldest.message)
+        summary.append(summarize_message(oldest))
+    while summary and estimate_tokens("\n".join(summary)) > budget // 4:
+        summary.pop(0)
+    return session.model_copy(update={"turns": turns, "summary": "\n".join(summary)})
+
+
+def render_history(session: ChatSession, budget: int) -> str:
+    """Prompt text for the prior conversation ("" when there is none)."""
+    parts = []
+    if session.summary:
+        parts.append(f"Summary of earlier turns:\n{session.summary}")
+    if session.turns:
+        limit = budget * 4
+        lines = []
+        for turn in session.turns:
+            text = turn.message
+            if len(text) > limit:
+                text = text[:limit] + " […]"
+            lines.append(f"{turn.sender.value}: {text}")
+        parts.append("Most recent turns:\n" + "\n\n".join(lines))
+    return "\n\n".join(parts)
+
+
+class SessionStore:
+    """Server-side conversation history keyed by session ID.
+
+    An in-memory LRU with TTL, optionally backed by a SQLite file so sessions
+    survive restarts and can be shared by workers. Sessions are compacted on
+    every write, so what is stored and what is sent to the LLM stay bounded
+    however long the conversation runs. ``ahistory``/``arecord`` run the
+    SQLite tier in a worker thread so it never blocks the event loop. Rows
+    past the TTL are deleted at startup and then at most every
+    ``prune_interval`` seconds of writes.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        ttl: float,
+        history_tokens: int,
+        path: Optional[str] = None,
+        prune_interval: float = 3600.0,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.history_tokens = history_tokens
+        self.prune_interval = prune_interval
+        self._pruned = 0.0
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(id TEXT PRIMARY KEY, updated REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._db.commit()
+            with self._lock:
+                self._prune(time.time())
+                self._db.commit()
+
+    def get(self, session_id: str) -> ChatSession:
+        """The stored session, or a new empty one for unknown or expired IDs."""
+        with self._lock:
+            session = self._load(session_id, time.time())
+        return session or ChatSession(id=session_id)
+
+    def history(self, request: ChatRequest) -> str:
+        """Token-budgeted prior conversation for ``request``.
+
+        Uses the server-side session when ``session_id`` is set, otherwise the
+        client-supplied ``memory`` (compacted the same way).
+        """
+        if request.session_id:
+            session = self.get(request.session_id)
+        elif request.memory:
+            session = compact(ChatSession(turns=request.memory), self.history_tokens)
+        else:
+            return ""
+        return render_history(session, self.history_tokens)
+
+    async def ahistory(self, request: ChatRequest) -> str:
+        """``history`` with the SQLite lookup off the event loop."""
+        if self._db is None or not request.session_id:
+            return self.history(request)
+        return await asyncio.to_thread(self.history, request)
+
+    def record(self, session_id: str, user_input: str, response: str) -> None:
+        """Append one exchange and compact the session.
+
+        The read, append and write happen under the lock and, with a SQLite
+        file, in one write transaction, so concurrent turns on a session
+        (from this process or another worker) are never lost.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                session = self._load(session_id, now) or ChatSession(id=session_id)
+                turns: List[ChatMessage] = session.turns + [
+                    ChatMessage(sender=Sender.USER, message=user_input),
+                    ChatMessage(sender=Sender.ASSISTANT, message=response),
+                ]
+                session = compact(
+                    session.model_copy(update={"turns": turns, "updated": now}),
+                    self.history_tokens,
+                )
+                self._remember(session)
+                if self._db is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sessions (id, updated, data) "
+                        "VALUES (?, ?, ?)",
+                        (session.id, session.updated, session.model_dump_json()),
+                    )
+                    if now - self._pruned >= self.prune_interval:
+                        self._prune(now)
+                    self._db.commit()
+            except BaseException:
+                if self._db is not None:
+                    self._db.rollback()
+                raise
+
+    async def arecord(self, session_id: str, user_input: str, response: str) -> None:
+        """``record`` with the SQLite write off the event loop."""
+        if self._db is None:
+            self.record(session_id, user_input, response)
+        else:
+            await asyncio.to_thread(self.record, session_id, user_input, response)
+
+    def _load(self, session_id: str, now: float) -> Optional[ChatSession]:
+        """The live session from memory, or a newer copy from SQLite (lock held)."""
+        session = self._sessions.get(session_id)
+        if session is not None and now - session.updated >= self.ttl:
+            self._sessions.pop(session_id)
+            session = None
+
+        if self._db is not None:
+            # Another worker sharing the file may have a newer copy.
+            since = now - self.ttl if session is None else session.updated
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE id = ? AND updated > ?",
+                (session_id, since),
+            ).fetchone()
+            if row:
+                session = ChatSession.model_validate_json(row[0])
+
+        if session is not None:
+            self._remember(session)
+        return session
+
+    def _prune(self, now: float) -> None:
+        """Delete expired rows (lock held; the caller commits)."""
+        self._db.execute("DELETE FROM sessions WHERE updated <= ?", (now - self.ttl,))
+        self._pruned = now
+
+    def _remember(self, session: ChatSession) -> None:
+        self._sessions[session.id] = session
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
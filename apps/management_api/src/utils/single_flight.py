@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from src.utils.metrics import SINGLE_FLIGHT_SHARED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Shares one in-flight execution among concurrent callers with the same key.
+
+    The first caller starts the work; callers arriving before it finishes
+    await the same task. The task is shielded, so a caller that disconnects
+    does not cancel the work the others are waiting for. Nothing is kept
+    after completion: later callers start a fresh execution.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            SINGLE_FLIGHT_SHARED.labels(name=self.name).inc()
+        return await asyncio.shield(task)
@@ -0,0 +1,214 @@
+import os
+import csv
+import json
+import time
+import logging
+import hashlib
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from src.utils.pymodels import ChatRequest, Vulnerability
+
+
+def normalize_title(title: str) -> str:
+    """Canonical form of a title for lookups (case and whitespace insensitive)."""
+    return " ".join(title.split()).casefold()
+
+
+def make_vulnerability_id(codebase: str, vuln: Vulnerability) -> str:
+    """Stable ID derived from the finding's content, so it survives CSV reordering."""
+    digest = hashlib.sha1(
+        "\0".join((codebase, vuln.title, vuln.code)).encode("utf-8")
+    ).hexdigest()
+    return digest[:12]
+
+
+def placeholder_title(record: Dict[str, str]) -> str:
+    """Title for an untitled row, derived from its content so it (and the ID
+    built from it) is the same on every load and in every worker."""
+    digest = hashlib.sha1(
+        "\0".join(
+            record.get(field, "")
+            for field in ("Codebase", "Vulnerable", "Fixed", "Category", "Notes")
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"Untitled finding {digest[:12]}"
+
+
+def iter_csv_vulnerabilities(file_path: str) -> Iterator[Tuple[str, Vulnerability]]:
+    """Stream ``(codebase, Vulnerability)`` pairs from the CSV one row at a time."""
+    with open(file_path, "r", encoding="utf-8", newline="") as file:
+        for record in csv.DictReader(file):
+            # Empty cells read as "n/a", as the previous pandas fillna did.
+            record = {k: v if v and v.strip() else "n/a" for k, v in record.items()}
+            title_value = record.get("Title", "").strip()
+            if not title_value:
+                title_value = placeholder_title(record)
+
+            vuln = Vulnerability(
+                code=record["Vulnerable"],
+                title=title_value,
+                category=record["Category"],
+                fix_code=record["Fixed"],
+                notes=record["Notes"],
+            )
+            vuln.id = make_vulnerability_id(record["Codebase"], vuln)
+            yield record["Codebase"], vuln
+
+
+def dump_json(value) -> bytes:
+    """Compact UTF-8 JSON encoding used for precomputed responses."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class VulnerabilityStore:
+    """Read-only vulnerability catalog indexed by (codebase, title) and by ID."""
+
+    def __init__(self, data: Dict[str, List[Vulnerability]]):
+        self.by_codebase = data
+        self._by_key: Dict[Tuple[str, str], Tuple[str, Vulnerability]] = {}
+        self._by_id: Dict[str, Tuple[str, Vulnerability]] = {}
+
+        for codebase, vulns in data.items():
+            for vuln in vulns:
+                # First occurrence wins, matching the old linear scan.
+                key = (codebase, normalize_title(vuln.title))
+                self._by_key.setdefault(key, (codebase, vuln))
+                self._by_id.setdefault(vuln.id, (codebase, vuln))
+
+        # Serialized payloads for the /vulnerabilities endpoints, built once.
+        self._items: Dict[str, List[bytes]] = {
+            codebase: [dump_json(v.model_dump()) for v in vulns]
+            for codebase, vulns in data.items()
+        }
+        self._details: Dict[str, bytes] = {
+            vuln_id: dump_json({"codebase": codebase, **vuln.model_dump()})
+            for vuln_id, (codebase, vuln) in self._by_id.items()
+        }
+        self.full_payload = b"{%s}" % b",".join(
+            b"%s:[%s]" % (dump_json(codebase), b",".join(items))
+            for codebase, items in self._items.items()
+        )
+        titles = {
+            codebase: [{"id": v.id, "title": v.title} for v in vulns]
+            for codebase, vulns in data.items()
+        }
+        self.titles_payload = dump_json(titles)
+        self.codebases_payload = dump_json(list(data))
+        self._titles: Dict[str, bytes] = {
+            codebase: dump_json(items) for codebase, items in titles.items()
+        }
+        self.version = hashlib.sha1(self.full_payload).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def find(self, codebase: str, title: str) -> Optional[Tuple[str, Vulnerability]]:
+        """Look up ``(codebase, vulnerability)`` by codebase and title."""
+        return self._by_key.get((codebase, normalize_title(title)))
+
+    def get(self, vuln_id: str) -> Optional[Tuple[str, Vulnerability]]:
+        """Look up ``(codebase, vulnerability)`` by vulnerability ID."""
+        return self._by_id.get(vuln_id)
+
+    def resolve(self, request: ChatRequest) -> Optional[Tuple[str, Vulnerability]]:
+        """Find ``(codebase, vulnerability)`` for a chat request, by ID or by title."""
+        if request.vulnerability_id:
+            return self.get(request.vulnerability_id)
+        return self.find(request.codebase, request.title)
+
+    def page_payload(self, codebase: str, offset: int, limit: int) -> Optional[bytes]:
+        """Serialized page of full vulnerabilities for one codebase."""
+        items = self._items.get(codebase)
+        if items is None:
+            return None
+        page = b",".join(items[offset : offset + limit])
+        header = dump_json(
+            {"codebase": codebase, "total": len(items), "offset": offset, "limit": limit}
+        )
+        return header[:-1] + b',"items":[%s]}' % page
+
+    def codebase_titles_payload(self, codebase: str) -> Optional[bytes]:
+        """Serialized IDs and titles of one codebase's vulnerabilities."""
+        return self._titles.get(codebase)
+
+    def detail_payload(self, vuln_id: str) -> Optional[bytes]:
+        """Serialized single vulnerability (with its codebase) by ID."""
+        return self._details.get(vuln_id)
+
+
+class CatalogLoader:
+    """Loads the catalog on first use and reloads it when the file's mtime changes.
+
+    The first load happens on the caller's thread. Reloads run in a
+    background thread while callers keep getting the previous store, and
+    the new store replaces it only once complete, so a request always sees
+    one consistent catalog. The previous store is also kept when the file
+    is missing, fails to parse, or loads with fewer than ``min_ratio`` of
+    the previous rows (e.g. a truncated, half-written file).
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        load: Callable[[str], VulnerabilityStore],
+        check_interval: float,
+        min_ratio: float = 0.5,
+    ):
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self.min_ratio = min_ratio
+        self._load = load
+        self._lock = threading.Lock()
+        self._store: Optional[VulnerabilityStore] = None
+        self._mtime = 0.0
+        self._checked = 0.0
+        self._reloading = False
+
+    def get(self) -> VulnerabilityStore:
+        """Return the current store, starting a reload if the file changed."""
+        store = self._store
+        if store is not None and (
+            self.check_interval <= 0
+            or time.monotonic() - self._checked < self.check_interval
+        ):
+            return store
+
+        with self._lock:
+            if self._store is None:
+                self._mtime = os.stat(self.file_path).st_mtime
+                self._store = self._load(self.file_path)
+                self._checked = time.monotonic()
+                return self._store
+            if self._reloading or time.monotonic() - self._checked < self.check_interval:
+                return self._store
+            self._checked = time.monotonic()
+            try:
+                mtime = os.stat(self.file_path).st_mtime
+            except OSError as e:
+                logging.warning("Keeping previous catalog, cannot stat it: %s", e)
+                return self._store
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._reloading = True
+                threading.Thread(
+                    target=self._reload, name="catalog-reload", daemon=True
+                ).start()
+            return self._store
+
+    def _reload(self) -> None:
+        try:
+            store = self._load(self.file_path)
+            previous = self._store
+            if len(store) == 0 or len(store) < self.min_ratio * len(previous):
+                logging.error(
+                    "Keeping previous catalog: reload has %s rows, previous had %s",
+                    len(store),
+                    len(previous),
+                )
+                return
+            self._store = store
+            logging.info("Reloaded catalog from %s", self.file_path)
+        except Exception as e:
+            logging.error("Keeping previous catalog, reload failed: %s", e)
+        finally:
+            self._reloading = False
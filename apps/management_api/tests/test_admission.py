@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+import main
+from src.utils.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    ClientRateLimiter,
+    client_address,
+    parse_networks,
+)
+
+PROXIES = parse_networks("127.0.0.1, 10.0.0.0/8")
+
+
+def test_forwarded_for_needs_a_trusted_proxy():
+    assert client_address("203.0.113.9", "198.51.100.1", PROXIES) == "203.0.113.9"
+    assert client_address("127.0.0.1", "198.51.100.1", PROXIES) == "198.51.100.1"
+    # A client-supplied first hop is skipped; the proxy chain is read from the right.
+    forwarded = "1.2.3.4, 198.51.100.1, 10.1.2.3"
+    assert client_address("127.0.0.1", forwarded, PROXIES) == "198.51.100.1"
+    assert client_address("127.0.0.1", None, PROXIES) == "127.0.0.1"
+    assert client_address(None, "198.51.100.1", PROXIES) == "unknown"
+
+
+def test_queue_full_and_queue_timeout_are_rejected():
+    async def scenario():
+        full = AdmissionController(1, 0, 1.0)
+        async with full.admit():
+            with pytest.raises(AdmissionRejected, match="capacity") as rejected:
+                full.check()
+        assert rejected.value.retry_after_header == "1"
+
+        slow = AdmissionController(1, 1, 0.05)
+        async with slow.admit():
+            with pytest.raises(AdmissionRejected, match="Timed out"):
+                async with slow.admit():
+                    pass
+        async with slow.admit():  # the slot and queue place were given back
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_returns_429_with_retry_after(monkeypatch):
+    limits = ClientRateLimiter(rate=0.5, burst=1)
+    monkeypatch.setattr(main, "client_limits", limits)
+    limits.check("testclient")  # TestClient's peer address
+
+    client = TestClient(main.app)
+    for headers in ({}, {"X-Forwarded-For": "198.51.100.7"}):
+        response = client.post(
+            "/chat", json={"memory": [], "user_input": "hi"}, headers=headers
+        )
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+
+    other = ClientRateLimiter(rate=0.5, burst=1)
+    other.check("a")
+    other.check("b")
+    with pytest.raises(AdmissionRejected):
+        other.check("a")
@@ -0,0 +1,64 @@
+import json
+import asyncio
+from fastapi.testclient import TestClient
+import main
+from src.utils.admission import ClientRateLimiter
+from src.utils.pymodels import ChatResponse
+
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.running = self.peak = 0
+
+    async def ainvoke(self, request):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if request.user_input == "boom":
+            raise RuntimeError("upstream failed")
+        return ChatResponse(response=f"re: {request.user_input}")
+
+
+def post_batch(monkeypatch, inputs, concurrency=None):
+    orchestrator = FakeOrchestrator()
+
+    async def get_orchestrator():
+        return orchestrator
+
+    monkeypatch.setattr(main, "get_orchestrator", get_orchestrator)
+    items = [{"memory": [], "user_input": text} for text in inputs]
+    response = TestClient(main.app).post(
+        "/chat/batch", json={"items": items, "concurrency": concurrency}
+    )
+    return response, orchestrator
+
+
+def test_batch_streams_every_item_and_isolates_failures(monkeypatch):
+    inputs = ["a", "boom", "c", "d", "e"]
+    response, orchestrator = post_batch(monkeypatch, inputs, concurrency=2)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = {r["index"]: r for r in map(json.loads, response.text.splitlines())}
+    assert sorted(results) == list(range(len(inputs)))
+    assert results[0]["response"] == "re: a" and results[0]["error"] is None
+    assert results[1]["response"] is None and "upstream failed" in results[1]["error"]
+    assert orchestrator.peak <= 2
+
+
+def test_oversized_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 2)
+    response, _ = post_batch(monkeypatch, ["a", "b", "c"])
+    assert response.status_code == 413
+
+
+def test_batch_items_are_charged_to_the_rate_limit(monkeypatch):
+    monkeypatch.setattr(main, "client_limits", ClientRateLimiter(rate=0.01, burst=5))
+    response, _ = post_batch(monkeypatch, ["a", "b", "c"])
+    assert response.status_code == 200
+    # Three of the five tokens are spent: another three-item batch must wait.
+    response, orchestrator = post_batch(monkeypatch, ["d", "e", "f"])
+    assert response.status_code == 429 and "Retry-After" in response.headers
+    assert orchestrator.peak == 0
+    # More items than the bucket holds can never be admitted.
+    response, _ = post_batch(monkeypatch, list("abcdef"))
+    assert response.status_code == 413
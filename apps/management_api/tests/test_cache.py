@@ -0,0 +1,83 @@
+import time
+import asyncio
+from langchain_core.messages import HumanMessage
+from src.utils.cache import ResponseCache
+
+
+def prompt(code: str, user_input: str) -> list:
+    return [HumanMessage(content=f"```python\n{code}\n```\nUser: '{user_input}'")]
+
+
+def test_key_ignores_whitespace_in_user_text_only():
+    code = "if ok:\n    run()"
+    key = ResponseCache.make_key(prompt(code, "is this  fine?"), "m", "is this  fine?")
+    same = ResponseCache.make_key(prompt(code, "is this fine?"), "m", "is this fine?")
+    assert key == same
+
+    # Indentation is meaning in Python: a different code block, a different key.
+    dedented = "if ok:\nrun()"
+    other = ResponseCache.make_key(prompt(dedented, "is this fine?"), "m", "is this fine?")
+    assert other != key
+
+
+def test_key_depends_on_model():
+    messages = prompt("x = 1", "why?")
+    assert ResponseCache.make_key(messages, "a", "why?") != ResponseCache.make_key(
+        messages, "b", "why?"
+    )
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    async def scenario():
+        cache = ResponseCache(10, 60, path)
+        assert await cache.aget("k") is None
+        await cache.aset("k", "v")
+        assert await cache.aget("k") == "v"
+
+        restarted = ResponseCache(10, 60, path)
+        assert await restarted.aget("k") == "v"
+        return cache.stats(), restarted.stats()
+
+    first, second = asyncio.run(scenario())
+    assert (first["hits"], first["misses"]) == (1, 1)
+    assert second["disk_hits"] == 1
+
+
+def test_lru_and_ttl(monkeypatch):
+    cache = ResponseCache(2, 10)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+    now = time.time()
+    monkeypatch.setattr("src.utils.cache.time.time", lambda: now + 11)
+    assert cache.get("a") is None
+
+
+def test_expired_rows_are_deleted_from_disk(monkeypatch, tmp_path):
+    path = str(tmp_path / "cache.db")
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.cache.time.time", lambda: now[0])
+    cache = ResponseCache(10, 60, path, prune_interval=30)
+    cache.set("old", "1")
+    cache.set("other", "2")
+
+    def rows():
+        return {key for (key,) in cache._db.execute("SELECT key FROM responses")}
+
+    now[0] += 60
+    cache._entries.clear()  # force the disk tier
+    assert cache.get("old") is None
+    assert rows() == {"other"}  # deleted on read
+
+    cache.set("new", "3")  # a write past prune_interval sweeps the rest
+    assert rows() == {"new"}
+
+    now[0] += 60
+    assert ResponseCache(10, 60, path).get("new") is None  # pruned at startup
+    assert rows() == set()
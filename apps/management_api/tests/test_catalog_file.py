@@ -0,0 +1,56 @@
+import os
+from src.utils.catalog_file import (
+    CatalogFileBuilder,
+    MappedVulnerabilityStore,
+    write_catalog_file,
+)
+from src.utils.common import fetch_csv_data
+from src.utils.vulnerability_store import VulnerabilityStore
+from tests.test_vulnerability_store import bump_mtime, rows, write_csv
+
+CSV_PATH = "src/utils/data.csv"
+
+
+def test_mapped_payloads_match_the_csv_store(tmp_path):
+    data = fetch_csv_data(CSV_PATH)
+    path = str(tmp_path / "catalog.vcat")
+    version = write_catalog_file(data, path)
+    csv_store, mapped = VulnerabilityStore(data), MappedVulnerabilityStore(path)
+
+    assert version == mapped.version == csv_store.version
+    assert len(mapped) == len(csv_store)
+    assert mapped.full_payload == csv_store.full_payload
+    assert mapped.titles_payload == csv_store.titles_payload
+    assert mapped.codebases_payload == csv_store.codebases_payload
+    for codebase, vulns in data.items():
+        assert mapped.codebase_titles_payload(codebase) == (
+            csv_store.codebase_titles_payload(codebase)
+        )
+        for offset, limit in ((0, 3), (1, 2), (len(vulns), 5)):
+            assert mapped.page_payload(codebase, offset, limit) == (
+                csv_store.page_payload(codebase, offset, limit)
+            )
+        for vuln in vulns:
+            assert mapped.detail_payload(vuln.id) == csv_store.detail_payload(vuln.id)
+            assert mapped.get(vuln.id) == csv_store.get(vuln.id)
+            assert mapped.find(codebase, vuln.title) == csv_store.find(codebase, vuln.title)
+    assert mapped.page_payload("missing", 0, 5) is None
+    assert mapped.detail_payload("missing") is None
+
+
+def test_builder_rebuilds_when_the_csv_changes(tmp_path):
+    csv_path, out = tmp_path / "data.csv", str(tmp_path / "catalog.vcat")
+    write_csv(csv_path, rows(2))
+    builder = CatalogFileBuilder(str(csv_path), out, fetch_csv_data, check_interval=1)
+    first = builder.check()
+    assert first is not None and len(MappedVulnerabilityStore(out)) == 2
+    assert builder.check() is None  # unchanged
+
+    write_csv(csv_path, rows(3))
+    bump_mtime(csv_path)
+    assert builder.check() not in (None, first)
+    assert len(MappedVulnerabilityStore(out)) == 3
+
+    os.remove(csv_path)
+    assert builder.check() is None
+    assert len(MappedVulnerabilityStore(out)) == 3
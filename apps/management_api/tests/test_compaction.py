@@ -0,0 +1,36 @@
+from src.agent_prompt.compaction import squeeze, trim_to_budget, vulnerable_lines
+from src.utils.common import estimate_tokens
+
+BODY = [f"value_{i} = compute({i})" for i in range(40)]
+CODE = "\n".join(["intro", "```python", *BODY, "```", "outro"])
+
+
+def fences(text):
+    return sum(line.lstrip().startswith("```") for line in text.splitlines())
+
+
+def test_text_within_budget_is_unchanged():
+    assert trim_to_budget(CODE, estimate_tokens(CODE)) == CODE
+
+
+def test_cut_inside_a_code_block_reopens_and_closes_it():
+    trimmed = trim_to_budget(CODE, 40, anchors=[22])
+    lines = trimmed.splitlines()
+    assert lines[0].startswith("… (") and lines[1] == "```"
+    assert lines[-2] == "```" and lines[-1].startswith("… (")
+    assert "value_20 = compute(20)" in trimmed
+    assert fences(trimmed) % 2 == 0
+
+
+def test_cut_after_the_opening_fence_closes_the_block():
+    trimmed = trim_to_budget(CODE, 40)
+    lines = trimmed.splitlines()
+    assert lines[:2] == ["intro", "```python"]
+    assert fences(trimmed) == 2
+
+
+def test_anchors_are_the_lines_the_fix_rewrites():
+    code = "def f(x):\n    y = x\n    return eval(y)\n"
+    fix = "def f(x):\n    y = x\n    return int(y)\n"
+    assert vulnerable_lines(code, fix) == [0, 1]
+    assert squeeze("a    b  \n\n\n\nc") == "a b\n\nc"
@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+import main
+from main import etag_matches
+
+ETAG = 'W/"abc-full"'
+
+
+def test_etag_matches_lists_wildcard_and_strong_form():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches('"abc-full"', ETAG)
+    assert etag_matches('"x", W/"abc-full"', ETAG)
+    assert etag_matches(' * ', ETAG)
+    assert not etag_matches('W/"abc-titles"', ETAG)
+    assert not etag_matches("", ETAG)
+    assert not etag_matches(None, ETAG)
+
+
+def test_catalog_endpoint_returns_304():
+    client = TestClient(main.app)
+    first = client.get("/vulnerabilities?view=codebases")
+    etag = first.headers["etag"]
+    strong = etag.removeprefix("W/")
+    for header in (etag, strong, f'"other", {etag}', "*"):
+        response = client.get(
+            "/vulnerabilities?view=codebases", headers={"If-None-Match": header}
+        )
+        assert response.status_code == 304, header
+    stale = client.get("/vulnerabilities?view=codebases", headers={"If-None-Match": '"x"'})
+    assert stale.status_code == 200
@@ -0,0 +1,32 @@
+from src.utils.fast_classifier import (
+    FastFeedbackClassifier,
+    informative_words,
+    training_examples,
+)
+from src.utils.pymodels import FixCategory
+
+
+def test_informative_words_skip_stop_words():
+    assert informative_words("fix it") == 1
+    assert informative_words("can you look again?") == 2
+    assert informative_words("the null check is missing") == 3
+
+
+def test_short_feedback_is_left_to_the_llm():
+    model = FastFeedbackClassifier.train(training_examples(), epochs=5)
+    assert model.predict("fix it")[0] == FixCategory.FEEDBACK_UNCLEAR
+    # Even at threshold 0 a two-word request never bypasses the LLM.
+    assert model.classify("fix it", threshold=0.0, min_words=3) is None
+
+    text = "the fix introduces a new sql injection vulnerability"
+    assert model.classify(text, threshold=0.0, min_words=3) == model.predict(text)
+    assert model.classify(text, threshold=1.01, min_words=3) is None
+
+
+def test_save_load_round_trip(tmp_path):
+    model = FastFeedbackClassifier.train(training_examples()[:40], epochs=2)
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    loaded = FastFeedbackClassifier.load(path)
+    assert loaded.predict("syntax error") == model.predict("syntax error")
+    assert FastFeedbackClassifier.load(str(tmp_path / "missing.json")) is None
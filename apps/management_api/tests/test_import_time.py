@@ -0,0 +1,15 @@
+import os
+import statistics
+from benchmarks.import_time import LAZY_MODULES, measure
+
+# Same budget as ``python -m benchmarks.import_time`` (env IMPORT_TIME_BUDGET).
+BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.0"))
+
+
+def test_import_main_is_lazy_and_within_budget():
+    measure("main", 1)  # compile once, as the benchmark does
+    samples = measure("main", 3)
+    loaded = sorted({m for s in samples for m in s["loaded"]})
+    assert loaded == [], f"imported eagerly: {loaded} (lazy: {LAZY_MODULES})"
+    seconds = statistics.median(s["seconds"] for s in samples)
+    assert seconds <= BUDGET, f"import main took {seconds:.2f}s (budget {BUDGET}s)"
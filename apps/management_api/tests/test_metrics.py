@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+from fastapi.testclient import TestClient
+import main
+
+WORKER = """
+from src.utils.metrics import CHAT_ADMISSION, CHAT_QUEUE_DEPTH
+CHAT_ADMISSION.labels(result="admitted").inc()
+CHAT_QUEUE_DEPTH.set(2)
+"""
+
+SCRAPE = """
+from src.utils.metrics import render_metrics
+print(render_metrics().decode())
+"""
+
+
+def run(code, env):
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def test_metrics_endpoint_reports_requests():
+    client = TestClient(main.app)
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"' in response.text
+
+
+def test_multiprocess_metrics_sum_across_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    run(WORKER, env)
+    run(WORKER, env)
+    text = run(SCRAPE, env)
+    assert 'chat_admission_total{result="admitted"} 2.0' in text
@@ -0,0 +1,55 @@
+import asyncio
+from benchmarks.stub_llm import StubChatModel
+from src.agents.orchestrator import ChatOrchestrator
+from src.utils.common import get_vulnerability_store
+from src.utils.precomputed import PrecomputedFixes, is_generic_feedback, make_fix_version
+from src.utils.pymodels import ChatRequest, FixCategory
+
+LOGIC = FixCategory.INCORRECT_LOGIC
+
+
+def test_generic_feedback():
+    for text in ("The logic is wrong", "try another fix please", "doesn’t work."):
+        assert is_generic_feedback(text, LOGIC), text
+    for text in (
+        "",
+        "check the role before calling delete_user()",
+        "use bcrypt instead",
+        "the logic is wrong when user.role is admin",
+        "limit it to 10 retries",
+        "the logic is wrong " * 4,
+    ):
+        assert not is_generic_feedback(text, LOGIC), text
+    # Category words are generic only for their own category.
+    assert not is_generic_feedback("too inefficient", LOGIC)
+    assert is_generic_feedback("inefficient code", FixCategory.INEFFICIENT_CODE)
+
+
+def test_precomputed_fix_only_serves_generic_feedback(tmp_path):
+    llm = StubChatModel(fixer_output="fresh fix")
+    orchestrator = ChatOrchestrator(llm=llm)
+    orchestrator.fast_classifier = None
+    orchestrator.precomputed = PrecomputedFixes(str(tmp_path / "fixes.db"))
+    store = get_vulnerability_store()
+    codebase, vuln = next(
+        (codebase, vuln)
+        for codebase, vulns in store.by_codebase.items()
+        for vuln in vulns
+        if codebase != "n/a" and vuln.title != "n/a"
+    )
+    version = make_fix_version(store.version, orchestrator.model_name)
+    orchestrator.precomputed.set(version, vuln.id, LOGIC, "canned fix")
+
+    def ask(user_input):
+        request = ChatRequest(
+            memory=[], user_input=user_input, codebase=codebase, title=vuln.title
+        )
+        return asyncio.run(orchestrator.ainvoke(request))
+
+    generic = ask("the logic is wrong")
+    assert generic.models["fixer"] == "precomputed"
+    assert generic.response.endswith("canned fix")
+
+    specific = ask("the logic is wrong: check is_admin before delete_user()")
+    assert specific.models["fixer"] != "precomputed"
+    assert specific.response.endswith("fresh fix")
@@ -0,0 +1,128 @@
+import time
+import asyncio
+import pytest
+from benchmarks.stub_llm import StubChatModel, StubLLMError
+from src.agents.orchestrator import ChatOrchestrator
+from src.utils.common import get_vulnerability_store
+from src.utils.pymodels import ChatRequest
+from src.utils.resilience import (
+    CircuitBreaker,
+    ResilientCaller,
+    UpstreamError,
+    UpstreamUnavailable,
+)
+
+
+def make_caller(**kwargs):
+    return ResilientCaller("fixer", timeout=5, backoff_base=0, **kwargs)
+
+
+def failing_then(result, failures):
+    calls = []
+
+    async def make_call():
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise StubLLMError("overloaded")
+        return result
+
+    return make_call, calls
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.utils.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(UpstreamUnavailable):
+        breaker.before_call()
+
+    now[0] += 10
+    assert breaker.state == "half_open"
+    breaker.before_call()  # the single trial call
+    with pytest.raises(UpstreamUnavailable):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] += 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_transient_errors_are_retried():
+    make_call, calls = failing_then("ok", failures=2)
+    assert asyncio.run(make_caller(retries=2).call("m", make_call)) == "ok"
+    assert len(calls) == 3
+
+
+def test_streamed_call_is_not_retried_after_output():
+    make_call, calls = failing_then("ok", failures=1)
+    with pytest.raises(UpstreamError):
+        asyncio.run(make_caller(retries=2).call("m", make_call, lambda: True))
+    assert len(calls) == 1
+
+    make_call, calls = failing_then("ok", failures=1)
+    assert asyncio.run(make_caller(retries=2).call("m", make_call, lambda: False)) == "ok"
+    assert len(calls) == 2
+
+
+def test_slow_call_is_hedged_unless_streamed():
+    def caller():
+        caller = make_caller(hedge=True, hedge_min_samples=1)
+        caller._latencies.append(0.01)
+        return caller
+
+    def slow_first():
+        calls = []
+
+        async def make_call():
+            calls.append(1)
+            await asyncio.sleep(0.2 if len(calls) == 1 else 0)
+            return len(calls)
+
+        return make_call, calls
+
+    make_call, calls = slow_first()
+    assert asyncio.run(caller().call("m", make_call)) == 2
+
+    make_call, calls = slow_first()
+    assert asyncio.run(caller().call("m", make_call, lambda: False)) == 1
+    assert len(calls) == 1
+
+
+def test_hedged_stream_sends_one_answer():
+    llm = StubChatModel(token_latency=0.003)
+    orchestrator = ChatOrchestrator(llm=llm)
+    for caller in orchestrator.resilience.values():
+        caller.hedge, caller.hedge_min_samples = True, 1
+        caller._latencies.append(0.001)
+    codebase, title = next(
+        (codebase, vuln.title)
+        for codebase, vulns in get_vulnerability_store().by_codebase.items()
+        for vuln in vulns
+        if codebase != "n/a" and vuln.title != "n/a"
+    )
+    request = ChatRequest(
+        memory=[],
+        user_input="the fix breaks login",
+        codebase=codebase,
+        title=title,
+        bypass_cache=True,
+    )
+
+    async def stream():
+        return [event async for event in orchestrator.astream(request)]
+
+    events = asyncio.run(stream())
+    tokens = "".join(data["content"] for event, data in events if event == "token")
+    event, done = events[-1]
+    assert event == "done"
+    assert tokens == llm.fixer_output
+    assert done["response"].endswith("\n\n" + tokens)
@@ -0,0 +1,44 @@
+from src.utils.routing import ModelRoute
+
+
+def make_route(monkeypatch, **kwargs):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.routing.time.monotonic", lambda: now[0])
+    route = ModelRoute(
+        "fixer", "primary", "fallback", window=4, min_samples=4, cooldown=60, **kwargs
+    )
+    return route, now
+
+
+def test_error_rate_switches_to_fallback_until_cooldown_ends(monkeypatch):
+    route, now = make_route(monkeypatch, max_error_rate=0.5)
+    for ok in (True, False, False, True):
+        route.observe("primary", 1.0, ok)
+    assert route.select() == "primary"  # 50% is not above the limit
+
+    route.observe("primary", 1.0, False)
+    assert route.select() == "fallback"
+    route.observe("fallback", 1.0, False)  # fallback calls never count
+    now[0] += 60
+    assert route.select() == "primary"
+
+    # The primary is judged on a fresh window after the cooldown.
+    route.observe("primary", 1.0, False)
+    assert route.select() == "primary"
+
+
+def test_slow_primary_switches_on_p95(monkeypatch):
+    route, _ = make_route(monkeypatch, max_p95=2.0)
+    for latency in (0.5, 0.5, 0.5, 1.5):
+        route.observe("primary", latency, True)
+    assert route.select() == "primary"
+    route.observe("primary", 3.0, True)
+    assert route.select() == "fallback"
+
+
+def test_route_without_fallback_keeps_the_primary(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("src.utils.routing.time.monotonic", lambda: now[0])
+    route = ModelRoute("fixer", "primary", max_error_rate=0.1, min_samples=1)
+    route.observe("primary", 1.0, False)
+    assert route.select() == "primary"
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from src.utils.pymodels import ChatMessage, ChatRequest, ChatSession, Sender
+from src.utils.sessions import SessionStore, compact, summarize_message
+from src.utils.common import estimate_tokens
+
+
+def turn(text, sender=Sender.USER):
+    return ChatMessage(sender=sender, message=text)
+
+
+def test_compact_folds_oldest_turns_and_keeps_the_newest():
+    session = ChatSession(turns=[turn("a" * 400) for _ in range(5)])
+    compacted = compact(session, budget=250)
+    assert len(compacted.turns) == 2
+    # Three turns folded, but the summary keeps only its newest quarter-budget.
+    assert compacted.summary.startswith("- user: aaa")
+    assert estimate_tokens(compacted.summary) <= 250 // 4
+
+    huge = compact(ChatSession(turns=[turn("b" * 4000)]), budget=10)
+    assert len(huge.turns) == 1  # the newest turn always stays verbatim
+
+
+def test_summary_drops_code_and_is_capped():
+    line = summarize_message(turn("see ```\nsecret = 1\n``` " + "x" * 500))
+    assert "secret" not in line and "[code]" in line
+    assert len(line) <= len("- user: ") + 200
+
+    session = ChatSession(turns=[turn("y" * 400) for _ in range(30)])
+    compacted = compact(session, budget=200)
+    assert estimate_tokens(compacted.summary) <= 200 // 4
+
+
+def test_sessions_expire_and_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.sessions.time.time", lambda: now[0])
+    store = SessionStore(max_sessions=2, ttl=60, history_tokens=1000)
+    for session_id in ("a", "b", "c"):
+        store.record(session_id, "question", "answer")
+    assert store.get("a").turns == []  # evicted as least recently used
+    assert len(store.get("c").turns) == 2
+
+    now[0] += 60
+    assert store.get("c").turns == []
+
+
+def test_workers_share_sessions_through_sqlite(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first = SessionStore(10, 3600, 1000, path)
+    second = SessionStore(10, 3600, 1000, path)
+
+    first.record("s", "q1", "a1")
+    second.record("s", "q2", "a2")  # sees q1 from the other worker
+    assert [t.message for t in first.get("s").turns] == ["q1", "a1", "q2", "a2"]
+
+    history = second.history(ChatRequest(memory=[], user_input="", session_id="s"))
+    assert "user: q2" in history and "assistant: a1" in history
+
+
+def test_concurrent_turns_are_not_lost(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    workers = [SessionStore(10, 3600, 100000, path) for _ in range(2)]
+
+    def chat(store, name):
+        for i in range(20):
+            store.record("s", f"{name}{i}", "ok")
+
+    threads = [
+        threading.Thread(target=chat, args=(store, name))
+        for store in workers
+        for name in ("a", "b")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    turns = workers[0].get("s").turns
+    assert len(turns) == 160
+    assert {t.message for t in turns} >= {f"{n}{i}" for n in "ab" for i in range(20)}
+
+
+def test_expired_rows_are_pruned(monkeypatch, tmp_path):
+    path = str(tmp_path / "sessions.db")
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.sessions.time.time", lambda: now[0])
+    store = SessionStore(10, 60, 1000, path, prune_interval=30)
+    store.record("old", "q", "a")
+
+    def ids():
+        return {row[0] for row in store._db.execute("SELECT id FROM sessions")}
+
+    now[0] += 60
+    store.record("new", "q", "a")  # a write past prune_interval sweeps
+    assert ids() == {"new"}
+
+    now[0] += 60
+    SessionStore(10, 60, 1000, path)  # and so does startup
+    assert ids() == set()
+
+
+def test_async_variants_round_trip(tmp_path):
+    store = SessionStore(10, 3600, 1000, str(tmp_path / "sessions.db"))
+    request = ChatRequest(memory=[], user_input="", session_id="s")
+
+    async def scenario():
+        await store.arecord("s", "question", "answer")
+        return await store.ahistory(request)
+
+    assert "user: question" in asyncio.run(scenario())
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from src.utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.run("k", work) for _ in range(5)))
+        assert results == [1] * 5
+        assert await flight.run("k", work) == 2  # nothing kept after completion
+        assert len(flight) == 0
+
+    asyncio.run(scenario())
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise ValueError("upstream failed")
+        return "ok"
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(flight.run("k", work) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert await flight.run("k", work) == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("k", work))
+        second = asyncio.ensure_future(flight.run("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == "done"
+
+    asyncio.run(scenario())
@@ -0,0 +1,10 @@
+from fastapi.testclient import TestClient
+import main
+
+
+def test_startup_preloads_the_catalog(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "warm_up", lambda: None)
+    monkeypatch.setattr(main, "get_vulnerability_store", lambda: calls.append(1) or [])
+    with TestClient(main.app):
+        assert calls == [1]
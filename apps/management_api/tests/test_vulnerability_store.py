@@ -0,0 +1,116 @@
+import os
+import csv
+import time
+from src.utils.vulnerability_store import (
+    CatalogLoader,
+    VulnerabilityStore,
+    iter_csv_vulnerabilities,
+    placeholder_title,
+)
+
+FIELDS = ["Codebase", "Title", "Category", "Vulnerable", "Fixed", "Notes"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_placeholder_title_is_stable():
+    record = {"Codebase": "app", "Vulnerable": "eval(x)", "Fixed": "x", "Notes": ""}
+    assert placeholder_title(record) == placeholder_title(dict(record))
+    assert placeholder_title(record) != placeholder_title({**record, "Vulnerable": "y"})
+
+
+def test_ids_are_stable_across_loads(tmp_path):
+    path = tmp_path / "data.csv"
+    row = {"Codebase": "app", "Title": "SQLi", "Category": "c", "Vulnerable": "q"}
+    write_csv(path, [row, {**row, "Title": "XSS", "Vulnerable": "h"}])
+    first = [(c, v.id, v.title) for c, v in iter_csv_vulnerabilities(str(path))]
+    second = [(c, v.id, v.title) for c, v in iter_csv_vulnerabilities(str(path))]
+    assert first == second
+    assert len({vuln_id for _, vuln_id, _ in first}) == 2
+
+
+def test_empty_cells_read_as_na(tmp_path):
+    path = tmp_path / "data.csv"
+    write_csv(path, [{"Codebase": "n/a", "Title": "", "Vulnerable": "x"}])
+    [(codebase, vuln)] = list(iter_csv_vulnerabilities(str(path)))
+    assert (codebase, vuln.title, vuln.notes) == ("n/a", "n/a", "n/a")
+
+
+def load_store(path):
+    data = {}
+    for codebase, vuln in iter_csv_vulnerabilities(path):
+        data.setdefault(codebase, []).append(vuln)
+    return VulnerabilityStore(data)
+
+
+def rows(count):
+    return [
+        {"Codebase": "app", "Title": f"T{i}", "Vulnerable": f"v{i}"}
+        for i in range(count)
+    ]
+
+
+def wait_for_reload(loader):
+    deadline = time.monotonic() + 5
+    while loader._reloading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_loader_reloads_in_background(tmp_path):
+    path = tmp_path / "data.csv"
+    write_csv(path, rows(2))
+    loader = CatalogLoader(str(path), load_store, check_interval=0.01)
+    first = loader.get()
+
+    write_csv(path, rows(3))
+    bump_mtime(path)
+    time.sleep(0.02)
+    assert loader.get() is first  # served while the reload runs
+    wait_for_reload(loader)
+    assert len(loader.get()) == 3
+
+
+def test_loader_keeps_store_when_file_disappears(tmp_path):
+    path = tmp_path / "data.csv"
+    write_csv(path, rows(2))
+    loader = CatalogLoader(str(path), load_store, check_interval=0.01)
+    first = loader.get()
+
+    os.remove(path)
+    time.sleep(0.02)
+    assert loader.get() is first
+
+
+def test_loader_keeps_store_on_bad_or_truncated_file(tmp_path):
+    path = tmp_path / "data.csv"
+    write_csv(path, rows(4))
+    loader = CatalogLoader(str(path), load_store, check_interval=0.01)
+    first = loader.get()
+
+    for broken in (rows(1), []):
+        write_csv(path, broken)
+        bump_mtime(path)
+        time.sleep(0.02)
+        loader.get()
+        wait_for_reload(loader)
+        assert loader.get() is first
+
+    def fail(path):
+        raise ValueError("unreadable")
+
+    loader._load = fail
+    bump_mtime(path)
+    time.sleep(0.02)
+    loader.get()
+    wait_for_reload(loader)
+    assert loader.get() is first
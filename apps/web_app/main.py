@@ -1,83 +1,123 @@
-import requests
+import uuid
+import asyncio
+import httpx
 import gradio as gr
-from src.utils.common import API_URL, PORT, logger, get_vulnerabilities
-from src.utils.pymodels import ChatMessage, ChatRequest, ChatResponse, Sender
+from src.utils.common import (
+    CATALOG_SNAPSHOT_PATH,
+    CATALOG_TTL,
+    GRADIO_CONCURRENCY,
+    GRADIO_MAX_QUEUE,
+    PORT,
+    logger,
+    aiter_sse,
+    get_client,
+)
+from src.utils.catalog import Catalog
+from src.utils.pymodels import ChatRequest, ChatResponse
 
 
-vulnerabilities = get_vulnerabilities()
+catalog = Catalog(CATALOG_SNAPSHOT_PATH, CATALOG_TTL)
 
 
 # -------------------------------
 # Helper functions
 # -------------------------------
-def chat_with_bot(
-    user_message: str, history: list, selected_codebase: str, vuln_title: str
+async def chat_with_bot(
+    user_message: str,
+    history: list,
+    selected_codebase: str,
+    vuln_title: str,
+    session_id: str,
 ):
-    """Send user message + memory to backend and return updated chat."""
-
-    # Convert Gradio chat history into ChatMessage list
-    memory = []
-    for user_msg, bot_msg in history:
-        if user_msg:
-            memory.append(ChatMessage(sender=Sender.USER, message=user_msg))
-        if bot_msg:
-            memory.append(ChatMessage(sender=Sender.ASSISTANT, message=bot_msg))
+    """Send the new message to the backend and stream the reply into the chat.
 
+    The backend keeps the conversation under ``session_id``, so only the new
+    message is uploaded, however long the chat gets. The handler awaits the
+    shared pooled client, so a slow backend holds no UI worker thread.
+    """
     request = ChatRequest(
-        memory=memory,
         user_input=user_message,
         codebase=selected_codebase,
         title=vuln_title,
+        session_id=session_id,
     )
 
-    r = requests.post(f"{API_URL}/chat", json=request.model_dump(), timeout=60)
-    response = ChatResponse(**r.json())
-
-    history.append((user_message, response.response))
-    return history, ""
-
-
-def update_titles(selected_codebase: str):
+    history.append((user_message, ""))
+    try:
+        async with get_client().stream(
+            "POST", "/chat/stream", json=request.model_dump(exclude_defaults=True)
+        ) as r:
+            if r.status_code in (429, 503):
+                await r.aread()  # drain so the connection returns to the pool
+                retry = r.headers.get("retry-after", "a few")
+                busy = f"⚠️ The service is busy; retry in {retry}s."
+                history[-1] = (user_message, busy)
+                yield history, user_message
+                return
+            r.raise_for_status()
+            verdict, fix = "", ""
+            async for event, data in aiter_sse(r):
+                if event == "classifier":
+                    verdict = f"### Predicted Class: \n{data['content']}\n\n"
+                elif event == "token":
+                    fix += data["content"]
+                elif event == "done":
+                    verdict, fix = ChatResponse(**data).response, ""
+                elif event == "error":
+                    fix += f"\n\n⚠️ {data['detail']}"
+                history[-1] = (user_message, verdict + fix)
+                yield history, ""
+    except httpx.HTTPError as e:
+        logger.error("Chat request failed: %s", e)
+        history[-1] = (user_message, "⚠️ The backend did not answer; please retry.")
+        yield history, user_message
+
+
+async def update_titles(selected_codebase: str):
     """
     Return updated Dropdown component with vulnerability titles for the given codebase.
     """
-    if not selected_codebase or selected_codebase not in vulnerabilities:
+    if not selected_codebase:
         return gr.update(choices=[], value=None)
 
-    titles = [v.title for v in vulnerabilities[selected_codebase]]
+    titles = [v.title for v in await catalog.titles(selected_codebase)]
     return gr.update(choices=titles, value=titles[0] if titles else None)
 
 
+async def load_catalog():
+    """Fill both dropdowns when a page opens, once the codebase list is known."""
+    # A cold start waits briefly for the background load; a warm one has the snapshot.
+    if not catalog.codebases:
+        await asyncio.to_thread(catalog.ready.wait, 10)
+    codebases = catalog.codebases
+    selected = codebases[0] if codebases else None
+    return (
+        gr.update(choices=codebases, value=selected),
+        await update_titles(selected),
+    )
+
+
 # -------------------------------
 # Gradio App
 # -------------------------------
 
 
 def gradio_app():
-    """Create the Gradio chatbot interface with two dependent dropdowns."""
-    codebases = list(vulnerabilities.keys())
-
-    if codebases:
-        init_update = update_titles(codebases[0])
-        initial_choices = init_update["choices"]
-        initial_value = init_update["value"]
-    else:
-        initial_choices, initial_value = [], None
+    """Create the Gradio chatbot interface with two dependent dropdowns.
 
+    Nothing here waits for the backend: the dropdowns are filled per page
+    load from the catalog, which loads in the background.
+    """
     with gr.Blocks() as gr_app:
         gr.Markdown("# 🔒 Vulnerability Chatbot")
 
-        codebase_dropdown = gr.Dropdown(
-            choices=codebases,
-            label="Select Codebase",
-            value=codebases[0] if codebases else None,
-        )
+        codebase_dropdown = gr.Dropdown(choices=[], label="Select Codebase")
         vuln_title_dropdown = gr.Dropdown(
-            choices=initial_choices,
-            value=initial_value,
-            label="Select Vulnerability Title",
+            choices=[], label="Select Vulnerability Title"
         )
 
+        # One backend session per browser session.
+        session_id = gr.State(lambda: uuid.uuid4().hex)
         chatbot = gr.Chatbot(label="Conversation", height=500)
         msg = gr.Textbox(label="Your message")
         send = gr.Button("Send")
@@ -90,13 +130,19 @@ def gradio_app():
         # Send message with both dropdown selections
         send.click(
             fn=chat_with_bot,
-            inputs=[msg, chatbot, codebase_dropdown, vuln_title_dropdown],
+            inputs=[msg, chatbot, codebase_dropdown, vuln_title_dropdown, session_id],
             outputs=[chatbot, msg],
         )
+        gr_app.load(fn=load_catalog, outputs=[codebase_dropdown, vuln_title_dropdown])
     return gr_app
 
 
 if __name__ == "__main__":
+    catalog.start()
     app = gradio_app()
+    app.queue(
+        default_concurrency_limit=GRADIO_CONCURRENCY,
+        max_size=GRADIO_MAX_QUEUE or None,
+    )
     logger.info("Starting Gradio app on port %s", PORT)
     app.launch(server_name="0.0.0.0", server_port=PORT)
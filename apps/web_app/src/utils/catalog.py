@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+import httpx
+from src.utils.common import API_URL, BACKEND_CONNECT_TIMEOUT, get_client, logger
+from src.utils.pymodels import VulnerabilitySummary
+
+
+def wait_for_backend(
+    max_wait: float = 300.0, base: float = 0.5, cap: float = 10.0
+) -> bool:
+    """Poll ``/health`` with capped exponential backoff and full jitter.
+
+    Returns True once the backend is healthy, False after ``max_wait`` seconds.
+    """
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    with httpx.Client(base_url=API_URL, timeout=BACKEND_CONNECT_TIMEOUT) as client:
+        while True:
+            try:
+                if client.get("/health").status_code == 200:
+                    logger.info("✅ Backend is healthy.")
+                    return True
+            except httpx.HTTPError:
+                pass
+            delay = random.uniform(0, min(cap, base * 2**attempt))
+            attempt += 1
+            if time.monotonic() + delay > deadline:
+                logger.error("❌ Backend did not become healthy in time.")
+                return False
+            logger.warning(f"⏳ Waiting for backend... (attempt {attempt})")
+            time.sleep(delay)
+
+
+class Catalog:
+    """Codebase names and per-codebase vulnerability titles for the dropdowns.
+
+    Starts from the on-disk snapshot of the last run, so a warm start has
+    choices before the backend answers. ``start`` refreshes the codebase list
+    in a background thread; titles are fetched per codebase on first use and
+    kept for ``ttl`` seconds. Both are written back to the snapshot.
+    """
+
+    def __init__(self, snapshot_path: str, ttl: float = 60.0):
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self.version: Optional[str] = None
+        self.codebases: List[str] = []
+        self._snapshot_titles: Dict[str, List[VulnerabilitySummary]] = {}
+        self._titles: Dict[str, Tuple[float, List[VulnerabilitySummary]]] = {}
+        self._load_snapshot()
+
+    def _load_snapshot(self) -> None:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+            self.version = data["version"]
+            self.codebases = data["codebases"]
+            self._snapshot_titles = {
+                codebase: [VulnerabilitySummary(**v) for v in items]
+                for codebase, items in data["titles"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring catalog snapshot %s: %s", self.snapshot_path, e)
+
+    def _save_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            data = {
+                "version": self.version,
+                "codebases": self.codebases,
+                "titles": {
+                    codebase: [v.model_dump() for v in items]
+                    for codebase, items in self._snapshot_titles.items()
+                },
+            }
+        tmp = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            logger.warning("Could not write catalog snapshot: %s", e)
+
+    def start(self) -> None:
+        """Refresh the codebase list from the backend without blocking the caller."""
+        threading.Thread(target=self.refresh, name="catalog", daemon=True).start()
+
+    def refresh(self) -> None:
+        if not wait_for_backend():
+            self.ready.set()
+            return
+        try:
+            r = httpx.get(
+                f"{API_URL}/vulnerabilities",
+                params={"view": "codebases"},
+                timeout=BACKEND_CONNECT_TIMEOUT,
+            )
+            r.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error("Could not load the codebase list: %s", e)
+            self.ready.set()
+            return
+
+        with self._lock:
+            version = r.headers.get("etag")
+            if version != self.version:
+                # The backend's catalog changed: snapshot titles are stale.
+                self._snapshot_titles.clear()
+                self._titles.clear()
+            self.version = version
+            self.codebases = r.json()
+        self.ready.set()
+        self._save_snapshot()
+        logger.info("Loaded %s codebases.", len(self.codebases))
+
+    async def titles(self, codebase: str) -> List[VulnerabilitySummary]:
+        """Vulnerability IDs and titles of ``codebase``, fetched on demand."""
+        cached = self._titles.get(codebase)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        try:
+            r = await get_client().get(
+                f"/vulnerabilities/{quote(codebase, safe='/')}",
+                params={"view": "titles"},
+            )
+            r.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Could not load titles for %s: %s", codebase, e)
+            return self._snapshot_titles.get(codebase, [])
+
+        items = [VulnerabilitySummary(**v) for v in r.json()]
+        with self._lock:
+            self._titles[codebase] = (time.monotonic() + self.ttl, items)
+            self._snapshot_titles[codebase] = items
+        # File I/O: keep it off the event loop serving the UI.
+        await asyncio.to_thread(self._save_snapshot)
+        return items
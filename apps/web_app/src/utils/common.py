@@ -1,9 +1,10 @@
 import os
-import time
+import json
 import logging
-from typing import Dict, List
-import requests
-from src.utils.pymodels import Vulnerability
+import tempfile
+from functools import lru_cache
+from typing import AsyncIterator, Tuple
+import httpx
 
 # ---------- Global Variables ----------
 
@@ -17,35 +18,47 @@ BACKEND_HOST: str = os.getenv("BACKEND_HOST", "localhost")
 BACKEND_PORT: int = int(os.getenv("BACKEND_PORT", "5000"))
 PORT: int = int(os.getenv("PORT", "8501"))
 API_URL = f"http://{BACKEND_HOST}:{BACKEND_PORT}"
+# Backend HTTP client: seconds to connect / between bytes of a reply, and the
+# keep-alive pool size shared by all UI sessions.
+BACKEND_CONNECT_TIMEOUT: float = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5"))
+BACKEND_READ_TIMEOUT: float = float(os.getenv("BACKEND_READ_TIMEOUT", "60"))
+BACKEND_MAX_CONNECTIONS: int = int(os.getenv("BACKEND_MAX_CONNECTIONS", "100"))
+# Gradio event handlers running at once, and events allowed to wait (0 = unbounded).
+GRADIO_CONCURRENCY: int = int(os.getenv("GRADIO_CONCURRENCY", "64"))
+GRADIO_MAX_QUEUE: int = int(os.getenv("GRADIO_MAX_QUEUE", "256"))
+# Last known codebases and titles, for instant dropdowns on a warm start
+# ("" disables), and seconds a codebase's fetched titles stay fresh.
+CATALOG_SNAPSHOT_PATH: str = os.getenv(
+    "CATALOG_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "vuln_catalog.json")
+)
+CATALOG_TTL: float = float(os.getenv("CATALOG_TTL", "60"))
 
 # ---------- All util Functions ----------
 
 
-def wait_for_backend(max_retries: int = 10, delay: int = 5) -> None:
-    """Wait until management_api is healthy (up and responding)."""
-    for attempt in range(1, max_retries + 1):
-        try:
-            r = requests.get(f"{API_URL}/health", timeout=5)
-            if r.status_code == 200:
-                logger.info("✅ Backend is healthy.")
-                return
-        except requests.RequestException:
-            pass
-        logger.warning(f"⏳ Waiting for backend... (attempt {attempt}/{max_retries})")
-        time.sleep(delay)
-    raise RuntimeError("❌ Backend did not become healthy in time.")
-
-
-def get_vulnerabilities() -> Dict[str, List[Vulnerability]]:
-    """Fetch vulnerabilities from backend (title + code only, no category)."""
-
-    wait_for_backend()
-
-    r = requests.get(f"{API_URL}/vulnerabilities", timeout=60)
-    data = r.json()
+@lru_cache(maxsize=1)
+def get_client() -> httpx.AsyncClient:
+    """Process-wide async client for the backend, with a keep-alive connection pool."""
+    return httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=httpx.Timeout(BACKEND_READ_TIMEOUT, connect=BACKEND_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=BACKEND_MAX_CONNECTIONS,
+            max_keepalive_connections=BACKEND_MAX_CONNECTIONS,
+        ),
+    )
 
-    vulns: Dict[str, List[Vulnerability]] = {}
-    for codebase, vuln_list in data.items():
-        vulns[codebase] = [Vulnerability(**v) for v in vuln_list]
 
-    return vulns
+async def aiter_sse(response: httpx.Response) -> AsyncIterator[Tuple[str, dict]]:
+    """Parse a streaming Server-Sent Events response into ``(event, data)`` pairs."""
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        if line:
+            field, _, value = line.partition(":")
+            if field == "event":
+                event = value.strip()
+            elif field == "data":
+                data.append(value.lstrip())
+        elif data:
+            yield event, json.loads("\n".join(data))
+            event, data = "message", []
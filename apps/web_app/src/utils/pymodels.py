@@ -1,42 +1,26 @@
-from enum import Enum
-from typing import Optional, List
+from typing import Dict, Optional
 from pydantic import BaseModel
 
 
-class Sender(str, Enum):
-    """Enum for message sender types."""
+class VulnerabilitySummary(BaseModel):
+    """Vulnerability ID and title, as listed by the backend's titles view."""
 
-    USER = "user"
-    ASSISTANT = "assistant"
-
-
-class Vulnerability(BaseModel):
-    """Data model for a code vulnerability."""
-
-    code: str
+    id: str
     title: str
-    category: Optional[str] = ""
-    fix_code: Optional[str] = ""
-    notes: Optional[str] = ""
-
-
-class ChatMessage(BaseModel):
-    """Represents a user or bot message in the conversation."""
-
-    sender: Sender
-    message: str
 
 
 class ChatRequest(BaseModel):
-    """Incoming user message."""
+    """Incoming user message (the backend keeps the history per session_id)."""
 
-    memory: List[ChatMessage]
     user_input: str
     codebase: str
     title: str
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
-    """Bot response with updated memory."""
+    """Bot response and the session it belongs to."""
 
     response: str
+    session_id: Optional[str] = None
+    models: Dict[str, str] = {}